@@ -0,0 +1,87 @@
+"""
+Benchmark: application startup with eager and lazy route loading.
+
+Generates a ``routes/`` tree with N route files, each importing its own
+"heavy" dependency module (simulated with a fixed amount of import-time
+work), and measures ``RunApiApp`` construction time plus the latency of the
+first and second request to one route, with ``ROUTES_LAZY`` off and on.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--routes N] [--import-ms MS]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from runapi import RunApiConfig, RunApiApp  # noqa: E402
+
+DEPENDENCY = "import time\n_end = time.perf_counter() + {seconds}\nwhile time.perf_counter() < _end:\n    pass\n"
+HANDLER = "import {dependency}\n\nasync def get():\n    return {{}}\n"
+
+
+def build_tree(root: Path, count: int, import_ms: float):
+    (root / "deps").mkdir()
+    for i in range(count):
+        (root / "deps" / f"dep{i}.py").write_text(DEPENDENCY.format(seconds=import_ms / 1000))
+        section = root / "routes" / f"section{i // 50}"
+        section.mkdir(parents=True, exist_ok=True)
+        (section / f"page{i}.py").write_text(HANDLER.format(dependency=f"dep{i}"))
+
+
+def run(lazy: bool, path: str):
+    for name in [name for name in sys.modules if name.startswith("dep")]:
+        del sys.modules[name]
+    config = RunApiConfig()
+    config.debug = False
+    config.routes_lazy = lazy
+    config.routes_preimport = False
+    started = time.perf_counter()
+    app = RunApiApp(config=config)
+    startup = time.perf_counter() - started
+
+    client = TestClient(app.get_app())
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        assert client.get(path).status_code == 200
+        timings.append(time.perf_counter() - started)
+    return startup, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--import-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        build_tree(root, args.routes, args.import_ms)
+        old_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        sys.path.insert(0, str(root / "deps"))
+        try:
+            print(f"{args.routes} route files, {args.import_ms} ms import each")
+            for lazy in (False, True):
+                startup, (first, second) = run(lazy, "/section0/page1")
+                label = "lazy" if lazy else "eager"
+                print(
+                    f"  {label:<6} startup={startup * 1000:8.1f} ms  "
+                    f"first request={first * 1000:7.1f} ms  second={second * 1000:6.1f} ms"
+                )
+        finally:
+            sys.path.remove(str(root / "deps"))
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: response compression codecs and the compressed-body cache.
+
+For each installed codec (gzip always; br with brotli, zstd with zstandard
+or Python 3.14+) and a few payloads, reports CPU milliseconds per MB of
+input and the compression ratio, at the ``RunApiConfig`` default level
+and at the codec's fastest and strongest levels. Then sends the same JSON response repeatedly through
+``CompressionMiddleware`` with and without the per-worker cache.
+
+Usage:
+    python benchmarks/bench_compression.py [--repeat N] [--requests N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runapi import RunApiConfig  # noqa: E402
+from runapi.compression import CODECS, available_encodings  # noqa: E402
+from runapi.middleware import CompressionMiddleware  # noqa: E402
+
+LEVELS = {"gzip": [1, 9], "br": [1, 11], "zstd": [1, 19]}
+
+
+def payloads():
+    rng = random.Random(1)
+    api = json.dumps({
+        "items": [
+            {"id": i, "name": f"user{i}", "email": f"user{i}@example.com", "active": i % 3 == 0,
+             "score": round(rng.random() * 100, 2), "tags": rng.sample(["a", "b", "c", "d", "e"], 2)}
+            for i in range(1000)
+        ]
+    }).encode()
+    html = "".join(
+        f"<div class='row'><span class='label'>Item</span><a href='/items/{n}'>{n}</a></div>\n" for n in range(1500)
+    ).encode()
+    return {
+        f"JSON {len(api) // 1024} KB": api,
+        f"HTML {len(html) // 1024} KB": html,
+        "JSON 1 MB": (api * (1024 * 1024 // len(api) + 1))[:1024 * 1024],
+        "random 256 KB": rng.randbytes(256 * 1024),
+    }
+
+
+def measure(codec, body, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        compressed = codec.compress(body)
+    cpu = (time.process_time() - started) / repeat
+    return cpu * 1000 / (len(body) / (1024 * 1024)), len(body) / len(compressed)
+
+
+async def serve(middleware, requests):
+    scope = {
+        "type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip, br, zstd")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await middleware(scope, receive, send)
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    config = RunApiConfig()
+    defaults = {"gzip": config.compression_gzip_level, "br": config.compression_brotli_level,
+                "zstd": config.compression_zstd_level}
+    encodings = available_encodings()
+    print(f"codecs: {', '.join(encodings)}  (missing: {', '.join(set(CODECS) - set(encodings)) or 'none'})")
+    for label, body in payloads().items():
+        print(label)
+        for name in encodings:
+            for level in [defaults[name]] + LEVELS[name]:
+                ms_per_mb, ratio = measure(CODECS[name](level), body, args.repeat)
+                marker = "*" if level == defaults[name] else " "
+                print(f"  {name:<5} level {level:>2}{marker} {ms_per_mb:8.1f} ms CPU/MB  ratio {ratio:6.2f}x")
+    print("  * = RunApiConfig default level")
+
+    body = payloads()["JSON 1 MB"][:200 * 1024]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+    print(f"Repeated {len(body) // 1024} KB JSON response through CompressionMiddleware")
+    for cache_size in (0, config.compression_cache_size):
+        middleware = CompressionMiddleware(app, cache_size=cache_size, config=config)
+        rate = asyncio.run(serve(middleware, args.requests))
+        label = "no cache" if not cache_size else f"cache {cache_size // (1024 * 1024)} MB"
+        print(f"  {middleware.codecs[0].name:<5} {label:<12} {rate:9.0f} responses/s")
+
+
+if __name__ == "__main__":
+    main()
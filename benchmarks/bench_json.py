@@ -0,0 +1,108 @@
+"""
+Benchmark: JSON engines for route return values.
+
+Reports milliseconds per render and throughput of each installed engine
+(orjson, msgspec, stdlib json) on 1 KB, 100 KB and 10 MB API-style
+payloads. Then the same payloads are served by a route three ways:
+returned as a dict with the stdlib response class, returned as a dict
+with the engine-backed default response class of a RunApi app (FastAPI
+still runs its jsonable_encoder pass over the value), and wrapped in
+``runapi.JSONResponse`` as route files do (no jsonable_encoder pass).
+
+Usage:
+    python benchmarks/bench_json.py [--repeat N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse as StdlibJSONResponse  # noqa: E402
+
+from runapi.serialization import (  # noqa: E402
+    JSONResponse, available_json_engines, get_json_engine, json_response_class,
+)
+
+
+def payload(size):
+    rng = random.Random(size)
+    items = []
+    encoded = 2
+    while encoded < size:
+        item = {
+            "id": len(items), "name": f"user{len(items)}", "email": f"user{len(items)}@example.com",
+            "active": rng.random() < 0.5, "score": round(rng.random() * 100, 3),
+            "tags": rng.sample(["admin", "staff", "beta", "trial", "vip"], 2), "manager": None,
+        }
+        items.append(item)
+        encoded += len(json.dumps(item)) + 1
+    return {"items": items, "total": len(items)}
+
+
+def measure(render, content, repeat):
+    render(content)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = render(content)
+    return (time.perf_counter() - started) / repeat, len(body)
+
+
+async def call(app, repeat):
+    scope = {"type": "http", "method": "GET", "path": "/", "root_path": "", "query_string": b"", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / repeat
+
+
+def route_app(content, response_class, wrap=False):
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/")
+    async def route():
+        return JSONResponse(content) if wrap else content
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200, help="Renders of the 1 KB payload (fewer for larger ones)")
+    args = parser.parse_args()
+
+    engines = available_json_engines()
+    print(f"engines: {', '.join(engines)}  (auto = {get_json_engine('auto').name})")
+    for label, size in (("1 KB", 1024), ("100 KB", 100 * 1024), ("10 MB", 10 * 1024 * 1024)):
+        content = payload(size)
+        repeat = max(3, args.repeat * 10 * 1024 // size)
+        print(f"{label} payload")
+        for name in engines:
+            seconds, length = measure(get_json_engine(name).dumps, content, repeat)
+            print(f"  {name:<8} render {seconds * 1000:9.3f} ms  {length / seconds / (1024 * 1024):8.0f} MB/s")
+        repeat = max(3, repeat // 10)
+        routes = (
+            ("return dict, stdlib", StdlibJSONResponse, False),
+            ("return dict, runapi", json_response_class("auto"), False),
+            ("return JSONResponse(...)", json_response_class("auto"), True),
+        )
+        for name, response_class, wrap in routes:
+            seconds = asyncio.run(call(route_app(content, response_class, wrap), repeat))
+            print(f"  route: {name:<25} {seconds * 1000:9.3f} ms per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: requests/second through the default RunApi middleware stack.
+
+Compares the pure ASGI middleware implementation against the same stack
+routed through ``BaseHTTPMiddleware`` (the previous implementation) and
+against the fused single-pass pipeline (``MIDDLEWARE_FUSED``), by driving
+the ASGI app in-process with no network or server overhead.
+
+Usage:
+    python benchmarks/bench_middleware.py [--requests N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "true")
+os.environ.setdefault("RATE_LIMIT_CALLS", "100000000")
+os.environ.setdefault("DEBUG", "true")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from runapi import RunApiApp, RunApiConfig  # noqa: E402
+from runapi import middleware as runapi_middleware  # noqa: E402
+
+
+def _legacy(cls):
+    """Wrap a hook-based middleware so it runs through BaseHTTPMiddleware."""
+
+    class Legacy(cls):
+        async def dispatch(self, request, call_next):
+            early = await cls.process_request(self, request)
+            if early is not None:
+                return early
+            response = await call_next(request)
+            cls.process_response(self, request, response.status_code, response.headers)
+            return response
+
+    Legacy.__name__ = f"Legacy{cls.__name__}"
+    return Legacy
+
+
+def build_app(legacy: bool = False, fused: bool = False, timing: bool = False):
+    names = ["RequestLoggingMiddleware", "RateLimitMiddleware", "SecurityHeadersMiddleware"]
+    originals = {name: getattr(runapi_middleware, name) for name in names}
+    core = sys.modules["runapi.core"]
+    try:
+        if legacy:
+            for name, cls in originals.items():
+                setattr(core, name, _legacy(cls))
+        config = RunApiConfig()
+        config.middleware_fused = fused
+        config.middleware_timing = timing
+        runapi_app = RunApiApp(config=config)
+    finally:
+        for name, cls in originals.items():
+            setattr(core, name, cls)
+
+    app = runapi_app.get_app()
+
+    @app.get("/bench")
+    async def bench():
+        return {"ok": True}
+
+    return app, runapi_app
+
+
+async def run(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/bench",
+        "raw_path": b"/bench",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm up (route compilation, lazy imports)
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    before = asyncio.run(run(build_app(legacy=True)[0], args.requests))
+    after = asyncio.run(run(build_app()[0], args.requests))
+    fused = asyncio.run(run(build_app(fused=True)[0], args.requests))
+
+    print(f"BaseHTTPMiddleware stack: {before:10.0f} req/s")
+    print(f"Pure ASGI stack:          {after:10.0f} req/s  ({after / before:.2f}x)")
+    print(f"Fused pipeline:           {fused:10.0f} req/s  ({fused / before:.2f}x)")
+
+    app, runapi_app = build_app(fused=True, timing=True)
+    asyncio.run(run(app, args.requests))
+    print("\nFused pipeline stage breakdown:")
+    for stage, stats in sorted(runapi_app.middleware_timings.snapshot().items()):
+        print(f"  {stage:<12} {stats['avg_us']:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: event-loop lag while concurrent logins verify passwords.
+
+Runs a ticker that sleeps 5 ms in a loop and records how late each wake-up
+is, while N concurrent "logins" verify a password hash: synchronously inside
+the coroutine (``verify_password``), on the thread pool and on the process
+pool (``averify_password``). Reports logins per second and loop lag
+percentiles.
+
+Usage:
+    python benchmarks/bench_password_hashing.py [--logins N] [--concurrency N] [--scheme bcrypt]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runapi.auth import PasswordHashPool, PasswordManager  # noqa: E402
+
+TICK = 0.005
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        mark = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - mark - TICK)
+
+
+async def run(manager, hashed, logins, concurrency, use_async):
+    lags = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    await asyncio.sleep(TICK * 2)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with gate:
+            if use_async:
+                assert await manager.averify_password("correct horse", hashed)
+            else:
+                assert manager.verify_password("correct horse", hashed)
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick_task
+    return logins / elapsed, lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scheme", default="bcrypt")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        hashed = PasswordManager(schemes=[args.scheme]).hash_password("correct horse")
+    except Exception as e:
+        # e.g. passlib 1.7 with bcrypt>=4.1 cannot load its bcrypt backend
+        print(f"{args.scheme} unavailable ({e.__class__.__name__}), using pbkdf2_sha256")
+        args.scheme = "pbkdf2_sha256"
+        hashed = PasswordManager(schemes=[args.scheme]).hash_password("correct horse")
+
+    scenarios = [
+        ("sync verify_password", None),
+        ("averify_password thread pool", "thread"),
+        ("averify_password process pool", "process"),
+    ]
+    for label, executor in scenarios:
+        pool = PasswordHashPool(max_workers=args.workers, max_queue=args.concurrency, executor=executor or "thread")
+        manager = PasswordManager(schemes=[args.scheme], hash_pool=pool)
+        try:
+            rate, lags = asyncio.run(run(manager, hashed, args.logins, args.concurrency, executor is not None))
+        finally:
+            pool.shutdown()
+        print(
+            f"{args.scheme} {label:<32} {rate:8.1f} logins/s "
+            f"loop lag p50={percentile(lags, 50) * 1000:7.2f} ms "
+            f"p99={percentile(lags, 99) * 1000:8.2f} ms max={max(lags) * 1000:8.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
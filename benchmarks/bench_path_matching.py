@@ -0,0 +1,78 @@
+"""
+Benchmark: AuthMiddleware protected/excluded path decisions.
+
+Compares the former linear ``startswith`` scan with the compiled
+``PathMatcher`` (every lookup a miss in the decision cache) and with the
+memoized ``AuthMiddleware._is_protected_path``, for 10, 100 and 1000
+protected prefixes.
+
+Usage:
+    python benchmarks/bench_path_matching.py [--lookups N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI  # noqa: E402
+
+from runapi.middleware import AuthMiddleware  # noqa: E402
+from runapi.paths import PathMatcher  # noqa: E402
+
+WORDS = ["api", "v1", "v2", "users", "orders", "admin", "billing", "reports", "teams", "items", "search", "files"]
+
+
+def linear_is_protected(protected_paths, excluded_paths, path):
+    if path in excluded_paths:
+        return False
+    for pattern in protected_paths:
+        if path.startswith(pattern):
+            return True
+    return False
+
+
+def timed(func, paths):
+    clock = time.perf_counter_ns
+    started = clock()
+    for path in paths:
+        func(path)
+    return (clock() - started) / len(paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    for count in (10, 100, 1000):
+        protected = sorted({
+            "/" + "/".join(rng.choices(WORDS, k=3)) + f"/{i}" for i in range(count)
+        })
+        excluded = ["/docs", "/redoc", "/openapi.json", "/health"]
+        # Mostly unprotected paths: the linear scan's worst case
+        distinct = ["/" + "/".join(rng.choices(WORDS, k=4)) + f"/{i}" for i in range(2000)]
+        distinct += rng.sample(protected, min(200, count))
+        paths = rng.choices(distinct, k=args.lookups)
+
+        compiled = PathMatcher(protected, prefix=True)
+        excluded_matcher = PathMatcher(excluded, prefix=False)
+        middleware = AuthMiddleware(FastAPI(), secret_key="bench", protected_paths=protected, excluded_paths=excluded)
+
+        for path in distinct:
+            assert compiled.matches(path) == linear_is_protected(protected, [], path)
+
+        linear_ns = timed(lambda path: linear_is_protected(protected, excluded, path), paths)
+        compiled_ns = timed(lambda path: not excluded_matcher.matches(path) and compiled.matches(path), paths)
+        memo_ns = timed(middleware._is_protected_path, paths)
+        print(
+            f"{count:>5} patterns  linear={linear_ns:8.0f} ns  compiled={compiled_ns:6.0f} ns  "
+            f"memoized={memo_ns:6.0f} ns  speedup={linear_ns / memo_ns:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
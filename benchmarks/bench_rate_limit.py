@@ -0,0 +1,72 @@
+"""
+Benchmark: rate limit store memory and latency with many distinct clients.
+
+Feeds N distinct client keys (default 1,000,000) through ``RateLimitStore``
+and reports resident memory growth and per-hit latency percentiles, for an
+uncapped store and for the default ``RATE_LIMIT_MAX_KEYS`` cap.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [--keys N]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import psutil  # noqa: E402
+
+from runapi.ratelimit import RateLimitStore, get_rate_limit_algorithm  # noqa: E402
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(keys: int, max_keys: int, algorithm: str = "fixed_window"):
+    gc.collect()
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+
+    store = RateLimitStore(get_rate_limit_algorithm(algorithm, 100, 60), max_keys=max_keys)
+    clock = time.perf_counter_ns
+    now = time.time()
+    latencies = []
+    for i in range(keys):
+        key = f"{i >> 24 & 255}.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        start = clock()
+        store.hit(key, now)
+        latencies.append(clock() - start)
+
+    rss_after = process.memory_info().rss
+    return {
+        "keys_kept": len(store),
+        "rss_mb": (rss_after - rss_before) / 1024 / 1024,
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "evictions": store.evictions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    parser.add_argument("--algorithm", default="fixed_window")
+    args = parser.parse_args()
+
+    for label, cap in (("uncapped", args.keys * 2), (f"max_keys={args.max_keys}", args.max_keys)):
+        result = run(args.keys, cap, args.algorithm)
+        print(
+            f"{args.algorithm} {label:<18} kept={result['keys_kept']:>8} "
+            f"rss=+{result['rss_mb']:7.1f} MB "
+            f"p50={result['p50_us']:5.2f} us p99={result['p99_us']:5.2f} us "
+            f"evictions={result['evictions']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: sequential vs concurrent route imports at startup.
+
+Generates a ``routes/`` tree with N route files, each importing its own
+dependency module that does a fixed amount of blocking I/O (``--io-ms``,
+standing in for cold disk / network file system reads and C extension
+initialisation, which release the GIL) and pure-Python work (``--cpu-ms``,
+which does not). Measures ``RunApiApp`` construction with
+``ROUTES_IMPORT_WORKERS`` 1 and the given worker counts, and prints the
+slowest files from the per-file import report.
+
+Usage:
+    python benchmarks/bench_route_import.py [--routes N] [--io-ms MS] [--cpu-ms MS] [--workers 4 8 16]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runapi import RunApiConfig, RunApiApp  # noqa: E402
+
+DEPENDENCY = (
+    "import time\n"
+    "time.sleep({io})\n"
+    "_end = time.perf_counter() + {cpu}\n"
+    "while time.perf_counter() < _end:\n"
+    "    pass\n"
+)
+HANDLER = "import {dependency}\n\nasync def get():\n    return {{}}\n"
+
+
+def build_tree(root: Path, count: int, io_ms: float, cpu_ms: float):
+    (root / "deps").mkdir()
+    for i in range(count):
+        (root / "deps" / f"dep{i}.py").write_text(DEPENDENCY.format(io=io_ms / 1000, cpu=cpu_ms / 1000))
+        section = root / "routes" / f"section{i // 50}"
+        section.mkdir(parents=True, exist_ok=True)
+        (section / f"page{i}.py").write_text(HANDLER.format(dependency=f"dep{i}"))
+
+
+def run(workers: int):
+    for name in [name for name in sys.modules if name.startswith("dep")]:
+        del sys.modules[name]
+    config = RunApiConfig()
+    config.debug = False
+    config.routes_manifest = False
+    config.routes_import_workers = workers
+    started = time.perf_counter()
+    app = RunApiApp(config=config)
+    return time.perf_counter() - started, app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--routes", type=int, default=300)
+    parser.add_argument("--io-ms", type=float, default=2.0)
+    parser.add_argument("--cpu-ms", type=float, default=0.5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8, 16])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        build_tree(root, args.routes, args.io_ms, args.cpu_ms)
+        old_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        sys.path.insert(0, str(root / "deps"))
+        try:
+            print(f"{args.routes} route files, {args.io_ms} ms I/O + {args.cpu_ms} ms CPU per import")
+            baseline, app = run(1)
+            print(f"  workers= 1  startup={baseline * 1000:8.1f} ms")
+            for workers in args.workers:
+                elapsed, _ = run(workers)
+                print(f"  workers={workers:2}  startup={elapsed * 1000:8.1f} ms  speedup={baseline / elapsed:5.1f}x")
+            print("  slowest imports (sequential):")
+            for name, seconds in app.route_import_report(3):
+                print(f"    {seconds * 1000:6.2f} ms  {name}")
+        finally:
+            sys.path.remove(str(root / "deps"))
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: request routing with many file-based routes.
+
+Generates a ``routes/`` tree with N route files (default 2,000; a mix of
+static and ``[id]`` routes), loads it with ``ROUTER_COMPILED`` off (FastAPI's
+linear route scan) and on (radix-tree dispatch), and times requests sent
+straight to the application router for early, late, parameterised and
+unknown paths.
+
+Usage:
+    python benchmarks/bench_routing.py [--routes N] [--requests N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runapi import RunApiConfig, RunApiApp  # noqa: E402
+
+HANDLER = "async def get():\n    return {}\n"
+PARAM_HANDLER = "async def get(item_id: str):\n    return {}\n"
+
+
+def build_tree(root: Path, count: int):
+    for i in range(count):
+        section = root / "routes" / f"section{i // 50}"
+        if i % 10 == 0:
+            (section / f"items{i}").mkdir(parents=True, exist_ok=True)
+            (section / f"items{i}" / "[item_id].py").write_text(PARAM_HANDLER)
+        else:
+            section.mkdir(parents=True, exist_ok=True)
+            (section / f"page{i}.py").write_text(HANDLER)
+
+
+async def dispatch(router, path):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    try:
+        await router(scope, receive, send)
+    except Exception:
+        pass  # 404s raise HTTPException without the exception middleware
+
+
+async def measure(router, path, requests):
+    for _ in range(50):
+        await dispatch(router, path)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await dispatch(router, path)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--routes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    last = args.routes - 1 if (args.routes - 1) % 10 else args.routes - 2
+    last_param = max(i for i in range(args.routes) if i % 10 == 0)
+    paths = {
+        "early static": "/section0/page1",
+        "late static": f"/section{last // 50}/page{last}",
+        "late [id]": f"/section{last_param // 50}/items{last_param}/42",
+        "unknown (404)": "/does/not/exist",
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        build_tree(Path(temp_dir), args.routes)
+        old_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            results = {}
+            for compiled in (False, True):
+                config = RunApiConfig()
+                config.router_compiled = compiled
+                config.debug = False
+                app = RunApiApp(config=config)
+                router = app.get_app().router
+                results[compiled] = {
+                    label: asyncio.run(measure(router, path, args.requests)) for label, path in paths.items()
+                }
+        finally:
+            os.chdir(old_cwd)
+
+    print(f"{args.routes} route files")
+    for label in paths:
+        linear, radix = results[False][label], results[True][label]
+        print(f"  {label:<14} linear={linear:9.1f} us  radix={radix:7.1f} us  speedup={linear / radix:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
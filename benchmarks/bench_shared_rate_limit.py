@@ -0,0 +1,81 @@
+"""
+Benchmark: shared memory rate limit store under multi-process contention.
+
+Starts 8 and 16 worker processes that hammer one ``SharedMemoryRateLimitStore``
+and reports aggregate throughput and per-hit p99 latency for two workloads:
+every worker hitting the same hot key (worst case, one locked probe window)
+and every worker hitting its own distinct clients (spread over the table).
+
+Usage:
+    python benchmarks/bench_shared_rate_limit.py [--hits N]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from runapi.ratelimit import SharedMemoryRateLimitStore, get_rate_limit_algorithm  # noqa: E402
+
+
+def worker(path, worker_id, hits, hot, start_event, queue):
+    algorithm = get_rate_limit_algorithm("gcra", calls=10**9, period=60)
+    store = SharedMemoryRateLimitStore(algorithm, path=path)
+    clock = time.perf_counter_ns
+    latencies = []
+    keys = ["hot"] * hits if hot else [f"w{worker_id}-c{i % 5000}" for i in range(hits)]
+    start_event.wait()
+    for key in keys:
+        start = clock()
+        store.hit(key, time.time())
+        latencies.append(clock() - start)
+    latencies.sort()
+    queue.put((sum(latencies), latencies[int(len(latencies) * 0.99)]))
+
+
+def run(workers: int, hits: int, hot: bool):
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "ratelimit")
+        algorithm = get_rate_limit_algorithm("gcra", calls=10**9, period=60)
+        SharedMemoryRateLimitStore(algorithm, path=path).close()
+
+        start_event = context.Event()
+        queue = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(path, i, hits, hot, start_event, queue))
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        time.sleep(0.5)
+
+        wall_start = time.perf_counter()
+        start_event.set()
+        results = [queue.get() for _ in processes]
+        wall = time.perf_counter() - wall_start
+        for process in processes:
+            process.join()
+
+    p99 = max(p for _, p in results) / 1000
+    return workers * hits / wall, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hits", type=int, default=50000, help="hits per worker")
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}")
+    for workers in (8, 16):
+        for hot in (True, False):
+            throughput, p99 = run(workers, args.hits, hot)
+            workload = "hot key" if hot else "distinct keys"
+            print(f"{workers:>2} workers, {workload:<13} {throughput:10.0f} hits/s  p99={p99:7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: token verification with and without the verified-token cache.
+
+Issues N distinct live tokens (default 50,000), then verifies a stream of
+requests that reuse them with a skewed (Zipf-like) distribution, through
+``JWTManager.verify_token`` and ``AuthMiddleware._verify_token``. Reports
+verifications per second, p50/p99 latency, hit rate and cache memory.
+
+Usage:
+    python benchmarks/bench_token_cache.py [--tokens N] [--requests N] [--cache-size N]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import psutil  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from runapi.auth import JWTManager, TokenCache  # noqa: E402
+from runapi.middleware import AuthMiddleware  # noqa: E402
+
+SECRET = "benchmark-secret-key"
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(label, verify, workload, cache):
+    gc.collect()
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    clock = time.perf_counter_ns
+    latencies = []
+    started = clock()
+    for token in workload:
+        mark = clock()
+        payload = verify(token)
+        latencies.append(clock() - mark)
+        assert payload is not None
+    elapsed = (clock() - started) / 1e9
+    rss_after = process.memory_info().rss
+
+    line = (
+        f"{label:<34} {len(workload) / elapsed:>10,.0f} verify/s "
+        f"p50={percentile(latencies, 50) / 1000:6.2f} us p99={percentile(latencies, 99) / 1000:7.2f} us"
+    )
+    if cache is not None:
+        stats = cache.stats()
+        line += f" hit_rate={stats['hit_rate']:.1%} size={stats['size']} rss=+{(rss_after - rss_before) / 1024 / 1024:.1f} MB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=500_000)
+    parser.add_argument("--cache-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    issuer = JWTManager(secret_key=SECRET)
+    tokens = [issuer.create_access_token({"sub": f"user{i}", "roles": ["user"]}) for i in range(args.tokens)]
+
+    # Clients reuse their tokens; a minority of clients make most calls
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(args.tokens)]
+    workload = rng.choices(tokens, weights=weights, k=args.requests)
+
+    for cached in (False, True):
+        manager = JWTManager(secret_key=SECRET)
+        manager.token_cache = TokenCache(max_size=args.cache_size, ttl=300) if cached else None
+        run(f"JWTManager.verify_token cache={'on' if cached else 'off'}", manager.verify_token, workload, manager.token_cache)
+
+    for cached in (False, True):
+        cache = TokenCache(max_size=args.cache_size, ttl=300) if cached else None
+        middleware = AuthMiddleware(FastAPI(), secret_key=SECRET, token_cache=cache)
+        middleware.token_cache = cache  # token_cache=None selects the configured default
+        run(f"AuthMiddleware._verify_token cache={'on' if cached else 'off'}", middleware._verify_token, workload, cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,85 +6,313 @@ __version__ = "0.1.1"
 __author__ = "Amanpreet Singh"
 __email__ = "amanpreetsinghjhiwant7@gmail.com"
 
-# Core framework
-from .core import create_app, create_runapi_app, RunApiApp
-
-# Configuration
-from .config import RunApiConfig, get_config, load_config
-
-# Error handling
-from .errors import (
-    RunApiException,
-    ValidationError,
-    AuthenticationError,
-    AuthorizationError,
-    NotFoundError,
-    ConflictError,
-    RateLimitError,
-    ServerError,
-    DatabaseError,
-    ExternalServiceError,
-    ErrorResponse,
-    ErrorHandler,
-    setup_error_handlers,
-    raise_validation_error,
-    raise_auth_error,
-    raise_permission_error,
-    raise_not_found,
-    raise_conflict,
-    raise_server_error,
-    create_error_response,
-    bad_request,
-    unauthorized,
-    forbidden,
-    not_found,
-    conflict,
-    unprocessable_entity,
-    rate_limited,
-    internal_error,
-)
-
-# Authentication
-from .auth import (
-    PasswordManager,
-    JWTManager,
-    APIKeyManager,
-    AuthDependencies,
-    TokenResponse,
-    hash_password,
-    verify_password,
-    create_access_token,
-    create_refresh_token,
-    verify_token,
-    get_current_user,
-    get_current_active_user,
-    require_roles,
-    require_permissions,
-    generate_api_key,
-    generate_password,
-    create_token_response,
-    api_key_manager,
-)
-
-# Middleware
-from .middleware import (
-    RunApiMiddleware,
-    RequestLoggingMiddleware,
-    RateLimitMiddleware,
-    AuthMiddleware,
-    SecurityHeadersMiddleware,
-    CompressionMiddleware,
-    CORSMiddleware,
-    create_rate_limit_middleware,
-    create_auth_middleware,
-    create_logging_middleware,
-    create_security_middleware,
-)
-
-# Convenience imports
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response
-from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
-from fastapi.middleware.cors import CORSMiddleware as FastAPICORSMiddleware
+import importlib
+from typing import TYPE_CHECKING
+
+# Public names -> module they live in (PEP 562 lazy exports)
+_EXPORTS = {
+    # Core framework
+    "create_app": ".core",
+    "create_runapi_app": ".core",
+    "RunApiApp": ".core",
+    # Configuration
+    "RunApiConfig": ".config",
+    "get_config": ".config",
+    "load_config": ".config",
+    # Error handling
+    "RunApiException": ".errors",
+    "ValidationError": ".errors",
+    "AuthenticationError": ".errors",
+    "AuthorizationError": ".errors",
+    "NotFoundError": ".errors",
+    "ConflictError": ".errors",
+    "PayloadTooLargeError": ".errors",
+    "RateLimitError": ".errors",
+    "ServiceUnavailableError": ".errors",
+    "ServerError": ".errors",
+    "DatabaseError": ".errors",
+    "ExternalServiceError": ".errors",
+    "ErrorResponse": ".errors",
+    "ErrorHandler": ".errors",
+    "setup_error_handlers": ".errors",
+    "raise_validation_error": ".errors",
+    "raise_auth_error": ".errors",
+    "raise_permission_error": ".errors",
+    "raise_not_found": ".errors",
+    "raise_conflict": ".errors",
+    "raise_server_error": ".errors",
+    "create_error_response": ".errors",
+    "bad_request": ".errors",
+    "unauthorized": ".errors",
+    "forbidden": ".errors",
+    "not_found": ".errors",
+    "conflict": ".errors",
+    "unprocessable_entity": ".errors",
+    "rate_limited": ".errors",
+    "internal_error": ".errors",
+    # Authentication
+    "PasswordManager": ".auth",
+    "JWTManager": ".auth",
+    "APIKeyManager": ".auth",
+    "AuthDependencies": ".auth",
+    "TokenResponse": ".auth",
+    "TokenCache": ".auth",
+    "PasswordHashPool": ".auth",
+    "hash_password": ".auth",
+    "verify_password": ".auth",
+    "ahash_password": ".auth",
+    "averify_password": ".auth",
+    "create_access_token": ".auth",
+    "create_refresh_token": ".auth",
+    "verify_token": ".auth",
+    "get_current_user": ".auth",
+    "get_current_active_user": ".auth",
+    "require_roles": ".auth",
+    "require_permissions": ".auth",
+    "generate_api_key": ".auth",
+    "generate_password": ".auth",
+    "create_token_response": ".auth",
+    "api_key_manager": ".auth",
+    # Middleware
+    "RunApiMiddleware": ".middleware",
+    "RequestLoggingMiddleware": ".middleware",
+    "RateLimitMiddleware": ".middleware",
+    "AuthMiddleware": ".middleware",
+    "SecurityHeadersMiddleware": ".middleware",
+    "CompressionMiddleware": ".middleware",
+    "CORSMiddleware": ".middleware",
+    "FusedMiddleware": ".middleware",
+    "ResponseCacheMiddleware": ".middleware",
+    "UploadLimitMiddleware": ".middleware",
+    "StageTimings": ".middleware",
+    "create_rate_limit_middleware": ".middleware",
+    "create_auth_middleware": ".middleware",
+    "create_logging_middleware": ".middleware",
+    "create_security_middleware": ".middleware",
+    # Cache and shared-state backends
+    "CacheBackend": ".backends",
+    "MemoryCacheBackend": ".backends",
+    "RedisCacheBackend": ".backends",
+    "RedisClient": ".backends",
+    "RedisError": ".backends",
+    "create_cache_backend": ".backends",
+    "get_redis_client": ".backends",
+    # Path matching and routing
+    "PathMatcher": ".paths",
+    "RadixRouter": ".routing",
+    # Response caching
+    "CachedResponse": ".cache",
+    "CachePolicy": ".cache",
+    "ResponseCache": ".cache",
+    "cached": ".cache",
+    # Rate limiting
+    "RateLimitAlgorithm": ".ratelimit",
+    "FixedWindowAlgorithm": ".ratelimit",
+    "SlidingWindowCounterAlgorithm": ".ratelimit",
+    "TokenBucketAlgorithm": ".ratelimit",
+    "GCRAAlgorithm": ".ratelimit",
+    "RateLimitStore": ".ratelimit",
+    "SharedMemoryRateLimitStore": ".ratelimit",
+    "RedisRateLimitStore": ".ratelimit",
+    "create_rate_limit_store": ".ratelimit",
+    "get_rate_limit_algorithm": ".ratelimit",
+    # JSON serialization
+    "JSONResponse": ".serialization",
+    "JSONEngine": ".serialization",
+    "get_json_engine": ".serialization",
+    "json_response_class": ".serialization",
+    # Uploads
+    "UploadManager": ".uploads",
+    "UploadedFile": ".uploads",
+    # Static files
+    "StaticManifest": ".static",
+    "PrecompressedStaticFiles": ".static",
+    "HotStaticFiles": ".static",
+    # Serving and reloading
+    "Supervisor": ".supervisor",
+    "RouteReloader": ".reload",
+    # Convenience imports
+    "FastAPI": "fastapi",
+    "APIRouter": "fastapi",
+    "Depends": "fastapi",
+    "HTTPException": "fastapi",
+    "Request": "fastapi",
+    "Response": "fastapi",
+    "HTMLResponse": "fastapi.responses",
+    "FileResponse": "fastapi.responses",
+}
+
+# Re-exports under a different name: public name -> (module, attribute)
+_ALIASES = {
+    "FastAPICORSMiddleware": ("fastapi.middleware.cors", "CORSMiddleware"),
+}
+
+# Submodules reachable as attributes, e.g. ``runapi.auth``
+_SUBMODULES = frozenset({
+    "auth", "backends", "cache", "cli", "compression", "config", "core", "discovery", "errors",
+    "manifest", "middleware", "paths", "profiling", "ratelimit", "reload", "routing",
+    "serialization", "static", "supervisor", "tuning", "uploads",
+})
+
+
+def __getattr__(name: str):
+    """Import public names on first access (PEP 562).
+
+    ``import runapi`` stays cheap: FastAPI, jose and passlib are only loaded
+    once something that needs them is used.
+    """
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    elif name in _ALIASES:
+        module, attribute = _ALIASES[name]
+        value = getattr(importlib.import_module(module, __name__), attribute)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    # Core framework
+    from .core import create_app, create_runapi_app, RunApiApp
+
+    # Configuration
+    from .config import RunApiConfig, get_config, load_config
+
+    # Error handling
+    from .errors import (
+        RunApiException,
+        ValidationError,
+        AuthenticationError,
+        AuthorizationError,
+        NotFoundError,
+        ConflictError,
+        PayloadTooLargeError,
+        RateLimitError,
+        ServiceUnavailableError,
+        ServerError,
+        DatabaseError,
+        ExternalServiceError,
+        ErrorResponse,
+        ErrorHandler,
+        setup_error_handlers,
+        raise_validation_error,
+        raise_auth_error,
+        raise_permission_error,
+        raise_not_found,
+        raise_conflict,
+        raise_server_error,
+        create_error_response,
+        bad_request,
+        unauthorized,
+        forbidden,
+        not_found,
+        conflict,
+        unprocessable_entity,
+        rate_limited,
+        internal_error,
+    )
+
+    # Authentication
+    from .auth import (
+        PasswordManager,
+        JWTManager,
+        APIKeyManager,
+        AuthDependencies,
+        TokenResponse,
+        TokenCache,
+        PasswordHashPool,
+        hash_password,
+        verify_password,
+        ahash_password,
+        averify_password,
+        create_access_token,
+        create_refresh_token,
+        verify_token,
+        get_current_user,
+        get_current_active_user,
+        require_roles,
+        require_permissions,
+        generate_api_key,
+        generate_password,
+        create_token_response,
+        api_key_manager,
+    )
+
+    # Middleware
+    from .middleware import (
+        RunApiMiddleware,
+        RequestLoggingMiddleware,
+        RateLimitMiddleware,
+        AuthMiddleware,
+        SecurityHeadersMiddleware,
+        CompressionMiddleware,
+        CORSMiddleware,
+        FusedMiddleware,
+        ResponseCacheMiddleware,
+        UploadLimitMiddleware,
+        StageTimings,
+        create_rate_limit_middleware,
+        create_auth_middleware,
+        create_logging_middleware,
+        create_security_middleware,
+    )
+
+    # Cache and shared-state backends
+    from .backends import (
+        CacheBackend,
+        MemoryCacheBackend,
+        RedisCacheBackend,
+        RedisClient,
+        RedisError,
+        create_cache_backend,
+        get_redis_client,
+    )
+
+    # Path matching and routing
+    from .paths import PathMatcher
+    from .routing import RadixRouter
+
+    # Response caching
+    from .cache import CachedResponse, CachePolicy, ResponseCache, cached
+
+    # Rate limiting
+    from .ratelimit import (
+        RateLimitAlgorithm,
+        FixedWindowAlgorithm,
+        SlidingWindowCounterAlgorithm,
+        TokenBucketAlgorithm,
+        GCRAAlgorithm,
+        RateLimitStore,
+        SharedMemoryRateLimitStore,
+        RedisRateLimitStore,
+        create_rate_limit_store,
+        get_rate_limit_algorithm,
+    )
+
+    # Uploads
+    from .uploads import UploadManager, UploadedFile
+
+    # JSON serialization
+    from .serialization import JSONResponse, JSONEngine, get_json_engine, json_response_class
+
+    # Static files
+    from .static import StaticManifest, PrecompressedStaticFiles, HotStaticFiles
+
+    # Serving and reloading
+    from .supervisor import Supervisor
+    from .reload import RouteReloader
+
+    # Convenience imports
+    from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response
+    from fastapi.responses import HTMLResponse, FileResponse
+    from fastapi.middleware.cors import CORSMiddleware as FastAPICORSMiddleware
 
 __all__ = [
     # Core
@@ -104,7 +332,9 @@ __all__ = [
     "AuthorizationError",
     "NotFoundError",
     "ConflictError",
+    "PayloadTooLargeError",
     "RateLimitError",
+    "ServiceUnavailableError",
     "ServerError",
     "DatabaseError",
     "ExternalServiceError",
@@ -133,8 +363,12 @@ __all__ = [
     "APIKeyManager",
     "AuthDependencies",
     "TokenResponse",
+    "TokenCache",
+    "PasswordHashPool",
     "hash_password",
     "verify_password",
+    "ahash_password",
+    "averify_password",
     "create_access_token",
     "create_refresh_token",
     "verify_token",
@@ -155,11 +389,65 @@ __all__ = [
     "SecurityHeadersMiddleware",
     "CompressionMiddleware",
     "CORSMiddleware",
+    "FusedMiddleware",
+    "ResponseCacheMiddleware",
+    "UploadLimitMiddleware",
+    "StageTimings",
     "create_rate_limit_middleware",
     "create_auth_middleware",
     "create_logging_middleware",
     "create_security_middleware",
     
+    # Backends
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "RedisCacheBackend",
+    "RedisClient",
+    "RedisError",
+    "create_cache_backend",
+    "get_redis_client",
+    
+    # Path matching and routing
+    "PathMatcher",
+    "RadixRouter",
+    
+    # Response caching
+    "CachedResponse",
+    "CachePolicy",
+    "ResponseCache",
+    "cached",
+    
+    # Rate limiting
+    "RateLimitAlgorithm",
+    "FixedWindowAlgorithm",
+    "SlidingWindowCounterAlgorithm",
+    "TokenBucketAlgorithm",
+    "GCRAAlgorithm",
+    "RateLimitStore",
+    "SharedMemoryRateLimitStore",
+    "RedisRateLimitStore",
+    "create_rate_limit_store",
+    "get_rate_limit_algorithm",
+    
+    # Uploads
+    "UploadManager",
+    "UploadedFile",
+    
+    # JSON serialization
+    "JSONResponse",
+    "JSONEngine",
+    "get_json_engine",
+    "json_response_class",
+    
+    # Static files
+    "StaticManifest",
+    "PrecompressedStaticFiles",
+    "HotStaticFiles",
+    
+    # Serving and reloading
+    "Supervisor",
+    "RouteReloader",
+    
     # FastAPI re-exports
     "FastAPI",
     "APIRouter", 
@@ -167,7 +455,6 @@ __all__ = [
     "HTTPException",
     "Request",
     "Response",
-    "JSONResponse",
     "HTMLResponse",
     "FileResponse",
     "FastAPICORSMiddleware",
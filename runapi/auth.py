@@ -1,12 +1,16 @@
 import os
 import time
+import asyncio
 import hashlib
+import functools
 import secrets
-from typing import Optional, Dict, Any, Union
+from typing import Callable, Optional, Dict, Any, Tuple, Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 import json
 import base64
 import hmac
+from collections import OrderedDict
 
 try:
     from passlib.context import CryptContext
@@ -17,16 +21,141 @@ from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from .config import get_config
+from .errors import ServiceUnavailableError
+
+
+@functools.lru_cache(maxsize=None)
+def _crypt_context(schemes: Tuple[str, ...]) -> "CryptContext":
+    """One CryptContext per scheme list and process (contexts are thread-safe)."""
+    return CryptContext(schemes=list(schemes), deprecated="auto")
+
+
+def _hash_password(schemes: Tuple[str, ...], password: str) -> str:
+    return _crypt_context(schemes).hash(password)
+
+
+def _verify_password(schemes: Tuple[str, ...], plain_password: str, hashed_password: str) -> bool:
+    return _crypt_context(schemes).verify(plain_password, hashed_password)
+
+
+class PasswordHashPool:
+    """
+    Bounded executor for password hashing off the event loop.
+    
+    Runs on a thread pool (bcrypt and PBKDF2 release the GIL) or a process
+    pool. At most ``max_workers + max_queue`` calls are admitted at once;
+    further callers wait up to ``queue_timeout`` seconds for a slot and then
+    get ``ServiceUnavailableError`` (503), so a login burst sheds load instead
+    of queueing unboundedly.
+    """
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: int = 64,
+        executor: str = "thread",
+        queue_timeout: float = 5.0
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor '{executor}'. Available: thread, process")
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.executor_type = executor
+        self.queue_timeout = queue_timeout
+        
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="runapi-password"
+                )
+        return self._executor
+    
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run ``func(*args)`` in the pool, waiting for a free slot if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Semaphores are bound to the loop that first waits on them
+            self._semaphore = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._loop = loop
+        
+        semaphore = self._semaphore
+        if not semaphore.locked():
+            await semaphore.acquire()
+        else:
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise ServiceUnavailableError(
+                    "Password hashing queue is full",
+                    {"pending": self.pending, "retry_after": self.queue_timeout},
+                    retry_after=self.queue_timeout
+                )
+        
+        self.pending += 1
+        self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+            semaphore.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+    
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_password_hash_pool: Optional[PasswordHashPool] = None
+
+
+def get_password_hash_pool() -> PasswordHashPool:
+    """Get the shared password hashing pool configured by PASSWORD_HASH_*."""
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        config = get_config()
+        _password_hash_pool = PasswordHashPool(
+            max_workers=config.password_hash_workers or None,
+            max_queue=config.password_hash_max_queue,
+            executor=config.password_hash_executor,
+            queue_timeout=config.password_hash_queue_timeout
+        )
+    return _password_hash_pool
 
 
 class PasswordManager:
     """Password hashing and verification utilities."""
     
-    def __init__(self, schemes: list = None):
+    def __init__(self, schemes: list = None, hash_pool: Optional[PasswordHashPool] = None):
         if CryptContext is None:
             raise ImportError("passlib is required for password hashing. Install with: pip install passlib[bcrypt]")
         self.schemes = schemes or ["bcrypt"]
-        self.pwd_context = CryptContext(schemes=self.schemes, deprecated="auto")
+        self.pwd_context = _crypt_context(tuple(self.schemes))
+        self.hash_pool = hash_pool
     
     def hash_password(self, password: str) -> str:
         """Hash a password."""
@@ -36,11 +165,107 @@ class PasswordManager:
         """Verify a password against its hash."""
         return self.pwd_context.verify(plain_password, hashed_password)
     
+    async def ahash_password(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        pool = self.hash_pool or get_password_hash_pool()
+        return await pool.run(_hash_password, tuple(self.schemes), password)
+    
+    async def averify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash without blocking the event loop."""
+        pool = self.hash_pool or get_password_hash_pool()
+        return await pool.run(_verify_password, tuple(self.schemes), plain_password, hashed_password)
+    
     def generate_random_password(self, length: int = 12) -> str:
         """Generate a random password."""
         return secrets.token_urlsafe(length)
 
 
+class TokenCache:
+    """
+    Bounded LRU cache of verified token payloads.
+    
+    Entries are keyed by a digest of the raw token, so tokens themselves are
+    never held in memory, and expire at ``min(exp, now + ttl)``. Only
+    successfully verified tokens are cached. The cache is bound to the key
+    material passed to ``bind``: verifying under a different (rotated) key
+    clears it.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        # {digest: (expires_at, payload)} in LRU order
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._bound: tuple = ()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+    
+    def bind(self, *key_material: Any) -> None:
+        """Bind the cache to the verifying key; a different key clears it."""
+        if key_material != self._bound:
+            if self._bound:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bound = key_material
+    
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached payload, or None on a miss."""
+        digest = self._digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= time.time():
+            del self._entries[digest]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return dict(entry[1])
+    
+    def set(self, token: str, payload: Dict[str, Any]) -> None:
+        """Cache a verified payload until its expiry or the cache TTL."""
+        expires_at = time.time() + self.ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        self._entries[self._digest(token)] = (expires_at, dict(payload))
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_token_cache(config=None) -> Optional[TokenCache]:
+    """Create a token cache from AUTH_TOKEN_CACHE_SIZE and CACHE_TTL (None if disabled)."""
+    config = config or get_config()
+    if config.auth_token_cache_size <= 0:
+        return None
+    return TokenCache(max_size=config.auth_token_cache_size, ttl=config.cache_ttl)
+
+
 from jose import jwt, JWTError
 
 class JWTManager:
@@ -52,6 +277,7 @@ class JWTManager:
         self.algorithm = algorithm or self.config.jwt_algorithm
         self.access_token_expire = self.config.jwt_expiry
         self.refresh_token_expire = self.config.jwt_refresh_expiry
+        self.token_cache = create_token_cache(self.config)
         
         if self.secret_key == "dev-secret-key-change-in-production":
             raise ValueError("Change the SECRET_KEY in production!")
@@ -84,6 +310,13 @@ class JWTManager:
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify and decode a JWT token."""
+        cache = self.token_cache
+        if cache is not None:
+            cache.bind(self.secret_key, self.algorithm)
+            payload = cache.get(token)
+            if payload is not None:
+                return payload
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
             
@@ -91,6 +324,8 @@ class JWTManager:
             if 'exp' in payload and payload['exp'] < time.time():
                 return None
             
+            if cache is not None:
+                cache.set(token, payload)
             return payload
             
         except JWTError:
@@ -240,6 +475,22 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return manager.verify_password(plain_password, hashed_password)
 
 
+async def ahash_password(password: str) -> str:
+    """Hash a password on the shared password hashing pool."""
+    manager = _get_password_manager()
+    if manager is None:
+        raise ImportError("passlib is required for password hashing. Install with: pip install passlib[bcrypt]")
+    return await manager.ahash_password(password)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the shared password hashing pool."""
+    manager = _get_password_manager()
+    if manager is None:
+        raise ImportError("passlib is required for password hashing. Install with: pip install passlib[bcrypt]")
+    return await manager.averify_password(plain_password, hashed_password)
+
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create an access token using the global JWT manager."""
     return _get_jwt_manager().create_access_token(data, expires_delta)
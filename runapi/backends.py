@@ -0,0 +1,340 @@
+"""
+Cache and shared-state backends for RunApi framework
+"""
+import time
+import asyncio
+import hashlib
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse, unquote
+
+from .config import get_config, RunApiConfig
+from .errors import ExternalServiceError
+
+
+class RedisError(ExternalServiceError):
+    """Raised when the Redis server replies with an error."""
+
+    def __init__(self, message: str = "Redis error", details: Dict[str, Any] = None):
+        super().__init__(message, details)
+
+
+def _encode_command(args: Sequence[Any]) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode()
+        elif isinstance(arg, float):
+            data = repr(arg).encode()
+        else:
+            data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    """Read one RESP2 reply. Error replies are returned, not raised."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by Redis server")
+
+    prefix, payload = line[:1], line[1:-2]
+    if prefix == b"+":
+        return payload.decode()
+    if prefix == b"-":
+        return RedisError(payload.decode())
+    if prefix == b":":
+        return int(payload)
+    if prefix == b"$":
+        length = int(payload)
+        if length == -1:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(payload)
+        if length == -1:
+            return None
+        return [await _read_reply(reader) for _ in range(length)]
+    raise RedisError(f"Unexpected reply from Redis server: {line!r}")
+
+
+class _RedisConnection:
+    """A single connection to a Redis server."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def execute_many(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """Write all commands at once, then read every reply (pipelining)."""
+        self.writer.write(b"".join(_encode_command(command) for command in commands))
+        await self.writer.drain()
+        return [await _read_reply(self.reader) for _ in commands]
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisClient:
+    """
+    Minimal asyncio client for the Redis protocol (RESP2).
+
+    Keeps a bounded pool of connections and sends batches of commands in a
+    single round trip through ``pipeline``. Lua scripts registered with
+    ``register_script`` are run with EVALSHA and loaded on first NOSCRIPT.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", max_connections: int = 10, timeout: float = 5.0):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", ""):
+            raise ValueError(f"Unsupported Redis URL scheme: {parsed.scheme}")
+
+        self.url = url
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.max_connections = max_connections
+        self.timeout = timeout
+
+        self._idle: List[_RedisConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scripts: Dict[str, str] = {}
+
+    async def _connect(self) -> _RedisConnection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        connection = _RedisConnection(reader, writer)
+
+        setup = []
+        if self.password:
+            if self.username:
+                setup.append(("AUTH", self.username, self.password))
+            else:
+                setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            for reply in await connection.execute_many(setup):
+                if isinstance(reply, RedisError):
+                    connection.close()
+                    raise reply
+        return connection
+
+    async def _acquire(self) -> _RedisConnection:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Connections are bound to the loop that opened them
+            self._idle = []
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+            self._loop = loop
+
+        await self._semaphore.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await self._connect()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def _release(self, connection: _RedisConnection, reusable: bool = True) -> None:
+        if reusable:
+            self._idle.append(connection)
+        else:
+            connection.close()
+        self._semaphore.release()
+
+    async def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """Send ``commands`` in one round trip. Error replies are returned in place."""
+        connection = await self._acquire()
+        try:
+            replies = await asyncio.wait_for(connection.execute_many(commands), self.timeout)
+        except BaseException:
+            # A half-read reply leaves the connection unusable
+            self._release(connection, reusable=False)
+            raise
+        self._release(connection)
+        return replies
+
+    async def execute(self, *args: Any) -> Any:
+        """Run a single command and return its reply."""
+        reply = (await self.pipeline([args]))[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def register_script(self, script: str) -> str:
+        """Register a Lua script and return its SHA1 for ``evalsha``."""
+        sha = hashlib.sha1(script.encode()).hexdigest()
+        self._scripts[sha] = script
+        return sha
+
+    async def evalsha(self, sha: str, keys: Sequence[str], args: Sequence[Any]) -> Any:
+        """Run a registered script atomically on the server."""
+        reply = (await self.pipeline([("EVALSHA", sha, len(keys), *keys, *args)]))[0]
+        if isinstance(reply, RedisError) and str(reply).startswith("NOSCRIPT"):
+            reply = (await self.pipeline([("EVAL", self._scripts[sha], len(keys), *keys, *args)]))[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    async def close(self) -> None:
+        """Close idle pooled connections."""
+        while self._idle:
+            self._idle.pop().close()
+
+
+_redis_clients: Dict[str, RedisClient] = {}
+
+
+def get_redis_client(url: Optional[str] = None) -> RedisClient:
+    """Get the shared client (and connection pool) for ``url``."""
+    url = url or get_config().redis_url
+    if not url:
+        raise ValueError("REDIS_URL is required for the Redis backend")
+    if url not in _redis_clients:
+        _redis_clients[url] = RedisClient(url)
+    return _redis_clients[url]
+
+
+class CacheBackend:
+    """Interface for key/value cache backends. Values are bytes."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process cache with per-entry TTL and LRU eviction.
+
+    Bounded by entry count and, when ``max_bytes`` is set, by the total size
+    of the stored values. Values larger than the whole budget are not stored.
+    """
+
+    def __init__(self, default_ttl: float = 300, max_entries: int = 10000, max_bytes: Optional[int] = None):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        # {key: (expires_at, value)} in LRU order
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._remove(key)
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, value)
+        self.size += len(value)
+        self._evict(now)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def _evict(self, now: float) -> None:
+        entries = self._entries
+        # Expired entries at the cold end go first, then least recently used
+        for key in list(itertools.islice(entries, 8)):
+            if entries[key][0] < now:
+                self._remove(key)
+        while len(entries) > self.max_entries or (self.max_bytes is not None and self.size > self.max_bytes):
+            _, (_, value) = entries.popitem(last=False)
+            self.size -= len(value)
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache stored in Redis, shared by every process and host using it."""
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        default_ttl: float = 300,
+        prefix: str = "runapi:cache:",
+        client: Optional[RedisClient] = None
+    ):
+        self.client = client or get_redis_client(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.execute("GET", self.prefix + key)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return await self.client.execute("MGET", *(self.prefix + key for key in keys))
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        await self.client.execute("SET", self.prefix + key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.execute("DEL", self.prefix + key)
+
+    async def clear(self) -> None:
+        cursor = b"0"
+        while True:
+            cursor, keys = await self.client.execute("SCAN", cursor, "MATCH", self.prefix + "*", "COUNT", 1000)
+            if keys:
+                await self.client.execute("DEL", *keys)
+            if cursor in (b"0", 0, "0"):
+                return
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def create_cache_backend(config: Optional[RunApiConfig] = None) -> CacheBackend:
+    """Create the cache backend selected by CACHE_BACKEND, REDIS_URL, CACHE_TTL and CACHE_MAX_BYTES."""
+    config = config or get_config()
+    backend = config.cache_backend.lower()
+    if backend == "memory":
+        return MemoryCacheBackend(default_ttl=config.cache_ttl, max_bytes=config.cache_max_bytes)
+    if backend == "redis":
+        if not config.redis_url:
+            raise ValueError("REDIS_URL is required when CACHE_BACKEND=redis")
+        return RedisCacheBackend(config.redis_url, default_ttl=config.cache_ttl)
+    raise ValueError(f"Unknown cache backend '{config.cache_backend}'. Available: memory, redis")
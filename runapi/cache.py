@@ -0,0 +1,359 @@
+"""
+Response caching for RunApi framework
+"""
+import gzip
+import struct
+import logging
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from starlette.datastructures import Headers
+from starlette.routing import compile_path
+
+from .backends import CacheBackend, RedisError, create_cache_backend
+from .config import get_config, RunApiConfig
+
+
+logger = logging.getLogger("runapi.cache")
+
+# Responses with these headers are never shared between clients
+_UNCACHEABLE_CACHE_CONTROL = ("no-store", "private", "no-cache")
+# Request headers that identify a user; see ResponseCache.is_personal
+_CREDENTIAL_HEADERS = ("authorization", "cookie")
+# Headers computed per response when an entry is served
+_DROPPED_HEADERS = frozenset({b"content-length", b"etag", b"vary", b"date", b"x-cache"})
+_GZIP_SKIP_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "font/woff")
+
+
+class CachedResponse:
+    """
+    A response stored in the cache: status, headers and the pre-serialized
+    body, plus an optional gzip variant compressed once at store time.
+    """
+
+    __slots__ = ("status", "headers", "body", "gzip_body", "etag")
+
+    # magic, status, etag length, headers length, body length, gzip length
+    HEADER = struct.Struct("<4sHHIII")
+    MAGIC = b"RC1\x00"
+
+    def __init__(
+        self,
+        status: int,
+        headers: List[Tuple[bytes, bytes]],
+        body: bytes,
+        gzip_body: Optional[bytes] = None,
+        etag: Optional[bytes] = None
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag or b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode() + b'"'
+
+    @property
+    def gzip_etag(self) -> bytes:
+        """Strong ETag of the gzip variant (representations must differ)."""
+        return self.etag[:-1] + b'-gzip"'
+
+    def encode(self) -> bytes:
+        headers = b"\n".join(name + b":" + value for name, value in self.headers)
+        gzip_body = self.gzip_body or b""
+        return b"".join((
+            self.HEADER.pack(self.MAGIC, self.status, len(self.etag), len(headers), len(self.body), len(gzip_body)),
+            self.etag,
+            headers,
+            self.body,
+            gzip_body,
+        ))
+
+    @classmethod
+    def decode(cls, data: bytes) -> Optional["CachedResponse"]:
+        if len(data) < cls.HEADER.size:
+            return None
+        magic, status, etag_len, headers_len, body_len, gzip_len = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            return None
+        view = memoryview(data)
+        offset = cls.HEADER.size
+        etag = bytes(view[offset:offset + etag_len])
+        offset += etag_len
+        raw_headers = bytes(view[offset:offset + headers_len])
+        offset += headers_len
+        body = bytes(view[offset:offset + body_len])
+        offset += body_len
+        gzip_body = bytes(view[offset:offset + gzip_len]) if gzip_len else None
+
+        headers = []
+        if raw_headers:
+            for line in raw_headers.split(b"\n"):
+                name, _, value = line.partition(b":")
+                headers.append((name, value))
+        return cls(status, headers, body, gzip_body, etag)
+
+
+def etag_matches(if_none_match: str, *etags: bytes) -> bool:
+    """Weak comparison of an If-None-Match header against ``etags``."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {etag.decode("latin-1") for etag in etags}
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag in candidates:
+            return True
+    return False
+
+
+class CachePolicy:
+    """
+    Caching declared by a route: entry lifetime and the request headers the
+    response varies on. ``None`` means the shared cache's default.
+    """
+
+    __slots__ = ("ttl", "vary")
+
+    OPTIONS = frozenset({"ttl", "vary"})
+
+    def __init__(self, ttl: Optional[float] = None, vary: Optional[Iterable[str]] = None):
+        self.ttl = ttl
+        self.vary = tuple(name.lower() for name in vary) if vary is not None else None
+
+    @classmethod
+    def from_declaration(cls, value: Any) -> Optional["CachePolicy"]:
+        """
+        Build a policy from a route module's ``cache`` attribute.
+
+        Only a ``CachePolicy`` or a dict with ``ttl`` and/or ``vary`` counts
+        as a declaration, so unrelated module-level ``cache`` dicts are left
+        alone.
+        """
+        if isinstance(value, CachePolicy):
+            return value
+        if not isinstance(value, dict) or not cls.OPTIONS.intersection(value):
+            return None
+        unknown = set(value) - cls.OPTIONS
+        if unknown:
+            raise ValueError(f"Unknown cache options: {', '.join(sorted(map(str, unknown)))}")
+        return cls(ttl=value.get("ttl"), vary=value.get("vary"))
+
+
+def cached(func: Optional[Callable] = None, *, ttl: Optional[float] = None, vary: Optional[Iterable[str]] = None):
+    """
+    Mark a GET route handler as cacheable.
+
+    Usage:
+        @cached
+        async def get(): ...
+
+        @cached(ttl=60, vary=["Authorization"])
+        async def get(): ...
+    """
+    policy = CachePolicy(ttl=ttl, vary=vary)
+
+    def decorator(handler: Callable) -> Callable:
+        handler.__runapi_cache__ = policy
+        return handler
+
+    return decorator(func) if func is not None else decorator
+
+
+def get_cache_policy(handler: Callable) -> Optional[CachePolicy]:
+    """Return the policy set on ``handler`` by ``@cached``, if any."""
+    return getattr(handler, "__runapi_cache__", None)
+
+
+class ResponseCache:
+    """
+    Shared response cache used by ``ResponseCacheMiddleware``.
+
+    Entries are keyed on method, path, sorted query string and the values of
+    the ``vary`` request headers, and stored pre-serialized in a
+    ``CacheBackend`` so the memory and Redis backends behave the same.
+    Concurrent misses for one key are coalesced: only the first request
+    (the leader) runs the route, the others wait for its result.
+
+    Routes can register a ``CachePolicy`` for their path template with
+    ``add_policy``; matching requests are cached with the policy's TTL and
+    vary headers. Without a policy, requests carrying a ``Cookie`` or
+    ``Authorization`` header that is not one of the ``vary`` headers are
+    not cached (see ``is_personal``).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        vary: Optional[Iterable[str]] = None,
+        max_entry_size: int = 1024 * 1024,
+        gzip_min_size: int = 500,
+        gzip_level: int = 6,
+        config: Optional[RunApiConfig] = None
+    ):
+        config = config or get_config()
+        self.backend = backend or create_cache_backend(config)
+        self.ttl = config.cache_ttl if ttl is None else ttl
+        self.vary = tuple(name.lower() for name in (config.response_cache_vary if vary is None else vary))
+        self.max_entry_size = max_entry_size
+        self.gzip_min_size = gzip_min_size
+        self.gzip_level = gzip_level
+
+        self._inflight: Dict[str, "asyncio.Future[Optional[CachedResponse]]"] = {}
+        self._static_policies: Dict[str, CachePolicy] = {}
+        self._dynamic_policies: List[Tuple[Pattern, CachePolicy]] = []
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stores = 0
+
+    def add_policy(self, path: str, policy: CachePolicy) -> None:
+        """Cache GET requests to the route at ``path`` (a route path template)."""
+        if "{" in path:
+            regex, _, _ = compile_path(path)
+            self._dynamic_policies.append((regex, policy))
+        else:
+            self._static_policies[path] = policy
+
+    def remove_policy(self, path: str) -> None:
+        """Stop caching the route at ``path``, e.g. when its file is reloaded."""
+        if "{" in path:
+            regex, _, _ = compile_path(path)
+            self._dynamic_policies = [item for item in self._dynamic_policies if item[0].pattern != regex.pattern]
+        else:
+            self._static_policies.pop(path, None)
+
+    @property
+    def has_policies(self) -> bool:
+        return bool(self._static_policies or self._dynamic_policies)
+
+    def match_policy(self, path: str) -> Optional[CachePolicy]:
+        """Find the policy registered for the route serving ``path``."""
+        policy = self._static_policies.get(path)
+        if policy is not None:
+            return policy
+        for regex, policy in self._dynamic_policies:
+            if regex.match(path):
+                return policy
+        return None
+
+    def is_personal(self, headers: Headers) -> bool:
+        """Whether the request carries credentials the default key does not separate."""
+        return any(name in headers and name not in self.vary for name in _CREDENTIAL_HEADERS)
+
+    def make_key(self, method: str, path: str, query_string: bytes, headers: Headers, vary: Optional[Tuple[str, ...]] = None) -> str:
+        """Build the cache key for a request."""
+        parts = [method.encode(), path.encode()]
+        if query_string:
+            parts.append(b"&".join(sorted(query_string.split(b"&"))))
+        else:
+            parts.append(b"")
+        for name in self.vary if vary is None else vary:
+            parts.append(headers.get(name, "").encode("latin-1"))
+        return "response:" + hashlib.blake2b(b"\x00".join(parts), digest_size=20).hexdigest()
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            data = await self.backend.get(key)
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            # An unavailable cache degrades to a miss, never to an error
+            logger.warning(f"Response cache lookup failed: {e}")
+            return None
+        if data is None:
+            return None
+        return CachedResponse.decode(data)
+
+    async def set(self, key: str, entry: CachedResponse, ttl: Optional[float] = None) -> None:
+        try:
+            await self.backend.set(key, entry.encode(), self.ttl if ttl is None else ttl)
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            logger.warning(f"Response cache store failed: {e}")
+            return
+        self.stores += 1
+
+    async def invalidate(self, key: str) -> None:
+        await self.backend.delete(key)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def is_cacheable(self, status: int, headers: Headers) -> bool:
+        """Whether a response (as seen at response start) may be stored."""
+        if status != 200 or "set-cookie" in headers or "content-encoding" in headers:
+            return False
+        cache_control = headers.get("cache-control", "").lower()
+        if any(directive in cache_control for directive in _UNCACHEABLE_CACHE_CONTROL):
+            return False
+        return not headers.get("content-type", "").startswith("text/event-stream")
+
+    def build_entry(
+        self,
+        status: int,
+        raw_headers: List[Tuple[bytes, bytes]],
+        body: bytes,
+        vary: Optional[Tuple[str, ...]] = None
+    ) -> CachedResponse:
+        """Create an entry from a complete response, compressing it once."""
+        headers = []
+        vary = [name.title() for name in (self.vary if vary is None else vary)]
+        content_type = b""
+        for name, value in raw_headers:
+            name = name.lower()
+            if name == b"vary":
+                vary.extend(item.strip() for item in value.decode("latin-1").split(","))
+                continue
+            if name == b"content-type":
+                content_type = value
+            if name not in _DROPPED_HEADERS:
+                headers.append((name, value))
+        vary.append("Accept-Encoding")
+        seen = set()
+        merged = [item for item in vary if item and not (item.lower() in seen or seen.add(item.lower()))]
+        headers.append((b"vary", ", ".join(merged).encode("latin-1")))
+
+        gzip_body = None
+        if len(body) >= self.gzip_min_size and not content_type.decode("latin-1").startswith(_GZIP_SKIP_TYPES):
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+            if len(compressed) < len(body):
+                gzip_body = compressed
+        return CachedResponse(status, headers, body, gzip_body)
+
+    async def coalesce(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Optional[CachedResponse]]],
+        ttl: Optional[float] = None
+    ) -> Tuple[bool, Optional[CachedResponse]]:
+        """
+        Run ``compute`` for ``key`` unless another request is already doing so.
+
+        Returns ``(leader, entry)``. Followers get the leader's entry, or
+        ``None`` if the leader's response turned out not to be cacheable.
+        """
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return False, await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        entry = None
+        try:
+            entry = await compute()
+            if entry is not None:
+                await self.set(key, entry, ttl)
+        finally:
+            del self._inflight[key]
+            future.set_result(entry)
+        return True, entry
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stores": self.stores,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
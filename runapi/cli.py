@@ -1,17 +1,21 @@
 # runapi/cli.py
 import typer
-import uvicorn
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from pathlib import Path
+import json
 import os
 import shutil
 from typing import Optional
 
 from .config import load_config, RunApiConfig
-from .core import create_runapi_app
+from .manifest import RouteManifest
+from .profiling import StartupProfiler
+from .discovery import scan_route_file
+from .supervisor import Supervisor, can_fork
+from .tuning import resolve_workers, select_http, select_loop
 
 app = typer.Typer(name="runapi", help="RunApi - Next.js-inspired Python Backend Framework")
 console = Console()
@@ -24,6 +28,7 @@ def dev(
     reload: bool = typer.Option(None, "--reload/--no-reload", help="Enable auto-reload"),
     config_file: str = typer.Option(".env", "--config", "-c", help="Configuration file"),
     log_level: str = typer.Option(None, "--log-level", "-l", help="Log level"),
+    hot: bool = typer.Option(True, "--hot/--no-hot", help="Hot-reload changed route files without restarting"),
 ):
     """Run the RunApi development server."""
     console.print(Panel.fit("🚀 [bold blue]RunApi Development Server[/bold blue]", style="blue"))
@@ -52,6 +57,8 @@ def dev(
     table = Table(show_header=False, box=None)
     table.add_row("🌐 Server:", f"http://{config.host}:{config.port}")
     table.add_row("🔄 Reload:", "✅ Enabled" if config.reload else "❌ Disabled")
+    if config.reload and hot:
+        table.add_row("🔥 Hot reload:", "routes/")
     table.add_row("📝 Log Level:", config.log_level.upper())
     table.add_row("⚙️  Config:", config_file if Path(config_file).exists() else "Default")
     console.print(table)
@@ -88,7 +95,22 @@ def dev(
             console.print("[yellow]💡 Make sure main.py exists and runapi is installed in this environment")
             raise typer.Exit(code=1)
         
+        # Route files are swapped in by the app itself; only other changes restart it
+        if config.reload and hot:
+            from .reload import run_dev_server
+            os.environ["ROUTES_HOT_RELOAD"] = "true"
+            run_dev_server(
+                "main:app",
+                extra_files=[config_file],
+                host=config.host,
+                port=config.port,
+                log_level=config.log_level.lower(),
+                reload_dirs=[current_dir],
+            )
+            return
+        
         # Run uvicorn with the FastAPI app
+        import uvicorn
         uvicorn.run(
             "main:app",
             host=config.host,
@@ -108,11 +130,21 @@ def dev(
 def start(
     host: str = typer.Option(None, "--host", "-h", help="Host to bind"),
     port: int = typer.Option(None, "--port", "-p", help="Port to bind"),
-    workers: int = typer.Option(None, "--workers", "-w", help="Number of worker processes"),
+    workers: str = typer.Option(None, "--workers", "-w", help="Number of worker processes, or 'auto'"),
     config_file: str = typer.Option(".env", "--config", "-c", help="Configuration file"),
     log_level: str = typer.Option(None, "--log-level", "-l", help="Log level"),
+    loop: str = typer.Option(None, "--loop", help="Event loop: auto, asyncio or uvloop"),
+    http: str = typer.Option(None, "--http", help="HTTP parser: auto, h11 or httptools"),
+    preload: bool = typer.Option(None, "--preload/--no-preload", help="Build the app once and fork workers from it"),
+    reuse_port: bool = typer.Option(None, "--reuse-port/--no-reuse-port", help="One SO_REUSEPORT socket per worker"),
+    max_requests: int = typer.Option(None, "--max-requests", help="Recycle a worker after N requests (0 = never)"),
+    max_requests_jitter: int = typer.Option(None, "--max-requests-jitter", help="Random extra requests before recycling"),
 ):
-    """Run the RunApi server in production mode."""
+    """Run the RunApi server in production mode.
+    
+    Workers are forked by the RunApi supervisor: SIGHUP restarts them one at
+    a time without downtime, SIGUSR1 logs their memory.
+    """
     console.print(Panel.fit("🚀 [bold green]RunApi Production Server[/bold green]", style="green"))
     
     # Load configuration
@@ -125,11 +157,29 @@ def start(
         config.port = port
     if log_level:
         config.log_level = log_level
-    
-    # Determine workers
-    # If not specified in CLI, check env/config, else default to 1 (or cpu_count in real prod)
-    # RunApiConfig doesn't have 'workers' yet, adding it logic here or just defaulting
-    final_workers = workers or int(os.getenv("WORKERS", "1"))
+    if workers:
+        config.workers = workers
+    if loop:
+        config.loop = loop
+    if http:
+        config.http = http
+    if preload is not None:
+        config.preload = preload
+    if reuse_port is not None:
+        config.reuse_port = reuse_port
+    if max_requests is not None:
+        config.max_requests = max_requests
+    if max_requests_jitter is not None:
+        config.max_requests_jitter = max_requests_jitter
+    
+    # Resolve "auto" settings to what will actually run
+    try:
+        final_workers, workers_reason = resolve_workers(config.workers, config.worker_memory * 1024 * 1024)
+        final_loop = select_loop(config.loop)
+        final_http = select_http(config.http)
+    except ValueError as e:
+        console.print(f"[red]❌ Error: {e}")
+        raise typer.Exit(code=1)
 
     # Check if main.py exists
     if not Path("main.py").exists():
@@ -140,7 +190,15 @@ def start(
     table = Table(show_header=False, box=None)
     table.add_row("🌐 Server:", f"http://{config.host}:{config.port}")
     table.add_row("⚙️  Mode:", "Production (No Reload)")
-    table.add_row("👷 Workers:", str(final_workers))
+    table.add_row("👷 Workers:", f"{final_workers} ({workers_reason})" if workers_reason else str(final_workers))
+    table.add_row("🔁 Event Loop:", final_loop)
+    table.add_row("📨 HTTP Parser:", final_http)
+    if can_fork():
+        table.add_row("📦 Preload:", "✅ Enabled" if config.preload else "❌ Disabled")
+        if config.reuse_port:
+            table.add_row("🔀 Sockets:", "SO_REUSEPORT per worker")
+        if config.max_requests:
+            table.add_row("♻️  Max Requests:", f"{config.max_requests} (+{config.max_requests_jitter} jitter)")
     table.add_row("📝 Log Level:", config.log_level.upper())
     console.print(table)
     console.print()
@@ -150,12 +208,36 @@ def start(
         import sys
         if os.getcwd() not in sys.path:
             sys.path.insert(0, os.getcwd())
-            
+        
+        if can_fork():
+            exit_code = Supervisor(
+                "main:app",
+                host=config.host,
+                port=config.port,
+                workers=final_workers,
+                preload=config.preload,
+                gc_freeze=config.gc_freeze,
+                reuse_port=config.reuse_port,
+                max_requests=config.max_requests,
+                max_requests_jitter=config.max_requests_jitter,
+                graceful_timeout=config.graceful_timeout,
+                memory_report_interval=config.memory_report_interval,
+                loop=final_loop,
+                http=final_http,
+                log_level=config.log_level.lower(),
+            ).run()
+            if exit_code:
+                sys.exit(exit_code)
+            return
+        
+        import uvicorn
         uvicorn.run(
             "main:app",
             host=config.host,
             port=config.port,
             workers=final_workers,
+            loop=final_loop,
+            http=final_http,
             reload=False,
             log_level=config.log_level.lower(),
         )
@@ -294,6 +376,7 @@ venv.bak/
 # RunApi
 .env
 uploads/
+.runapi/
 *.log
 
 # IDE
@@ -593,32 +676,185 @@ def routes():
             import re
             url_path = re.sub(r'\[([^\]]+)\]', r'{\1}', url_path)
         
-        # Read file to detect HTTP methods
         # Read file to detect HTTP methods
         try:
-            content = route_file.read_text()
-            import ast
-            try:
-                tree = ast.parse(content)
-                methods = []
-                for node in ast.walk(tree):
-                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                        if node.name in ["get", "post", "put", "delete", "patch", "head", "options"]:
-                            methods.append(node.name.upper())
-                
-                # Deduplicate and sort
-                methods = sorted(list(set(methods)))
-                methods_str = ", ".join(methods) if methods else "No methods found"
-                table.add_row(methods_str, url_path, str(relative_path))
-            except SyntaxError:
-                table.add_row("Error", url_path, "Syntax Error in file")
-            
+            info = scan_route_file(route_file)
+            methods = [method.upper() for method in info.methods]
+            methods_str = ", ".join(methods) if methods else "No methods found"
+            table.add_row(methods_str, url_path, str(relative_path))
+        except SyntaxError:
+            table.add_row("Error", url_path, "Syntax Error in file")
         except Exception as e:
             table.add_row("Error", url_path, f"Error reading file: {e}")
     
     console.print(table)
 
 
+@app.command()
+def build(
+    config_file: str = typer.Option(".env", "--config", "-c", help="Configuration file"),
+    output: str = typer.Option(None, "--output", "-o", help="Manifest path (default: ROUTES_MANIFEST_PATH)"),
+    validate: str = typer.Option(None, "--validate", help="Manifest validation: mtime or hash"),
+    compile_bytecode: bool = typer.Option(True, "--compile/--no-compile", help="Precompile routes/ to bytecode"),
+):
+    """Build the route manifest and bytecode ahead of time (e.g. for production images)."""
+    routes_path = Path("routes")
+    if not routes_path.exists():
+        console.print("[red]❌ No routes directory found")
+        raise typer.Exit(code=1)
+    
+    config = load_config(config_file)
+    manifest_path = Path(output or config.routes_manifest_path)
+    
+    if compile_bytecode:
+        # Route imports then skip compiling, even on a read-only file system;
+        # workers=0 uses one process per CPU
+        import compileall
+        if not compileall.compile_dir(str(routes_path), quiet=1, workers=0):
+            console.print("[red]❌ Some route files failed to compile")
+            raise typer.Exit(code=1)
+    
+    try:
+        manifest = RouteManifest.build(
+            routes_path,
+            validate=validate or config.routes_manifest_validate,
+            workers=config.routes_import_workers,
+        )
+        manifest.save(manifest_path)
+    except (OSError, TypeError, ValueError) as e:
+        console.print(f"[red]❌ Could not build route manifest: {e}")
+        raise typer.Exit(code=1)
+    
+    lazy = sum(1 for entry in manifest.entries if entry.lazy_safe)
+    table = Table(show_header=False, box=None)
+    table.add_row("📄 Manifest:", str(manifest_path))
+    table.add_row("🛣️  Routes:", f"{len(manifest.entries)} files ({lazy} lazy-loadable)")
+    table.add_row("🔍 Validation:", manifest.validate)
+    table.add_row("📦 Bytecode:", "compiled" if compile_bytecode else "skipped")
+    console.print(table)
+    console.print("✅ [green]Route manifest built")
+    if not config.routes_manifest:
+        console.print("[yellow]Set ROUTES_MANIFEST=true to load routes from it")
+
+
+@app.command("build-static")
+def build_static(
+    config_file: str = typer.Option(".env", "--config", "-c", help="Configuration file"),
+    source: str = typer.Option(None, "--source", "-s", help="Static files directory (default: STATIC_FILES_PATH)"),
+    output: str = typer.Option(None, "--output", "-o", help="Output directory (default: STATIC_BUILD_PATH)"),
+    encodings: str = typer.Option("br,zstd,gzip", "--encodings", "-e", help="Precompressed variants to write"),
+):
+    """Fingerprint and precompress static files (serve them with STATIC_PRECOMPRESSED=true)."""
+    from .static import ENCODING_SUFFIXES, StaticManifest
+
+    config = load_config(config_file)
+    source_path = Path(source or config.static_files_path)
+    output_path = Path(output or config.static_build_path)
+    if not source_path.is_dir():
+        console.print(f"[red]❌ No static directory found: {source_path}")
+        raise typer.Exit(code=1)
+    if output_path.resolve() == source_path.resolve() or source_path.resolve() in output_path.resolve().parents:
+        console.print("[red]❌ The output directory must not be inside the static directory")
+        raise typer.Exit(code=1)
+    
+    try:
+        manifest = StaticManifest.build(
+            source_path,
+            output_path,
+            encodings=[name.strip() for name in encodings.split(",") if name.strip()],
+            config=config,
+        )
+    except (OSError, ValueError) as e:
+        console.print(f"[red]❌ Could not build static files: {e}")
+        raise typer.Exit(code=1)
+    
+    def kib(value):
+        return f"{value / 1024:.1f}" if value is not None else "-"
+    
+    written = [
+        encoding for encoding in ENCODING_SUFFIXES
+        if any(encoding in asset.encodings for asset in manifest.assets.values())
+    ]
+    table = Table(show_header=True, header_style="bold blue")
+    table.add_column("File")
+    table.add_column("Fingerprinted")
+    table.add_column("KiB", justify="right")
+    for encoding in written:
+        table.add_column(f"{encoding} KiB", justify="right")
+    for asset in manifest.assets.values():
+        table.add_row(
+            asset.path,
+            asset.hashed,
+            kib(asset.size),
+            *(kib(asset.encodings.get(encoding)) for encoding in written),
+        )
+    console.print(table)
+    console.print(f"✅ [green]{len(manifest.assets)} static files built in {output_path}")
+
+
+@app.command("profile-startup")
+def profile_startup(
+    config_file: str = typer.Option(".env", "--config", "-c", help="Configuration file"),
+    output: str = typer.Option(None, "--output", "-o", help="Write the profile to this file"),
+    output_format: str = typer.Option("json", "--format", "-f", help="Output file format: json or speedscope"),
+    limit: int = typer.Option(15, "--limit", "-n", help="Rows per table"),
+    allocations: bool = typer.Option(True, "--allocations/--no-allocations", help="Trace allocations (slower)"),
+):
+    """Profile application startup: phases, route files and module imports."""
+    if output_format not in ("json", "speedscope"):
+        console.print(f"[red]❌ Unknown format: {output_format} (use json or speedscope)")
+        raise typer.Exit(code=1)
+    
+    import sys
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    
+    from .core import RunApiApp
+    
+    profiler = StartupProfiler(trace_allocations=allocations).start()
+    with profiler.span("load_config"):
+        config = load_config(config_file)
+    RunApiApp(config=config, profile_startup=profiler)
+    
+    console.print(f"⏱️  [bold blue]Startup: {profiler.total() * 1000:.1f} ms[/bold blue]")
+    if allocations:
+        console.print("[dim]Allocation tracing inflates timings; use --no-allocations for wall time.[/dim]")
+    console.print()
+    
+    def kib(value):
+        return f"{value / 1024:.1f}" if value is not None else "-"
+    
+    sections = [
+        ("Phases", sorted(profiler.top("phase"), key=lambda span: span.start)),
+        ("Route files", profiler.top("route", limit)),
+        ("Imports (by self time)", profiler.top("import", limit, by="self_time")),
+    ]
+    for title, spans in sections:
+        if not spans:
+            continue
+        table = Table(show_header=True, header_style="bold blue", title=title)
+        table.add_column("Total (ms)", justify="right")
+        table.add_column("Self (ms)", justify="right")
+        table.add_column("Allocated (KiB)", justify="right")
+        table.add_column("Name")
+        for span in spans:
+            table.add_row(
+                f"{span.duration * 1000:.2f}",
+                f"{span.self_time * 1000:.2f}",
+                kib(span.allocated),
+                span.name,
+            )
+        console.print(table)
+    
+    if output:
+        if output_format == "speedscope":
+            data = json.dumps(profiler.to_speedscope())
+        else:
+            data = profiler.to_json()
+        Path(output).write_text(data, encoding="utf-8")
+        console.print(f"📄 Profile written to {output}")
+
+
 @app.command()  
 def info():
     """Show project information and configuration."""
@@ -0,0 +1,284 @@
+"""
+Response compression codecs for RunApi framework
+"""
+import fnmatch
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Optional codecs: brotli (or its CFFI build) and zstd (the stdlib module on
+# Python 3.14+, else the zstandard package)
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    from compression import zstd as _stdlib_zstd
+except ImportError:
+    _stdlib_zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class StreamCompressor:
+    """Incremental compressor for one streamed response."""
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        raise NotImplementedError
+
+
+class _GzipStream(StreamCompressor):
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        # Sync-flush each chunk so streamed data is not held back
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliStream(StreamCompressor):
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        data = self._compressor.process(chunk)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdStream(StreamCompressor):
+    def __init__(self, level: int):
+        if _stdlib_zstd is not None:
+            self._compressor = _stdlib_zstd.ZstdCompressor(level=level)
+            self._flush_block = _stdlib_zstd.ZstdCompressor.FLUSH_BLOCK
+            self._stdlib = True
+        else:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            self._stdlib = False
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        if self._stdlib:
+            mode = self._compressor.FLUSH_FRAME if final else self._flush_block
+            return self._compressor.compress(chunk, mode=mode)
+        data = self._compressor.compress(chunk)
+        return data + (self._compressor.flush() if final else self._compressor.flush(self._flush_block))
+
+
+class Codec:
+    """A content coding: its ``Content-Encoding`` token and compression level."""
+
+    name = ""
+
+    def __init__(self, level: int):
+        self.level = level
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def compress(self, body: bytes) -> bytes:
+        """Compress a complete body in one call."""
+        raise NotImplementedError
+
+    def stream(self) -> StreamCompressor:
+        raise NotImplementedError
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+
+    def compress(self, body: bytes) -> bytes:
+        return zlib.compress(body, self.level, 16 + zlib.MAX_WBITS)
+
+    def stream(self) -> StreamCompressor:
+        return _GzipStream(self.level)
+
+
+class BrotliCodec(Codec):
+    name = "br"
+
+    @classmethod
+    def available(cls) -> bool:
+        return brotli is not None
+
+    def compress(self, body: bytes) -> bytes:
+        return brotli.compress(body, quality=self.level)
+
+    def stream(self) -> StreamCompressor:
+        return _BrotliStream(self.level)
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+
+    def __init__(self, level: int):
+        super().__init__(level)
+        # Compression contexts are reused across responses, one per thread
+        # (bodies above the thread threshold are compressed off the loop)
+        self._local = threading.local()
+
+    @classmethod
+    def available(cls) -> bool:
+        return _stdlib_zstd is not None or zstandard is not None
+
+    def compress(self, body: bytes) -> bytes:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            if _stdlib_zstd is not None:
+                compressor = _stdlib_zstd.ZstdCompressor(level=self.level)
+            else:
+                compressor = zstandard.ZstdCompressor(level=self.level)
+            self._local.compressor = compressor
+        if _stdlib_zstd is not None:
+            return compressor.compress(body, mode=compressor.FLUSH_FRAME)
+        return compressor.compress(body)
+
+    def stream(self) -> StreamCompressor:
+        return _ZstdStream(self.level)
+
+
+CODECS = {codec.name: codec for codec in (BrotliCodec, ZstdCodec, GzipCodec)}
+
+
+def available_encodings() -> List[str]:
+    """Content codings supported by the installed packages, best first."""
+    return [name for name, codec in CODECS.items() if codec.available()]
+
+
+def create_codecs(encodings: Iterable[str], levels: Optional[Dict[str, int]] = None) -> List[Codec]:
+    """Codecs for ``encodings`` in preference order, skipping ones not installed."""
+    defaults = {"br": 4, "zstd": 3, "gzip": 6}
+    defaults.update(levels or {})
+    codecs = []
+    for name in encodings:
+        codec = CODECS.get(name.strip().lower())
+        if codec is None:
+            raise ValueError(f"Unknown content coding {name!r}; expected one of {', '.join(CODECS)}")
+        if codec.available():
+            codecs.append(codec(defaults[codec.name]))
+    return codecs
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """``Accept-Encoding`` as ``{coding: q}``; a missing q means 1."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate(header: str, codecs: Sequence[Codec]) -> Optional[Codec]:
+    """
+    Pick a codec the client accepts: the highest q-value wins, then the
+    server's preference order. Codings with ``q=0`` are refused; ``*``
+    stands for every coding not listed.
+    """
+    if not header:
+        return None
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best: Optional[Codec] = None
+    best_quality = 0.0
+    for codec in codecs:
+        quality = accepted.get(codec.name, wildcard)
+        if quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+class ContentTypeFilter:
+    """
+    Decide which media types are compressed from glob allow and deny lists
+    (``text/*``, ``application/*+json``); deny wins. Decisions are memoized
+    per media type.
+    """
+
+    def __init__(self, allow: Iterable[str], deny: Iterable[str] = ()):
+        self.allow = [pattern.strip().lower() for pattern in allow]
+        self.deny = [pattern.strip().lower() for pattern in deny]
+        self._decisions: Dict[str, bool] = {}
+
+    def allows(self, content_type: str) -> bool:
+        media_type = content_type.partition(";")[0].strip().lower()
+        decision = self._decisions.get(media_type)
+        if decision is None:
+            decision = (
+                any(fnmatch.fnmatchcase(media_type, pattern) for pattern in self.allow)
+                and not any(fnmatch.fnmatchcase(media_type, pattern) for pattern in self.deny)
+            )
+            if len(self._decisions) < 1024:
+                self._decisions[media_type] = decision
+        return decision
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed bodies keyed by coding and a digest of the body, so a
+    payload served repeatedly (the same JSON document, a static asset) is
+    compressed once per worker. Bounded by total compressed bytes.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(codec: Codec, body: bytes) -> Tuple[str, bytes]:
+        return codec.name, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return compressed
+
+    def put(self, key: Tuple[str, bytes], compressed: bytes):
+        if len(compressed) > self.max_bytes // 4:
+            return  # one large body would evict everything else
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = compressed
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def compress(self, codec: Codec, body: bytes) -> bytes:
+        key = self.key(codec, body)
+        compressed = self.get(key)
+        if compressed is None:
+            compressed = codec.compress(body)
+            self.put(key, compressed)
+        return compressed
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -34,11 +34,86 @@ class RunApiConfig:
         self.cache_backend: str = self._get_str("CACHE_BACKEND", "memory")
         self.redis_url: Optional[str] = self._get_str("REDIS_URL")
         self.cache_ttl: int = self._get_int("CACHE_TTL", 300)  # 5 minutes default
+        self.cache_max_bytes: int = self._get_int("CACHE_MAX_BYTES", 64 * 1024 * 1024)  # 64MB
+        
+        # Response caching
+        self.response_cache_enabled: bool = self._get_bool("RESPONSE_CACHE_ENABLED", False)
+        self.response_cache_paths: List[str] = self._get_list("RESPONSE_CACHE_PATHS", [])
+        self.response_cache_vary: List[str] = self._get_list("RESPONSE_CACHE_VARY", ["Accept", "Authorization"])
         
         # Rate limiting
         self.rate_limit_enabled: bool = self._get_bool("RATE_LIMIT_ENABLED", False)
         self.rate_limit_calls: int = self._get_int("RATE_LIMIT_CALLS", 100)
         self.rate_limit_period: int = self._get_int("RATE_LIMIT_PERIOD", 60)  # 1 minute
+        self.rate_limit_max_keys: int = self._get_int("RATE_LIMIT_MAX_KEYS", 100000)
+        self.rate_limit_algorithm: str = self._get_str("RATE_LIMIT_ALGORITHM", "fixed_window")
+        self.rate_limit_backend: str = self._get_str("RATE_LIMIT_BACKEND", self.cache_backend)
+        self.rate_limit_shared_path: Optional[str] = self._get_str("RATE_LIMIT_SHARED_PATH")
+        
+        # Routing
+        self.router_compiled: bool = self._get_bool("ROUTER_COMPILED", True)
+        # Register routes from a static scan and import route files on first use
+        self.routes_lazy: bool = self._get_bool("ROUTES_LAZY", False)
+        # Route path prefixes imported at startup in lazy mode
+        self.routes_warmup: List[str] = self._get_list("ROUTES_WARMUP", [])
+        # Import the remaining route files in the background after startup
+        self.routes_preimport: bool = self._get_bool("ROUTES_PREIMPORT", True)
+        # Threads for route discovery and concurrent route imports (1 = sequential)
+        self.routes_import_workers: int = max(1, self._get_int("ROUTES_IMPORT_WORKERS", 1))
+        # Swap changed route files into the running app (set by `runapi dev`)
+        self.routes_hot_reload: bool = self._get_bool("ROUTES_HOT_RELOAD", False)
+        self.routes_hot_reload_interval: float = self._get_float("ROUTES_HOT_RELOAD_INTERVAL", 0.5)
+        # Route manifest reused across starts while routes/ is unchanged
+        self.routes_manifest: bool = self._get_bool("ROUTES_MANIFEST", False)
+        self.routes_manifest_path: str = self._get_str("ROUTES_MANIFEST_PATH", ".runapi/routes.json")
+        # "mtime" (mtime + size) or "hash" (content hash)
+        self.routes_manifest_validate: str = self._get_str("ROUTES_MANIFEST_VALIDATE", "mtime")
+        
+        # Process supervisor (`runapi start`)
+        # Worker processes: a number, or "auto" (CPUs, cgroup quota, memory)
+        self.workers: str = self._get_str("WORKERS", "1")
+        # Memory budgeted per worker by "auto", in MB
+        self.worker_memory: int = self._get_int("WORKER_MEMORY", 256)
+        # Event loop ("auto", "asyncio", "uvloop") and HTTP parser ("auto", "h11",
+        # "httptools"); "auto" picks uvloop/httptools when installed
+        self.loop: str = self._get_str("LOOP", "auto")
+        self.http: str = self._get_str("HTTP", "auto")
+        # Build the app once and fork workers from it (copy-on-write sharing)
+        self.preload: bool = self._get_bool("PRELOAD", True)
+        self.gc_freeze: bool = self._get_bool("GC_FREEZE", True)
+        # One SO_REUSEPORT socket per worker instead of one shared socket
+        self.reuse_port: bool = self._get_bool("REUSE_PORT", False)
+        # Recycle a worker after this many requests (0 = never), plus random jitter
+        self.max_requests: int = self._get_int("MAX_REQUESTS", 0)
+        self.max_requests_jitter: int = self._get_int("MAX_REQUESTS_JITTER", 0)
+        self.graceful_timeout: float = self._get_float("GRACEFUL_TIMEOUT", 30.0)
+        # Seconds between per-worker memory log lines (0 = only on SIGUSR1)
+        self.memory_report_interval: float = self._get_float("MEMORY_REPORT_INTERVAL", 0.0)
+        
+        # Middleware pipeline
+        self.middleware_fused: bool = self._get_bool("MIDDLEWARE_FUSED", False)
+        self.middleware_timing: bool = self._get_bool("MIDDLEWARE_TIMING", False)
+        
+        # JSON rendering: auto (orjson, then msgspec, when installed), orjson, msgspec or json
+        self.json_engine: str = self._get_str("JSON_ENGINE", "auto")
+        
+        # Response compression
+        self.compression_enabled: bool = self._get_bool("COMPRESSION_ENABLED", True)
+        # Preference order among the installed codecs (br needs brotli, zstd
+        # needs zstandard before Python 3.14)
+        self.compression_encodings: List[str] = self._get_list("COMPRESSION_ENCODINGS", ["br", "zstd", "gzip"])
+        self.compression_min_size: int = self._get_int("COMPRESSION_MIN_SIZE", 500)
+        self.compression_gzip_level: int = self._get_int("COMPRESSION_GZIP_LEVEL", 6)
+        self.compression_brotli_level: int = self._get_int("COMPRESSION_BROTLI_LEVEL", 4)
+        self.compression_zstd_level: int = self._get_int("COMPRESSION_ZSTD_LEVEL", 3)
+        # Media type globs to compress, and to never compress
+        self.compression_types: List[str] = self._get_list("COMPRESSION_TYPES", [
+            "text/*", "application/json", "application/*+json", "application/javascript", "application/xml",
+            "application/*+xml", "application/x-ndjson", "application/wasm", "image/svg+xml",
+        ])
+        self.compression_exclude_types: List[str] = self._get_list("COMPRESSION_EXCLUDE_TYPES", ["text/event-stream"])
+        # Bytes of compressed bodies memoized per worker (0 disables)
+        self.compression_cache_size: int = self._get_int("COMPRESSION_CACHE_SIZE", 8 * 1024 * 1024)
         
         # Logging
         self.log_level: str = self._get_str("LOG_LEVEL", "INFO")
@@ -48,15 +123,34 @@ class RunApiConfig:
         self.static_files_enabled: bool = self._get_bool("STATIC_FILES_ENABLED", True)
         self.static_files_path: str = self._get_str("STATIC_FILES_PATH", "static")
         self.static_files_url: str = self._get_str("STATIC_FILES_URL", "/static")
+        # Serve the `runapi build-static` output (fingerprinted, precompressed)
+        self.static_precompressed: bool = self._get_bool("STATIC_PRECOMPRESSED", False)
+        self.static_build_path: str = self._get_str("STATIC_BUILD_PATH", ".runapi/static")
+        # Serve static files from an in-memory LRU (large files memory-mapped)
+        self.static_hot_cache: bool = self._get_bool("STATIC_HOT_CACHE", False)
+        self.static_hot_cache_size: int = self._get_int("STATIC_HOT_CACHE_SIZE", 32 * 1024 * 1024)
+        self.static_hot_max_file_size: int = self._get_int("STATIC_HOT_MAX_FILE_SIZE", 1024 * 1024)
+        self.static_hot_invalidation: str = self._get_str("STATIC_HOT_INVALIDATION", "auto")
+        self.static_hot_check_interval: float = self._get_float("STATIC_HOT_CHECK_INTERVAL", 1.0)
         
         # Upload settings
         self.max_upload_size: int = self._get_int("MAX_UPLOAD_SIZE", 10 * 1024 * 1024)  # 10MB
         self.upload_path: str = self._get_str("UPLOAD_PATH", "uploads")
+        # Bytes buffered before each write to disk while streaming an upload
+        self.upload_chunk_size: int = self._get_int("UPLOAD_CHUNK_SIZE", 1024 * 1024)
+        self.upload_checksums: List[str] = self._get_list("UPLOAD_CHECKSUMS", ["sha256"])
         
         # JWT settings
         self.jwt_algorithm: str = self._get_str("JWT_ALGORITHM", "HS256")
         self.jwt_expiry: int = self._get_int("JWT_EXPIRY", 3600)  # 1 hour
         self.jwt_refresh_expiry: int = self._get_int("JWT_REFRESH_EXPIRY", 86400)  # 24 hours
+        self.auth_token_cache_size: int = self._get_int("AUTH_TOKEN_CACHE_SIZE", 10000)  # 0 disables
+        
+        # Password hashing pool
+        self.password_hash_executor: str = self._get_str("PASSWORD_HASH_EXECUTOR", "thread")
+        self.password_hash_workers: int = self._get_int("PASSWORD_HASH_WORKERS", 0)  # 0 = min(4, CPUs)
+        self.password_hash_max_queue: int = self._get_int("PASSWORD_HASH_MAX_QUEUE", 64)
+        self.password_hash_queue_timeout: float = self._get_float("PASSWORD_HASH_QUEUE_TIMEOUT", 5.0)
         
         # Custom settings
         self.custom: Dict[str, Any] = {}
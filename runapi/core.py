@@ -1,10 +1,19 @@
 # runapi/core.py
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
+from starlette.middleware import Middleware
+from starlette.routing import BaseRoute
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
+import asyncio
+import functools
 import importlib.util
 import logging
-from typing import List, Optional, Type, Dict, Any
+import os
+import time
+from typing import Callable, List, Optional, Tuple, Type, Dict, Any, Union
 
 from .config import get_config, RunApiConfig
 from .middleware import (
@@ -14,33 +23,98 @@ from .middleware import (
     AuthMiddleware,
     SecurityHeadersMiddleware,
     CompressionMiddleware,
+    FusedMiddleware,
+    ResponseCacheMiddleware,
+    StageTimings,
+    UploadLimitMiddleware,
     RunApiMiddleware
 )
+from .cache import CachePolicy, ResponseCache, get_cache_policy
 from .errors import setup_error_handlers
+from .discovery import (
+    HTTP_METHODS,
+    RouteFileInfo,
+    discover_route_files,
+    route_module_name,
+    route_path,
+    route_prefix,
+    scan_route_file,
+)
+from .manifest import RouteManifest
+from .paths import PathMatcher
+from .profiling import StartupProfiler
+from .reload import RouteReloader
+from .routing import LazyAPIRoute, LazyRouteModule, RadixRouter
+from .serialization import json_response_class
+from .static import HotStaticFiles, PrecompressedStaticFiles, StaticManifest
 
 
 class RunApiApp:
     """Enhanced RunApi application class with configuration and middleware support."""
     
-    def __init__(self, config: Optional[RunApiConfig] = None, **fastapi_kwargs):
-        self.config = config or get_config()
-        self.app = self._create_fastapi_app(**fastapi_kwargs)
-        self.middleware_stack: List[Type[RunApiMiddleware]] = []
-        
-        # Setup logging
-        self._setup_logging()
-        
-        # Setup default middleware
-        self._setup_default_middleware()
-        
-        # Setup error handlers
-        self._setup_error_handlers()
-        
-        # Load routes
-        self._load_routes()
-        
-        # Setup static files
-        self._setup_static_files()
+    def __init__(
+        self,
+        config: Optional[RunApiConfig] = None,
+        profile_startup: Union[bool, StartupProfiler] = False,
+        **fastapi_kwargs,
+    ):
+        # Wall time and allocations per startup phase, route file and import;
+        # pass a StartupProfiler to configure it or include earlier work
+        if isinstance(profile_startup, StartupProfiler):
+            self.startup_profile: Optional[StartupProfiler] = profile_startup.start()
+        else:
+            self.startup_profile = StartupProfiler().start() if profile_startup else None
+        try:
+            with self._phase("config"):
+                self.config = config or get_config()
+            with self._phase("create_app"):
+                self.app = self._create_fastapi_app(**fastapi_kwargs)
+            self.middleware_stack: List[Type[RunApiMiddleware]] = []
+            self.middleware_timings: Optional[StageTimings] = None
+            self.response_cache: Optional[ResponseCache] = None
+            
+            # Setup logging
+            with self._phase("setup_logging"):
+                self._setup_logging()
+            
+            # Setup default middleware
+            with self._phase("setup_default_middleware"):
+                self._setup_default_middleware()
+            
+            # Setup error handlers
+            with self._phase("setup_error_handlers"):
+                self._setup_error_handlers()
+            
+            # Load routes
+            self.file_routes: List[APIRoute] = []
+            self.route_dispatcher: Optional[RadixRouter] = None
+            self.lazy_modules: List[LazyRouteModule] = []
+            # Seconds spent importing each route file at startup
+            self.route_import_times: Dict[str, float] = {}
+            self._preimport_task: Optional[asyncio.Task] = None
+            # Routes and cached paths registered by each route file
+            self._route_files: Dict[str, Tuple[List[BaseRoute], List[str]]] = {}
+            self.route_reloader: Optional[RouteReloader] = None
+            with self._phase("load_routes"):
+                self._load_routes()
+            with self._phase("setup_router"):
+                self._setup_router()
+                self._setup_lazy_routes()
+                self._setup_hot_reload()
+            
+            # Setup static files
+            with self._phase("setup_static_files"):
+                self._setup_static_files()
+        finally:
+            if self.startup_profile is not None:
+                self.startup_profile.stop()
+    
+    def _phase(self, name: str, category: str = "phase"):
+        """Profile a block while the startup profile is recording."""
+        profile = self.startup_profile
+        if profile is None or not profile.running:
+            return nullcontext()
+        return profile.span(name, category)
     
     def _create_fastapi_app(self, **kwargs) -> FastAPI:
         """Create FastAPI application with configuration."""
@@ -50,6 +124,8 @@ class RunApiApp:
             "title": kwargs.get("title", "RunApi API"),
             "description": kwargs.get("description", "API built with RunApi framework"),
             "version": kwargs.get("version", "1.0.0"),
+            # Return values are rendered with the configured JSON engine
+            "default_response_class": json_response_class(self.config.json_engine),
         }
         app_kwargs.update(kwargs)
         
@@ -65,6 +141,31 @@ class RunApiApp:
     
     def _setup_default_middleware(self):
         """Setup default middleware based on configuration."""
+        # Response cache sits innermost so cached hits still pass rate
+        # limiting, CORS and security headers
+        if self.config.response_cache_enabled:
+            self.response_cache = ResponseCache(config=self.config)
+            self.app.add_middleware(
+                ResponseCacheMiddleware,
+                cache=self.response_cache,
+                paths=self.config.response_cache_paths
+            )
+        
+        if self.config.middleware_fused:
+            if self.config.middleware_timing:
+                self.middleware_timings = StageTimings()
+            self.app.add_middleware(
+                FusedMiddleware,
+                config=self.config,
+                logger=self.logger,
+                timings=self.middleware_timings
+            )
+            return
+        
+        # Reject oversized bodies before FastAPI buffers or spools them
+        if self.config.max_upload_size:
+            self.app.add_middleware(UploadLimitMiddleware, config=self.config)
+        
         # CORS middleware
         if self.config.cors_origins:
             from fastapi.middleware.cors import CORSMiddleware as FastAPICORSMiddleware
@@ -81,7 +182,12 @@ class RunApiApp:
             self.app.add_middleware(
                 RateLimitMiddleware,
                 calls=self.config.rate_limit_calls,
-                period=self.config.rate_limit_period
+                period=self.config.rate_limit_period,
+                max_keys=self.config.rate_limit_max_keys,
+                algorithm=self.config.rate_limit_algorithm,
+                backend=self.config.rate_limit_backend,
+                shared_path=self.config.rate_limit_shared_path,
+                redis_url=self.config.redis_url
             )
         
         # Security headers middleware
@@ -92,87 +198,479 @@ class RunApiApp:
             self.app.add_middleware(RequestLoggingMiddleware, logger=self.logger)
         
         # Compression middleware
-        self.app.add_middleware(CompressionMiddleware)
+        if self.config.compression_enabled:
+            self.app.add_middleware(CompressionMiddleware, config=self.config)
     
     def _setup_error_handlers(self):
         """Setup error handlers for the application."""
-        setup_error_handlers(self.app, self.logger, self.config.debug)
+        setup_error_handlers(self.app, self.logger, self.config.debug, self.config.json_engine)
     
     def _setup_static_files(self):
         """Setup static file serving."""
-        if self.config.static_files_enabled:
-            static_path = Path(self.config.static_files_path)
-            if static_path.exists():
+        self.static_manifest: Optional[StaticManifest] = None
+        if not self.config.static_files_enabled:
+            return
+        if self.config.static_precompressed:
+            self.static_manifest = StaticManifest.load(Path(self.config.static_build_path))
+            if self.static_manifest is not None:
                 self.app.mount(
                     self.config.static_files_url,
-                    StaticFiles(directory=str(static_path)),
+                    PrecompressedStaticFiles(Path(self.config.static_build_path), self.static_manifest),
                     name="static"
                 )
+                return
+            self.logger.warning(
+                f"No static build in {self.config.static_build_path}; run 'runapi build-static'. "
+                "Serving static files as is."
+            )
+        static_path = Path(self.config.static_files_path)
+        if static_path.exists():
+            if self.config.static_hot_cache:
+                static_app = HotStaticFiles(
+                    static_path,
+                    max_bytes=self.config.static_hot_cache_size,
+                    max_file_size=self.config.static_hot_max_file_size,
+                    invalidation=self.config.static_hot_invalidation,
+                    check_interval=self.config.static_hot_check_interval,
+                )
+            else:
+                static_app = StaticFiles(directory=str(static_path))
+            self.app.mount(self.config.static_files_url, static_app, name="static")
     
     def _load_routes(self):
         """Load routes from project's routes/ folder."""
         routes_path = Path("routes")
-        if routes_path.exists():
+        if not routes_path.exists():
+            return
+        if not self.config.routes_manifest:
             self._load_routes_recursive(routes_path)
+            return
+        manifest = self._get_route_manifest(routes_path)
+        self._load_route_files(
+            [(routes_path / entry.file, entry.prefix, entry.info(routes_path)) for entry in manifest.entries]
+        )
+    
+    def _get_route_manifest(self, routes_path: Path) -> RouteManifest:
+        """Reuse the saved route manifest, or rebuild and save it if routes/ changed."""
+        manifest_path = Path(self.config.routes_manifest_path)
+        manifest = RouteManifest.load(manifest_path, routes_path)
+        if manifest is not None and manifest.is_valid():
+            self.logger.debug(f"Using route manifest {manifest_path}")
+            return manifest
+        
+        manifest = RouteManifest.build(
+            routes_path,
+            validate=self.config.routes_manifest_validate,
+            workers=self.config.routes_import_workers,
+        )
+        try:
+            manifest.save(manifest_path)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not write route manifest {manifest_path}: {e}")
+        return manifest
     
     def _load_routes_recursive(self, routes_dir: Path, prefix: str = ""):
         """Recursively load routes from directory structure."""
-        router = APIRouter(prefix=prefix)
+        route_files, _ = discover_route_files(routes_dir, prefix, workers=self.config.routes_import_workers)
+        self._load_route_files([(route_file, file_prefix, None) for route_file, file_prefix in route_files])
+    
+    def _load_route_files(self, route_files: List[Tuple[Path, str, Optional[RouteFileInfo]]]):
+        """Load route files in order, importing independent modules concurrently.
         
-        for item in routes_dir.iterdir():
-            if item.is_dir():
-                # Skip hidden directories and __pycache__
-                if item.name.startswith(".") or item.name.startswith("__"):
+        With ``ROUTES_IMPORT_WORKERS`` above 1, modules that are imported at
+        startup and do not import other route modules are executed on a
+        thread pool up front; routes are still registered one file at a
+        time, in discovery order, so the route table does not depend on
+        which import finishes first.
+        """
+        started = time.perf_counter()
+        workers = self.config.routes_import_workers
+        preloaded: Dict[Path, Future] = {}
+        executor = None
+        if workers > 1:
+            independent = []
+            for route_file, prefix, info in route_files:
+                if info is None:
+                    try:
+                        info = scan_route_file(route_file)
+                    except (OSError, SyntaxError, ValueError):
+                        continue  # imported in order, which reports the error
+                if info.local_imports or (self.config.routes_lazy and info.lazy_safe):
                     continue
-
-                # Recurse into subfolders (e.g., routes/api/users)
-                new_prefix = f"{prefix}/{item.name}"
-                self._load_routes_recursive(item, new_prefix)
-            elif item.suffix == ".py" and item.name != "__init__.py":
-                self._load_route_file(item, prefix)
-    
-    def _load_route_file(self, route_file: Path, prefix: str = ""):
-        """Load a single route file."""
+                independent.append((route_file, route_module_name(prefix, route_file.stem)))
+            if len(independent) > 1:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="runapi-import")
+                for route_file, module_name in independent:
+                    preloaded[route_file] = executor.submit(self._import_route_module, route_file, module_name)
+        try:
+            for route_file, prefix, info in route_files:
+                self._load_route_file(route_file, prefix, info, preloaded.get(route_file))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self._log_route_import_report(time.perf_counter() - started, len(preloaded))
+    
+    def _import_route_module(self, route_file: Path, module_name: str, fresh: bool = False):
+        """Execute a route file as a new module, recording how long it took.
+        
+        ``fresh`` compiles from source, bypassing ``__pycache__``: bytecode
+        is only validated by the source mtime in whole seconds, too coarse
+        for a file saved twice in quick succession.
+        """
+        started = time.perf_counter()
+        try:
+            with self._phase(str(route_file), "route"):
+                spec = importlib.util.spec_from_file_location(module_name, route_file)
+                module = importlib.util.module_from_spec(spec)
+                if fresh:
+                    code = compile(Path(route_file).read_bytes(), str(route_file), "exec", dont_inherit=True)
+                    exec(code, module.__dict__)
+                else:
+                    spec.loader.exec_module(module)
+            return module
+        finally:
+            self.route_import_times[str(route_file)] = time.perf_counter() - started
+    
+    def route_import_report(self, limit: Optional[int] = 10) -> List[Tuple[str, float]]:
+        """The slowest route file imports at startup, as ``(file, seconds)`` pairs."""
+        report = sorted(self.route_import_times.items(), key=lambda item: item[1], reverse=True)
+        return report if limit is None else report[:limit]
+    
+    def _log_route_import_report(self, elapsed: float, concurrent: int):
+        if not self.route_import_times or not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        slowest = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.route_import_report(5))
+        self.logger.debug(
+            f"Imported {len(self.route_import_times)} route files ({concurrent} concurrently) "
+            f"in {elapsed * 1000:.1f}ms; slowest: {slowest}"
+        )
+    
+    def _load_route_file(
+        self,
+        route_file: Path,
+        prefix: str = "",
+        info: Optional[RouteFileInfo] = None,
+        preloaded: Optional[Future] = None,
+    ):
+        """Load a single route file.
+        
+        ``info`` is its scan result and ``preloaded`` a pending import of
+        the module, if already known.
+        """
+        live_routes = self.app.router.routes
+        first_route = len(live_routes)
         try:
             route_name = route_file.stem
-            module_name = f"routes.{prefix.replace('/', '.')}.{route_name}".strip(".")
+            module_name = route_module_name(prefix, route_name)
             
-            spec = importlib.util.spec_from_file_location(module_name, route_file)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            if self.config.routes_lazy:
+                if info is None:
+                    info = scan_route_file(route_file)
+                if info.lazy_safe:
+                    cache_paths = self._register_lazy_route_file(info, module_name, prefix + self._get_route_path(route_name))
+                    self._route_files[os.path.abspath(route_file)] = (live_routes[first_route:], cache_paths)
+                    return
             
-            # Extract router or create one
-            route_router = getattr(module, "router", APIRouter())
+            if preloaded is not None:
+                module = preloaded.result()
+            else:
+                module = self._import_route_module(route_file, module_name)
             
-            # Map HTTP methods to functions
-            for method in ["get", "post", "put", "delete", "patch", "head", "options", "trace"]:
-                if hasattr(module, method):
-                    path = self._get_route_path(route_name)
-                    getattr(route_router, method)(path)(getattr(module, method))
+            path = self._get_route_path(route_name)
+            route_router = getattr(module, "router", None)
             
-            # Include the router with proper prefix
-            final_prefix = prefix if prefix else ""
-            self.app.include_router(route_router, prefix=final_prefix)
+            if route_router is None:
+                # Plain handler modules are registered on the app with their
+                # full path, so the compiled router can index them
+                routes = []
+                for method in HTTP_METHODS:
+                    if hasattr(module, method):
+                        self.app.router.add_api_route(prefix + path, getattr(module, method), methods=[method.upper()])
+                        routes.append(self.app.router.routes[-1])
+                self.file_routes.extend(routes)
+                cache_paths = self._register_cache_policies(getattr(module, "cache", None), routes)
+            else:
+                # Map HTTP methods to functions on the module's own router
+                for method in HTTP_METHODS:
+                    if hasattr(module, method):
+                        getattr(route_router, method)(path)(getattr(module, method))
+                
+                # Include the router with proper prefix
+                self.app.include_router(route_router, prefix=prefix)
+                cache_paths = self._register_cache_policies(getattr(module, "cache", None), route_router.routes, prefix)
             
-            self.logger.debug(f"Loaded route: {route_file} with prefix: {final_prefix}")
+            self._route_files[os.path.abspath(route_file)] = (live_routes[first_route:], cache_paths)
+            self.logger.debug(f"Loaded route: {route_file} with prefix: {prefix}")
             
         except Exception as e:
             self.logger.error(f"Failed to load route {route_file}: {e}")
     
+    def _register_lazy_route_file(self, info, module_name: str, path: str) -> List[str]:
+        """Register a scanned route file's handlers without importing it; returns the cached paths."""
+        module = LazyRouteModule(module_name, info.path)
+        for method in info.methods:
+            self.app.router.add_api_route(
+                path,
+                LazyAPIRoute.placeholder(method),
+                methods=[method.upper()],
+                route_class_override=functools.partial(LazyAPIRoute, module=module, handler=method),
+            )
+            module.routes.append(self.app.router.routes[-1])
+        if not module.routes:
+            return []
+        self.lazy_modules.append(module)
+        self.file_routes.extend(module.routes)
+        handler_policies = {name: CachePolicy(**arguments) for name, arguments in info.handler_cache.items()}
+        cache_paths = self._register_cache_policies(info.cache, module.routes, handler_policies=handler_policies)
+        self.logger.debug(f"Registered lazy route: {info.path} at {path}")
+        return cache_paths
+    
+    def _setup_lazy_routes(self):
+        """Import warm-up routes now and schedule the rest for after startup."""
+        if not self.lazy_modules:
+            return
+        if self.config.routes_warmup:
+            warmup = PathMatcher(self.config.routes_warmup, prefix=True)
+            for module in self.lazy_modules:
+                if any(warmup.matches(route.path) for route in module.routes):
+                    self._load_lazy_module(module)
+        
+        # The OpenAPI schema needs the real handler signatures
+        openapi = self.app.openapi
+        
+        def load_and_openapi():
+            self.load_lazy_routes()
+            return openapi()
+        
+        self.app.openapi = load_and_openapi
+        if self.config.routes_preimport:
+            self.app.router.add_event_handler("startup", self._start_preimport)
+    
+    def _load_lazy_module(self, module: LazyRouteModule) -> bool:
+        try:
+            for route in module.routes:
+                route.load()
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to load route {module.path}: {e}")
+            return False
+    
+    def load_lazy_routes(self):
+        """Import every route file that lazy mode has not imported yet."""
+        for module in self.lazy_modules:
+            if not all(route.loaded for route in module.routes):
+                self._load_lazy_module(module)
+    
+    async def _start_preimport(self):
+        self._preimport_task = asyncio.get_running_loop().create_task(self._preimport_routes())
+    
+    async def _preimport_routes(self):
+        """Import lazy route files one at a time without blocking the event loop.
+        
+        Module code runs in the default executor; the routes are then built
+        on the event loop, between requests.
+        """
+        loop = asyncio.get_running_loop()
+        for module in self.lazy_modules:
+            if all(route.loaded for route in module.routes):
+                continue
+            if not module.loaded:
+                try:
+                    await loop.run_in_executor(None, module.load)
+                except Exception as e:
+                    self.logger.error(f"Failed to load route {module.path}: {e}")
+                    continue
+            self._load_lazy_module(module)
+        self.logger.debug(f"Pre-imported {len(self.lazy_modules)} lazy route files")
+    
+    def _setup_hot_reload(self):
+        """Watch routes/ and swap changed route files in while serving."""
+        if not self.config.routes_hot_reload:
+            return
+        # A reloaded file may declare a cache policy; the middleware must be
+        # in the stack before the first request builds it
+        self._get_response_cache()
+        self.route_reloader = RouteReloader(self, interval=self.config.routes_hot_reload_interval)
+        self.app.router.add_event_handler("startup", self.route_reloader.start)
+        self.app.router.add_event_handler("shutdown", self.route_reloader.stop)
+    
+    def _prepare_reload(self, route_file: Path, prefix: str) -> Tuple[Optional[RouteFileInfo], Any]:
+        """Scan and/or freshly import a changed route file; raises if it is broken."""
+        info = scan_route_file(route_file) if self.config.routes_lazy else None
+        if info is not None and info.lazy_safe:
+            return info, None
+        return info, self._import_route_module(route_file, route_module_name(prefix, route_file.stem), fresh=True)
+    
+    def reload_route_file(self, route_file: Path, prepared: Optional[Tuple[Optional[RouteFileInfo], Any]] = None) -> bool:
+        """Re-execute one route file and swap its routes into the live router.
+        
+        Call on the event loop thread: the swap has no ``await`` in it, so a
+        request sees either the old or the new routes of the file, never a
+        mix. A file that fails to import keeps its previous routes; a
+        deleted file's routes are removed. ``prepared`` is the result of
+        ``_prepare_reload`` when the import already happened elsewhere.
+        Returns False if the file could not be loaded.
+        """
+        route_file = Path(os.path.abspath(route_file))
+        key = str(route_file)
+        if not route_file.exists():
+            self._swap_route_file(key, None)
+            self.logger.info(f"Removed routes of {route_file}")
+            return True
+        
+        prefix = route_prefix(Path(os.path.abspath("routes")), route_file)
+        try:
+            info, module = prepared if prepared is not None else self._prepare_reload(route_file, prefix)
+        except Exception as e:
+            self.logger.error(f"Failed to reload route {route_file}: {e}")
+            return False
+        
+        preloaded = None
+        if module is not None:
+            preloaded = Future()
+            preloaded.set_result(module)
+        self._swap_route_file(key, lambda: self._load_route_file(route_file, prefix, info, preloaded))
+        self.logger.info(f"Reloaded route: {route_file}")
+        return True
+    
+    async def areload_route_file(self, route_file: Path) -> bool:
+        """Like ``reload_route_file``, running the module code on a worker thread.
+        
+        Also clears the response cache, which may hold responses of the old
+        handlers.
+        """
+        route_file = Path(os.path.abspath(route_file))
+        prepared = None
+        if route_file.exists():
+            prefix = route_prefix(Path(os.path.abspath("routes")), route_file)
+            try:
+                prepared = await asyncio.get_running_loop().run_in_executor(
+                    None, self._prepare_reload, route_file, prefix
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to reload route {route_file}: {e}")
+                return False
+        reloaded = self.reload_route_file(route_file, prepared)
+        if reloaded and self.response_cache is not None:
+            await self.response_cache.clear()
+        return reloaded
+    
+    def _swap_route_file(self, key: str, load: Optional[Callable[[], None]]):
+        """Replace the routes registered by one file, keeping their position."""
+        router = self.app.router
+        old_routes, old_cache_paths = self._route_files.pop(key, ([], []))
+        old_ids = {id(route) for route in old_routes}
+        live = router.routes
+        position = next((index for index, route in enumerate(live) if id(route) in old_ids), None)
+        
+        staging = [route for route in live if id(route) not in old_ids]
+        if position is None:
+            position = len(staging)
+        for path in old_cache_paths:
+            self.response_cache.remove_policy(path)
+        self.file_routes = [route for route in self.file_routes if id(route) not in old_ids]
+        self.lazy_modules = [
+            module for module in self.lazy_modules if not any(id(route) in old_ids for route in module.routes)
+        ]
+        
+        # New routes are appended to the staging list, then moved to where
+        # the old ones were; the live list is replaced in one assignment
+        router.routes = staging
+        try:
+            if load is not None:
+                load()
+        finally:
+            new_routes = self._route_files.get(key, ([], []))[0]
+            new_ids = {id(route) for route in new_routes}
+            rest = [route for route in staging if id(route) not in new_ids]
+            router.routes = rest[:position] + list(new_routes) + rest[position:]
+            self.app.openapi_schema = None
+            self._rebuild_router()
+    
+    def _rebuild_router(self):
+        """Recompile the radix-tree dispatcher after the file routes changed."""
+        if self.route_dispatcher is None:
+            self._setup_router()
+            return
+        router = self.app.router
+        self.route_dispatcher = RadixRouter(self.file_routes, fallback=self.route_dispatcher.fallback, router=router)
+        router.middleware_stack = self.route_dispatcher
+    
+    def _setup_router(self):
+        """Compile file-based routes into a radix-tree dispatcher."""
+        if not self.config.router_compiled or not self.file_routes:
+            return
+        router = self.app.router
+        if not hasattr(router, "middleware_stack"):
+            # Older Starlette routers cannot be wrapped; they dispatch as usual
+            self.logger.debug("ROUTER_COMPILED needs a newer Starlette; using FastAPI's router")
+            return
+        self.route_dispatcher = RadixRouter(self.file_routes, fallback=router.middleware_stack, router=router)
+        router.middleware_stack = self.route_dispatcher
+    
+    def _register_cache_policies(
+        self,
+        module_cache: Any,
+        routes: List[BaseRoute],
+        prefix: str = "",
+        handler_policies: Optional[Dict[str, CachePolicy]] = None,
+    ):
+        """Wire caching declared by a route module into the shared response cache.
+        
+        A module-level ``cache = {"ttl": ..., "vary": [...]}`` applies to every
+        GET route in the file; ``@cached`` on a handler takes precedence. Lazy
+        routes pass the scanned ``@cached`` arguments as ``handler_policies``.
+        Returns the cached paths.
+        """
+        module_policy = CachePolicy.from_declaration(module_cache)
+        paths = []
+        for route in routes:
+            if not isinstance(route, APIRoute) or "GET" not in route.methods:
+                continue
+            if handler_policies is not None:
+                policy = handler_policies.get(route.name) or module_policy
+            else:
+                policy = get_cache_policy(route.endpoint) or module_policy
+            if policy is None:
+                continue
+            path = prefix + route.path
+            try:
+                self._get_response_cache().add_policy(path, policy)
+            except RuntimeError as e:
+                self.logger.warning(f"Not caching GET {path}: {e}")
+                continue
+            paths.append(path)
+            self.logger.debug(f"Caching route: GET {path}")
+        return paths
+    
+    def _get_response_cache(self) -> ResponseCache:
+        """Get the shared response cache, installing it for declared routes on first use.
+        
+        The middleware can only be added before the application starts
+        serving; rebuilding the stack would reset every middleware's state.
+        """
+        if self.response_cache is None:
+            if self.app.middleware_stack is not None:
+                raise RuntimeError(
+                    "the response cache cannot be installed while serving; "
+                    "set RESPONSE_CACHE_ENABLED or ROUTES_HOT_RELOAD to install it at startup"
+                )
+            self.response_cache = ResponseCache(config=self.config)
+            # Innermost, like the configured response cache
+            self.app.user_middleware.append(
+                Middleware(ResponseCacheMiddleware, cache=self.response_cache, cache_all=False)
+            )
+        return self.response_cache
+    
     def _get_route_path(self, route_name: str) -> str:
         """Convert route name to FastAPI path."""
-        if route_name == "index":
-            return "/"
-        elif route_name.startswith("[") and route_name.endswith("]"):
-            # Dynamic route: [id] -> {id}
-            param_name = route_name[1:-1]
-            return f"/{{{param_name}}}"
-        elif route_name.startswith("[...") and route_name.endswith("]"):
-            # Catch-all route: [...slug] -> {slug:path}
-            param_name = route_name[4:-1]
-            return f"/{{{param_name}:path}}"
-        else:
-            return f"/{route_name}"
+        return route_path(route_name)
+    
+    def static_url(self, path: str) -> str:
+        """URL of a static file; its fingerprinted copy when serving a ``build-static`` output."""
+        if self.static_manifest is not None:
+            return self.static_manifest.url(path, self.config.static_files_url)
+        return f"{self.config.static_files_url.rstrip('/')}/{path.lstrip('/')}"
     
     def add_middleware(self, middleware_class: Type[RunApiMiddleware], **kwargs):
         """Add custom middleware to the application."""
@@ -0,0 +1,214 @@
+"""
+Static route discovery for RunApi framework
+
+Finds route files and reads their handlers without importing them (or
+FastAPI), for the route manifest, lazy routes and the CLI.
+"""
+import ast
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+HTTP_METHODS = ["get", "post", "put", "delete", "patch", "head", "options", "trace"]
+
+def route_path(route_name: str) -> str:
+    """Convert a route file or directory name to a FastAPI path segment."""
+    if route_name == "index":
+        return "/"
+    elif route_name.startswith("[...") and route_name.endswith("]"):
+        # Catch-all route: [...slug] -> {slug:path}
+        return f"/{{{route_name[4:-1]}:path}}"
+    elif route_name.startswith("[") and route_name.endswith("]"):
+        # Dynamic route: [id] -> {id}
+        return f"/{{{route_name[1:-1]}}}"
+    else:
+        return f"/{route_name}"
+
+
+def route_module_name(prefix: str, route_name: str) -> str:
+    """Module name a route file is imported under, e.g. ``routes.users.[id]``."""
+    return f"routes.{prefix.replace('/', '.')}.{route_name}".strip(".")
+
+
+def is_route_dir(name: str) -> bool:
+    """Whether discovery descends into a directory (not hidden or ``__dunder__``)."""
+    return not (name.startswith(".") or name.startswith("__"))
+
+
+def is_route_file(name: str) -> bool:
+    """Whether a file name is a route module."""
+    return name.endswith(".py") and name != "__init__.py"
+
+
+def _scan_directory(item: Tuple[Path, str]) -> Tuple[List[Tuple[Path, str]], List[Tuple[Path, str]]]:
+    """Route files and route subdirectories of one directory, with their URL prefixes."""
+    directory, prefix = item
+    files, subdirectories = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if not is_route_dir(entry.name):
+                    continue
+                if entry.name.startswith("[") and entry.name.endswith("]"):
+                    subdirectories.append((Path(entry.path), f"{prefix}{route_path(entry.name)}"))
+                else:
+                    subdirectories.append((Path(entry.path), f"{prefix}/{entry.name}"))
+            elif is_route_file(entry.name):
+                files.append((Path(entry.path), prefix))
+    return files, subdirectories
+
+
+def discover_route_files(
+    routes_dir: Path, prefix: str = "", workers: int = 1
+) -> Tuple[List[Tuple[Path, str]], List[Path]]:
+    """
+    Find the route files under ``routes_dir`` with ``os.scandir``.
+
+    Directories are listed level by level, on ``workers`` threads when more
+    than one. Returns the route files with their URL prefixes, in the order
+    a sorted depth-first walk would visit them, and the directories walked.
+    Hidden and ``__dunder__`` directories are skipped.
+    """
+    routes_dir = Path(routes_dir)
+    files: List[Tuple[Path, str]] = []
+    directories: List[Path] = []
+    level = [(routes_dir, prefix)]
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="runapi-discover") if workers > 1 else None
+    try:
+        while level:
+            directories.extend(directory for directory, _ in level)
+            listings = executor.map(_scan_directory, level) if executor is not None else map(_scan_directory, level)
+            next_level = []
+            for level_files, subdirectories in listings:
+                files.extend(level_files)
+                next_level.extend(subdirectories)
+            level = next_level
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    files.sort(key=lambda item: item[0].relative_to(routes_dir).parts)
+    return files, directories
+
+
+class RouteFileInfo:
+    """What a static scan of a route file found, without importing it."""
+
+    __slots__ = ("path", "methods", "has_router", "cache", "handler_cache", "lazy_safe", "local_imports")
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Handler names in HTTP_METHODS order
+        self.methods: List[str] = []
+        self.has_router = False
+        # Module-level ``cache`` value and ``@cached`` arguments per handler
+        self.cache: Any = None
+        self.handler_cache: Dict[str, Dict[str, Any]] = {}
+        # Whether the file can be registered from the scan alone
+        self.lazy_safe = True
+        # Whether it imports other route modules (relative or ``routes.*``)
+        self.local_imports = False
+
+
+def _cached_arguments(decorator: ast.expr) -> Optional[Dict[str, Any]]:
+    """Literal arguments of a ``@cached`` decorator, ``None`` if it is not one.
+
+    Raises ``ValueError`` for arguments that are not literals.
+    """
+    call = decorator if isinstance(decorator, ast.Call) else None
+    target = call.func if call is not None else decorator
+    name = target.attr if isinstance(target, ast.Attribute) else getattr(target, "id", None)
+    if name != "cached":
+        return None
+    if call is None:
+        return {}
+    if call.args:
+        raise ValueError("positional @cached arguments")
+    return {keyword.arg: ast.literal_eval(keyword.value) for keyword in call.keywords}
+
+
+def _imports_routes(tree: ast.Module) -> bool:
+    """Whether a module imports other route modules, relatively or as ``routes.*``."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            if node.level or (node.module or "").split(".")[0] == "routes":
+                return True
+        elif isinstance(node, ast.Import):
+            if any(alias.name.split(".")[0] == "routes" for alias in node.names):
+                return True
+    return False
+
+
+def _bound_names(node: ast.stmt) -> List[str]:
+    """Names a module-level statement may bind, including inside ``if``/``try`` blocks."""
+    names = []
+    for child in ast.walk(node):
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.append(child.name)
+        elif isinstance(child, (ast.Import, ast.ImportFrom)):
+            names.extend((alias.asname or alias.name).split(".")[0] for alias in child.names)
+        elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+            names.append(child.id)
+    return names
+
+
+def scan_route_file(path: Path, source: Optional[bytes] = None) -> RouteFileInfo:
+    """
+    Statically scan a route file for its HTTP handlers.
+
+    Only top-level ``def``/``async def`` statements named after an HTTP
+    method count as handlers. A file that defines its own ``router``, binds a
+    handler name some other way (an import or assignment), or declares
+    caching with non-literal values is marked not ``lazy_safe``: it has to be
+    imported to know its routes. ``source`` saves reading the file again.
+    Raises ``SyntaxError`` and ``OSError``.
+    """
+    info = RouteFileInfo(path)
+    if source is None:
+        source = Path(path).read_bytes()
+    tree = ast.parse(source, filename=str(path))
+    info.local_imports = _imports_routes(tree)
+    found = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name not in HTTP_METHODS:
+                continue
+            found.add(node.name)
+            for decorator in node.decorator_list:
+                try:
+                    arguments = _cached_arguments(decorator)
+                except ValueError:
+                    info.lazy_safe = False
+                    continue
+                if arguments is not None:
+                    info.handler_cache[node.name] = arguments
+            continue
+        if isinstance(node, ast.ClassDef):
+            names = [node.name]
+        else:
+            names = _bound_names(node)
+        if "router" in names:
+            info.has_router = True
+            info.lazy_safe = False
+        if "*" in names or any(name in HTTP_METHODS for name in names):
+            info.lazy_safe = False
+        if "cache" in names:
+            try:
+                info.cache = ast.literal_eval(node.value) if isinstance(node, ast.Assign) else None
+            except (ValueError, TypeError, SyntaxError, RecursionError):
+                info.lazy_safe = False
+            if not isinstance(node, ast.Assign):
+                info.lazy_safe = False
+    info.methods = [method for method in HTTP_METHODS if method in found]
+    return info
+
+
+def route_prefix(routes_dir: Path, route_file: Path) -> str:
+    """URL prefix of a route file from its directory, e.g. ``/users/{id}``."""
+    prefix = ""
+    for part in Path(route_file).parent.relative_to(routes_dir).parts:
+        if part.startswith("[") and part.endswith("]"):
+            prefix += route_path(part)
+        else:
+            prefix += f"/{part}"
+    return prefix
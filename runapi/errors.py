@@ -1,10 +1,11 @@
 """
 Error handling system for RunApi framework
 """
+import math
 import traceback
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Optional, Type, Union
 from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
+from .serialization import JSONResponse, json_response_class
 from fastapi.exception_handlers import http_exception_handler
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
@@ -18,12 +19,15 @@ class RunApiException(Exception):
         message: str,
         status_code: int = 500,
         details: Optional[Dict[str, Any]] = None,
-        error_code: Optional[str] = None
+        error_code: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
     ):
         self.message = message
         self.status_code = status_code
         self.details = details or {}
         self.error_code = error_code or self.__class__.__name__
+        # Extra response headers, e.g. Retry-After
+        self.headers = headers or {}
         super().__init__(self.message)
 
 
@@ -62,6 +66,13 @@ class ConflictError(RunApiException):
         super().__init__(message, 409, details, "CONFLICT_ERROR")
 
 
+class PayloadTooLargeError(RunApiException):
+    """Raised when a request body exceeds the upload size limit."""
+    
+    def __init__(self, message: str = "Request body too large", details: Dict[str, Any] = None):
+        super().__init__(message, 413, details, "PAYLOAD_TOO_LARGE")
+
+
 class RateLimitError(RunApiException):
     """Raised when rate limit is exceeded."""
     
@@ -69,6 +80,20 @@ class RateLimitError(RunApiException):
         super().__init__(message, 429, details, "RATE_LIMIT_ERROR")
 
 
+class ServiceUnavailableError(RunApiException):
+    """Raised when the server is temporarily overloaded."""
+    
+    def __init__(
+        self,
+        message: str = "Service temporarily unavailable",
+        details: Dict[str, Any] = None,
+        retry_after: Optional[float] = None
+    ):
+        # Retry-After takes whole seconds
+        headers = {"Retry-After": str(math.ceil(retry_after))} if retry_after is not None else None
+        super().__init__(message, 503, details, "SERVICE_UNAVAILABLE", headers)
+
+
 class ServerError(RunApiException):
     """Raised when an internal server error occurs."""
     
@@ -125,20 +150,31 @@ class ErrorResponse:
         
         return response
     
-    def to_json_response(self) -> JSONResponse:
-        """Convert to FastAPI JSONResponse."""
-        return JSONResponse(
+    def to_json_response(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        response_class: Type[JSONResponse] = JSONResponse
+    ) -> JSONResponse:
+        """Convert to a JSONResponse; ``response_class`` picks the JSON engine (see ``json_response_class``)."""
+        return response_class(
             status_code=self.status_code,
-            content=self.to_dict()
+            content=self.to_dict(),
+            headers=headers
         )
 
 
 class ErrorHandler:
     """Error handler with logging and formatting."""
     
-    def __init__(self, logger: Optional[logging.Logger] = None, debug: bool = False):
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        debug: bool = False,
+        response_class: Type[JSONResponse] = JSONResponse
+    ):
         self.logger = logger or logging.getLogger(__name__)
         self.debug = debug
+        self.response_class = response_class
     
     def handle_runapi_exception(self, request: Request, exc: RunApiException) -> JSONResponse:
         """Handle RunApi custom exceptions."""
@@ -155,7 +191,7 @@ class ErrorHandler:
             request_id=getattr(request.state, "request_id", None)
         )
         
-        return error_response.to_json_response()
+        return error_response.to_json_response(exc.headers or None, self.response_class)
     
     def handle_http_exception(self, request: Request, exc: HTTPException) -> JSONResponse:
         """Handle FastAPI HTTP exceptions."""
@@ -168,7 +204,7 @@ class ErrorHandler:
             request_id=getattr(request.state, "request_id", None)
         )
         
-        return error_response.to_json_response()
+        return error_response.to_json_response(response_class=self.response_class)
     
     def handle_validation_exception(self, request: Request, exc: Exception) -> JSONResponse:
         """Handle Pydantic validation exceptions."""
@@ -186,7 +222,7 @@ class ErrorHandler:
             request_id=getattr(request.state, "request_id", None)
         )
         
-        return error_response.to_json_response()
+        return error_response.to_json_response(response_class=self.response_class)
     
     def handle_generic_exception(self, request: Request, exc: Exception) -> JSONResponse:
         """Handle generic exceptions."""
@@ -211,16 +247,26 @@ class ErrorHandler:
             request_id=getattr(request.state, "request_id", None)
         )
         
-        return error_response.to_json_response()
+        return error_response.to_json_response(response_class=self.response_class)
 
 
 # Global error handler instance
 error_handler = ErrorHandler()
 
 
-def setup_error_handlers(app, logger: Optional[logging.Logger] = None, debug: bool = False):
-    """Setup error handlers for a FastAPI application."""
-    handler = ErrorHandler(logger, debug)
+def setup_error_handlers(
+    app,
+    logger: Optional[logging.Logger] = None,
+    debug: bool = False,
+    json_engine: Optional[str] = None
+):
+    """Setup error handlers for a FastAPI application.
+    
+    ``json_engine`` binds the error responses to one ``JSON_ENGINE``; by
+    default they follow the global configuration.
+    """
+    response_class = json_response_class(json_engine) if json_engine else JSONResponse
+    handler = ErrorHandler(logger, debug, response_class)
     
     @app.exception_handler(RunApiException)
     async def runapi_exception_handler(request: Request, exc: RunApiException):
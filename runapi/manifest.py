@@ -0,0 +1,212 @@
+"""
+Persistent route manifest for RunApi framework
+"""
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .discovery import (
+    RouteFileInfo,
+    is_route_dir,
+    is_route_file,
+    discover_route_files,
+    route_module_name,
+    route_path,
+    scan_route_file,
+)
+
+MANIFEST_VERSION = 2
+VALIDATE_MODES = ("mtime", "hash")
+
+_PARAM_NAME = re.compile(r"\{([^}:]+)")
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _listing_digest(directory: Path) -> str:
+    """Digest of the route files and subdirectories directly in ``directory``.
+
+    Ignores everything discovery skips, so ``__pycache__`` appearing after
+    the first import does not invalidate the manifest.
+    """
+    names = []
+    with os.scandir(directory) as entries:
+        for item in entries:
+            if item.is_dir():
+                if is_route_dir(item.name):
+                    names.append(item.name + "/")
+            elif is_route_file(item.name):
+                names.append(item.name)
+    return _digest("\n".join(sorted(names)).encode("utf-8"))
+
+
+class RouteEntry:
+    """One route file as recorded in the manifest."""
+
+    __slots__ = (
+        "file", "prefix", "name", "module", "path", "methods", "params",
+        "has_router", "lazy_safe", "local_imports", "cache", "handler_cache", "mtime_ns", "size", "digest",
+    )
+
+    def __init__(self, **values: Any):
+        for field in self.__slots__:
+            setattr(self, field, values.get(field))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RouteEntry":
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"Unknown manifest fields: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def info(self, routes_dir: Path) -> RouteFileInfo:
+        """The scan result this entry was built from."""
+        info = RouteFileInfo(routes_dir / self.file)
+        info.methods = list(self.methods or [])
+        info.has_router = bool(self.has_router)
+        info.lazy_safe = bool(self.lazy_safe)
+        info.local_imports = bool(self.local_imports)
+        info.cache = self.cache
+        info.handler_cache = dict(self.handler_cache or {})
+        return info
+
+
+class RouteManifest:
+    """
+    Route table of a ``routes/`` directory, persisted between starts.
+
+    Records every route file with its URL path, HTTP methods, path
+    parameters, module name and static scan result, plus enough file system
+    state to tell whether the tree changed. With ``validate="mtime"`` a start
+    only stats the recorded directories and files (directories whose mtime
+    moved are re-listed, so ``__pycache__`` does not count as a change); with
+    ``validate="hash"`` directories are re-listed and files re-hashed, for
+    builds that do not preserve mtimes. An unchanged tree skips discovery
+    and parsing entirely.
+    """
+
+    def __init__(
+        self,
+        routes_dir: Path,
+        entries: List[RouteEntry],
+        directories: Dict[str, Dict[str, Any]],
+        validate: str = "mtime",
+    ):
+        if validate not in VALIDATE_MODES:
+            raise ValueError(f"validate must be one of {', '.join(VALIDATE_MODES)}, got {validate!r}")
+        self.routes_dir = Path(routes_dir)
+        self.entries = entries
+        self.directories = directories
+        self.validate = validate
+
+    @classmethod
+    def build(cls, routes_dir: Path, validate: str = "mtime", workers: int = 1) -> "RouteManifest":
+        """Walk and scan ``routes_dir`` (without importing anything)."""
+        routes_dir = Path(routes_dir)
+        files, walked = discover_route_files(routes_dir, workers=workers)
+        directories = {
+            directory.relative_to(routes_dir).as_posix(): {
+                "mtime_ns": os.stat(directory).st_mtime_ns,
+                "listing": _listing_digest(directory),
+            }
+            for directory in walked
+        }
+        hash_files = validate == "hash"
+        entries = [cls._build_entry(routes_dir, route_file, prefix, hash_files) for route_file, prefix in files]
+        return cls(routes_dir, entries, directories, validate)
+
+    @staticmethod
+    def _build_entry(routes_dir: Path, route_file: Path, prefix: str, hash_files: bool) -> RouteEntry:
+        # Stat before reading: a concurrent edit then invalidates the entry
+        stat = os.stat(route_file)
+        source = route_file.read_bytes()
+        path = prefix + route_path(route_file.stem)
+        entry = RouteEntry(
+            file=route_file.relative_to(routes_dir).as_posix(),
+            prefix=prefix,
+            name=route_file.stem,
+            module=route_module_name(prefix, route_file.stem),
+            path=path,
+            params=_PARAM_NAME.findall(path),
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            digest=_digest(source) if hash_files else None,
+        )
+        try:
+            info = scan_route_file(route_file, source)
+        except (SyntaxError, ValueError):
+            # Imported at startup, which reports the error
+            entry.methods, entry.has_router, entry.lazy_safe, entry.local_imports = [], False, False, True
+            return entry
+        entry.methods = info.methods
+        entry.has_router = info.has_router
+        entry.lazy_safe = info.lazy_safe
+        entry.local_imports = info.local_imports
+        entry.cache = info.cache
+        entry.handler_cache = info.handler_cache
+        return entry
+
+    def is_valid(self) -> bool:
+        """Whether the recorded tree still matches the file system."""
+        hashed = self.validate == "hash"
+        try:
+            for relative, record in self.directories.items():
+                directory = self.routes_dir / relative
+                if not hashed and os.stat(directory).st_mtime_ns == record["mtime_ns"]:
+                    continue
+                if _listing_digest(directory) != record["listing"]:
+                    return False
+            for entry in self.entries:
+                route_file = self.routes_dir / entry.file
+                if hashed:
+                    if _digest(route_file.read_bytes()) != entry.digest:
+                        return False
+                    continue
+                stat = os.stat(route_file)
+                if stat.st_mtime_ns != entry.mtime_ns or stat.st_size != entry.size:
+                    return False
+        except OSError:
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "routes_dir": self.routes_dir.as_posix(),
+            "validate": self.validate,
+            "directories": self.directories,
+            "routes": [entry.to_dict() for entry in self.entries],
+        }
+
+    def save(self, path: Path):
+        """Write the manifest atomically; raises ``OSError`` or ``TypeError``."""
+        path = Path(path)
+        data = json.dumps(self.to_dict(), indent=1, sort_keys=True)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_text(data, encoding="utf-8")
+            os.replace(temp_path, path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    @classmethod
+    def load(cls, path: Path, routes_dir: Path) -> Optional["RouteManifest"]:
+        """Read a manifest for ``routes_dir``; ``None`` if missing, unreadable or for another tree."""
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+            if data.get("version") != MANIFEST_VERSION or data.get("routes_dir") != Path(routes_dir).as_posix():
+                return None
+            entries = [RouteEntry.from_dict(entry) for entry in data["routes"]]
+            return cls(routes_dir, entries, data["directories"], data["validate"])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
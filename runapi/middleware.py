@@ -1,21 +1,97 @@
 import time
 import json
 import logging
-from typing import Callable, Dict, Any, List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Tuple, Union
 from fastapi import Request, Response, HTTPException
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from fastapi.middleware.cors import CORSMiddleware as FastAPICORSMiddleware
-from fastapi.responses import JSONResponse
-from collections import defaultdict
+from fastapi.responses import JSONResponse, PlainTextResponse
+from collections import OrderedDict, defaultdict
 import asyncio
-from fastapi.middleware.gzip import GZipMiddleware
 
+from .cache import CachedResponse, ResponseCache, etag_matches
+from .compression import Codec, CompressedBodyCache, ContentTypeFilter, StreamCompressor, create_codecs, negotiate, parse_accept_encoding
+from .config import get_config, RunApiConfig
+from .errors import ErrorResponse, PayloadTooLargeError
+from .paths import PathMatcher
+from .serialization import json_response_class
+from .ratelimit import (
+    RateLimitAlgorithm,
+    RateLimitStore,
+    create_rate_limit_store,
+    get_rate_limit_algorithm,
+)
+
+if TYPE_CHECKING:
+    # .auth pulls in jose and passlib; AuthMiddleware imports it when used
+    from .auth import TokenCache
+
+
+class RunApiMiddleware:
+    """
+    Base middleware class for RunApi framework.
+
+    This is a pure ASGI middleware. Subclasses hook into the request cycle by
+    overriding ``process_request`` (return a response to short-circuit) and/or
+    ``process_response`` (mutate status-line headers before they are sent),
+    which avoids the extra task and body stream wrapping that
+    ``BaseHTTPMiddleware`` adds on every request and keeps streaming
+    backpressure intact.
+
+    Subclasses that override ``dispatch(request, call_next)`` keep working:
+    they are transparently run through ``BaseHTTPMiddleware``.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        cls = type(self)
+        self._dispatch_app: Optional[ASGIApp] = None
+        if cls.dispatch is not RunApiMiddleware.dispatch:
+            self._dispatch_app = BaseHTTPMiddleware(app, dispatch=self.dispatch)
+        self._has_request_hook = cls.process_request is not RunApiMiddleware.process_request
+        self._has_response_hook = cls.process_response is not RunApiMiddleware.process_response
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._dispatch_app is not None:
+            await self._dispatch_app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+
+        if self._has_request_hook:
+            response = await self.process_request(request)
+            if response is not None:
+                await response(scope, receive, send)
+                return
+
+        if not self._has_response_hook:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                self.process_response(request, message["status"], headers)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def process_request(self, request: Request) -> Optional[Response]:
+        """Run before the downstream app. Return a response to short-circuit."""
+        return None
+
+    def process_response(self, request: Request, status_code: int, headers: MutableHeaders) -> None:
+        """Run when the response starts. Mutate ``headers`` in place."""
+        return None
 
-class RunApiMiddleware(BaseHTTPMiddleware):
-    """Base middleware class for RunApi framework."""
-    
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Override this method in subclasses."""
+        """Override this method in subclasses (``BaseHTTPMiddleware`` style)."""
         return await call_next(request)
 
 
@@ -26,45 +102,67 @@ class RequestLoggingMiddleware(RunApiMiddleware):
         super().__init__(app)
         self.logger = logger or logging.getLogger(__name__)
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+    async def process_request(self, request: Request) -> Optional[Response]:
+        request.state.runapi_start_time = time.time()
         
         # Log request
         self.logger.info(f"Request: {request.method} {request.url}")
-        
-        response = await call_next(request)
-        
+        return None
+    
+    def process_response(self, request: Request, status_code: int, headers: MutableHeaders) -> None:
         # Calculate processing time
-        process_time = time.time() - start_time
+        process_time = time.time() - request.state.runapi_start_time
         
         # Log response
         self.logger.info(
-            f"Response: {response.status_code} - "
+            f"Response: {status_code} - "
             f"Time: {process_time:.4f}s - "
-            f"Size: {response.headers.get('content-length', 'unknown')}"
+            f"Size: {headers.get('content-length', 'unknown')}"
         )
         
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+        headers["X-Process-Time"] = str(process_time)
 
 
 class RateLimitMiddleware(RunApiMiddleware):
-    """Rate limiting middleware using Fixed Window Counter (O(1))."""
+    """
+    Rate limiting middleware with pluggable O(1) algorithms.
+    
+    ``algorithm`` is one of "fixed_window" (default), "sliding_window",
+    "token_bucket" or "gcra", or a ``RateLimitAlgorithm`` instance.
+    ``backend="shared_memory"`` enforces one limit across all worker
+    processes on the host instead of one limit per process, and
+    ``backend="redis"`` one limit across hosts.
+    """
     
     def __init__(
         self, 
         app,
         calls: int = 100,
         period: int = 60,  # seconds
-        key_func: Optional[Callable[[Request], str]] = None
+        key_func: Optional[Callable[[Request], str]] = None,
+        max_keys: int = 100000,
+        shards: int = 16,
+        algorithm: Union[str, RateLimitAlgorithm] = "fixed_window",
+        backend: str = "memory",
+        shared_path: Optional[str] = None,
+        redis_url: Optional[str] = None
     ):
         super().__init__(app)
         self.calls = calls
         self.period = period
         self.key_func = key_func or self._default_key_func
-        # Store: {key: [count, start_time]}
-        self.requests: Dict[str, List[float]] = {}
-        self.lock = asyncio.Lock()
+        self.algorithm = get_rate_limit_algorithm(algorithm, calls, period)
+        if backend == "memory":
+            self.requests = RateLimitStore(self.algorithm, max_keys=max_keys, shards=shards)
+        else:
+            self.requests = create_rate_limit_store(
+                backend,
+                self.algorithm,
+                max_keys=max_keys,
+                shared_path=shared_path,
+                redis_url=redis_url
+            )
+        self._async_store = asyncio.iscoroutinefunction(self.requests.hit)
     
     def _default_key_func(self, request: Request) -> str:
         """Default key function using client IP."""
@@ -73,48 +171,41 @@ class RateLimitMiddleware(RunApiMiddleware):
             return forwarded.split(",")[0].strip()
         return request.client.host if request.client else "unknown"
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        key = self.key_func(request)
+    async def hit(self, key: str, current_time: Optional[float] = None) -> Tuple[bool, int, float]:
+        """Record a request for ``key``. Returns (allowed, remaining, reset_time)."""
+        if current_time is None:
+            current_time = time.time()
+        if self._async_store:
+            return await self.requests.hit(key, current_time)
+        return self.requests.hit(key, current_time)
+    
+    def _limited_response(self, reset_time: float, current_time: float) -> Response:
+        """Build the 429 response for a rejected request."""
+        return JSONResponse(
+            status_code=429,
+            content={
+                "error": "Rate limit exceeded",
+                "message": f"Maximum {self.calls} requests per {self.period} seconds"
+            },
+            headers={"Retry-After": str(int(reset_time - current_time))}
+        )
+    
+    async def process_request(self, request: Request) -> Optional[Response]:
         current_time = time.time()
+        allowed, remaining, reset_time = await self.hit(self.key_func(request), current_time)
+        if not allowed:
+            return self._limited_response(reset_time, current_time)
         
-        async with self.lock:
-            # Get current window state
-            if key not in self.requests:
-                self.requests[key] = [1, current_time]
-                remaining = self.calls - 1
-                reset_time = current_time + self.period
-            else:
-                count, start_time = self.requests[key]
-                
-                if current_time > start_time + self.period:
-                    # New window
-                    self.requests[key] = [1, current_time]
-                    remaining = self.calls - 1
-                    reset_time = current_time + self.period
-                else:
-                    # Current window
-                    if count >= self.calls:
-                        return JSONResponse(
-                            status_code=429,
-                            content={
-                                "error": "Rate limit exceeded",
-                                "message": f"Maximum {self.calls} requests per {self.period} seconds"
-                            },
-                            headers={"Retry-After": str(int(start_time + self.period - current_time))}
-                        )
-                    
-                    self.requests[key][0] += 1
-                    remaining = self.calls - self.requests[key][0]
-                    reset_time = start_time + self.period
-        
-        response = await call_next(request)
+        request.state.runapi_rate_limit = (remaining, reset_time)
+        return None
+    
+    def process_response(self, request: Request, status_code: int, headers: MutableHeaders) -> None:
+        remaining, reset_time = request.state.runapi_rate_limit
         
         # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(self.calls)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(reset_time))
-        
-        return response
+        headers["X-RateLimit-Limit"] = str(self.calls)
+        headers["X-RateLimit-Remaining"] = str(remaining)
+        headers["X-RateLimit-Reset"] = str(int(reset_time))
 
 
 class AuthMiddleware(RunApiMiddleware):
@@ -128,7 +219,9 @@ class AuthMiddleware(RunApiMiddleware):
         protected_paths: Optional[List[str]] = None,
         excluded_paths: Optional[List[str]] = None,
         header_name: str = "Authorization",
-        token_prefix: str = "Bearer "
+        token_prefix: str = "Bearer ",
+        token_cache: Optional["TokenCache"] = None,
+        decision_cache_size: int = 10000
     ):
         super().__init__(app)
         self.secret_key = secret_key
@@ -137,18 +230,38 @@ class AuthMiddleware(RunApiMiddleware):
         self.excluded_paths = excluded_paths or ["/docs", "/redoc", "/openapi.json"]
         self.header_name = header_name
         self.token_prefix = token_prefix
+        if token_cache is None:
+            from .auth import create_token_cache
+            token_cache = create_token_cache()
+        self.token_cache = token_cache
+        
+        # Protected paths match by prefix, excluded paths match exactly;
+        # both accept *, **, ? and {param} patterns
+        self._protected = PathMatcher(self.protected_paths, prefix=True)
+        self._excluded = PathMatcher(self.excluded_paths, prefix=False)
+        self._decisions: "OrderedDict[str, bool]" = OrderedDict()
+        self.decision_cache_size = decision_cache_size
     
     def _is_protected_path(self, path: str) -> bool:
         """Check if path requires authentication."""
-        # If no protected paths specified, protect all except excluded
-        if not self.protected_paths:
-            return path not in self.excluded_paths
+        decisions = self._decisions
+        decision = decisions.get(path)
+        if decision is not None:
+            decisions.move_to_end(path)
+            return decision
+        
+        if self._excluded.matches(path):
+            decision = False
+        elif not self.protected_paths:
+            # If no protected paths specified, protect all except excluded
+            decision = True
+        else:
+            decision = self._protected.matches(path)
         
-        # Check if path matches any protected pattern
-        for pattern in self.protected_paths:
-            if path.startswith(pattern):
-                return True
-        return False
+        decisions[path] = decision
+        if len(decisions) > self.decision_cache_size:
+            decisions.popitem(last=False)
+        return decision
     
     def _extract_token(self, request: Request) -> Optional[str]:
         """Extract JWT token from request headers."""
@@ -160,6 +273,13 @@ class AuthMiddleware(RunApiMiddleware):
     
     def _verify_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify JWT token and return payload."""
+        cache = self.token_cache
+        if cache is not None:
+            cache.bind(self.secret_key, self.algorithm)
+            cached_payload = cache.get(token)
+            if cached_payload is not None:
+                return cached_payload
+        
         try:
             # Note: In real implementation, you'd use python-jose or similar
             # This is a simplified version
@@ -194,17 +314,19 @@ class AuthMiddleware(RunApiMiddleware):
             if 'exp' in payload_data and payload_data['exp'] < time.time():
                 return None
             
+            if cache is not None:
+                cache.set(token, payload_data)
             return payload_data
             
         except Exception:
             return None
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def process_request(self, request: Request) -> Optional[Response]:
         path = request.url.path
         
         # Skip authentication for excluded paths
         if not self._is_protected_path(path):
-            return await call_next(request)
+            return None
         
         # Extract and verify token
         token = self._extract_token(request)
@@ -223,8 +345,7 @@ class AuthMiddleware(RunApiMiddleware):
         
         # Add user info to request state
         request.state.user = payload
-        
-        return await call_next(request)
+        return None
 
 
 class SecurityHeadersMiddleware(RunApiMiddleware):
@@ -242,41 +363,415 @@ class SecurityHeadersMiddleware(RunApiMiddleware):
         self.csp_policy = csp_policy
         self.hsts_max_age = hsts_max_age
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
-        
+    def process_response(self, request: Request, status_code: int, headers: MutableHeaders) -> None:
         # Remove server header if requested
         if not self.include_server:
-            if "Server" in response.headers:
-                del response.headers["Server"]
+            if "Server" in headers:
+                del headers["Server"]
         
         # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers["X-Content-Type-Options"] = "nosniff"
+        headers["X-Frame-Options"] = "DENY"
+        headers["X-XSS-Protection"] = "1; mode=block"
+        headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
         
         # Add HSTS header for HTTPS
-        if request.url.scheme == "https":
-            response.headers["Strict-Transport-Security"] = f"max-age={self.hsts_max_age}; includeSubDomains"
+        if request.scope.get("scheme") == "https":
+            headers["Strict-Transport-Security"] = f"max-age={self.hsts_max_age}; includeSubDomains"
         
         # Add CSP header if policy is defined
         if self.csp_policy:
-            response.headers["Content-Security-Policy"] = self.csp_policy
+            headers["Content-Security-Policy"] = self.csp_policy
+
+
+class CompressionMiddleware:
+    """
+    Streaming response compression with ``Accept-Encoding`` negotiation.
+    
+    Chooses brotli, zstd or gzip (in ``encodings`` order, among the codecs
+    installed) and compresses bodies of at least ``minimum_size`` bytes whose
+    media type matches ``content_types`` and not ``exclude_content_types``.
+    Responses that are already encoded, partial or bodiless pass through.
+    Complete bodies are compressed in one call and memoized per worker in a
+    ``CompressedBodyCache`` of ``cache_size`` bytes, so identical payloads
+    are compressed once; streamed bodies are flushed chunk by chunk. Bodies
+    over ``thread_minimum_size`` are compressed on a worker thread.
+    Unset arguments come from ``RunApiConfig``; ``compresslevel`` is the
+    gzip level.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        compresslevel: Optional[int] = None,
+        encodings: Optional[List[str]] = None,
+        levels: Optional[Dict[str, int]] = None,
+        content_types: Optional[List[str]] = None,
+        exclude_content_types: Optional[List[str]] = None,
+        cache_size: Optional[int] = None,
+        thread_minimum_size: int = 128 * 1024,
+        config: Optional[RunApiConfig] = None,
+    ):
+        self.app = app
+        config = config or get_config()
+        self.minimum_size = config.compression_min_size if minimum_size is None else minimum_size
+        codec_levels = {
+            "br": config.compression_brotli_level,
+            "zstd": config.compression_zstd_level,
+            "gzip": config.compression_gzip_level if compresslevel is None else compresslevel,
+        }
+        codec_levels.update(levels or {})
+        self.codecs: List[Codec] = create_codecs(
+            config.compression_encodings if encodings is None else encodings, codec_levels
+        )
+        self.types = ContentTypeFilter(
+            config.compression_types if content_types is None else content_types,
+            config.compression_exclude_types if exclude_content_types is None else exclude_content_types,
+        )
+        cache_size = config.compression_cache_size if cache_size is None else cache_size
+        self.cache: Optional[CompressedBodyCache] = CompressedBodyCache(cache_size) if cache_size > 0 else None
+        self.thread_minimum_size = thread_minimum_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.codecs:
+            await self.app(scope, receive, send)
+            return
         
-        return response
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        codec = negotiate(accept_encoding, self.codecs) if accept_encoding else None
+        responder = _CompressionResponder(self, codec, send)
+        await self.app(scope, receive, responder.send)
+    
+    def _compress_body(self, codec: Codec, body: bytes) -> bytes:
+        if self.cache is not None:
+            return self.cache.compress(codec, body)
+        return codec.compress(body)
+    
+    async def compress_body(self, codec: Codec, body: bytes) -> bytes:
+        """Compress a complete body, off the event loop when it is large."""
+        if len(body) >= self.thread_minimum_size:
+            return await asyncio.get_running_loop().run_in_executor(None, self._compress_body, codec, body)
+        return self._compress_body(codec, body)
+    
+    async def compress_chunk(self, stream: StreamCompressor, chunk: bytes, final: bool) -> bytes:
+        if len(chunk) >= self.thread_minimum_size:
+            return await asyncio.get_running_loop().run_in_executor(None, stream.compress, chunk, final)
+        return stream.compress(chunk, final)
 
 
-class CompressionMiddleware(GZipMiddleware):
+class _CompressionResponder:
+    """Per-response state of ``CompressionMiddleware``; ``codec`` is None for identity."""
+    
+    __slots__ = ("middleware", "codec", "downstream", "start", "stream", "passthrough")
+    
+    def __init__(self, middleware: CompressionMiddleware, codec: Optional[Codec], send: Send):
+        self.middleware = middleware
+        self.codec = codec
+        self.downstream = send
+        self.start: Optional[Message] = None
+        self.stream: Optional[StreamCompressor] = None
+        self.passthrough = False
+    
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if (
+                message["status"] in (204, 206, 304)
+                or "content-encoding" in headers
+                or not self.middleware.types.allows(headers.get("content-type", ""))
+            ):
+                self.passthrough = True
+                await self.downstream(message)
+            else:
+                # Held back until the first body chunk decides the encoding
+                self.start = message
+            return
+        
+        if self.passthrough or message_type != "http.response.body":
+            if self.start is not None:
+                # e.g. http.response.pathsend: sent as is
+                start, self.start = self.start, None
+                await self.downstream(start)
+            await self.downstream(message)
+            return
+        
+        if self.stream is not None:
+            more_body = message.get("more_body", False)
+            message["body"] = await self.middleware.compress_chunk(self.stream, message.get("body", b""), not more_body)
+            await self.downstream(message)
+            return
+        if self.start is None:
+            await self.downstream(message)
+            return
+        
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self.downstream(start)
+            await self.downstream(message)
+            return
+        
+        headers = MutableHeaders(raw=start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        codec = self.codec
+        if codec is not None:
+            if more_body:
+                self.stream = codec.stream()
+                message["body"] = await self.middleware.compress_chunk(self.stream, body, False)
+                headers["Content-Encoding"] = codec.name
+                del headers["Content-Length"]
+            else:
+                compressed = await self.middleware.compress_body(codec, body)
+                if len(compressed) < len(body):
+                    message["body"] = compressed
+                    headers["Content-Encoding"] = codec.name
+                    headers["Content-Length"] = str(len(compressed))
+        await self.downstream(start)
+        await self.downstream(message)
+
+
+class ResponseCacheMiddleware:
     """
-    Compression middleware using GZipMiddleware.
+    Cache complete GET responses in a ``ResponseCache``.
     
-    This replaces the previous custom implementation to support streaming responses
-    and better memory efficiency.
+    Hits are served from pre-serialized bytes (gzip variant included) without
+    calling the route; a matching ``If-None-Match`` gets a 304. Concurrent
+    misses for the same key run the route once. HEAD requests are answered
+    from cached GET entries.
+    
+    With ``cache_all`` every path under ``paths`` is cached (all paths when
+    empty), except requests with credentials outside the cache key;
+    otherwise only routes that registered a policy on the cache.
     """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: Optional[ResponseCache] = None,
+        paths: Optional[List[str]] = None,
+        cache_all: bool = True,
+        config: Optional[RunApiConfig] = None,
+        **cache_kwargs
+    ):
+        self.app = app
+        config = config or get_config()
+        self.cache = cache or ResponseCache(config=config, **cache_kwargs)
+        self.paths = tuple(config.response_cache_paths if paths is None else paths)
+        self.cache_all = cache_all
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        
+        cache = self.cache
+        path = scope["path"]
+        policy = cache.match_policy(path) if cache.has_policies else None
+        if policy is None and not (self.cache_all and (not self.paths or path.startswith(self.paths))):
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        cache_control = headers.get("cache-control", "")
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            await self.app(scope, receive, send)
+            return
+        # Responses for a logged-in user are only shared when a route opts in
+        if policy is None and cache.is_personal(headers):
+            await self.app(scope, receive, send)
+            return
+        
+        vary = ttl = None
+        if policy is not None:
+            vary, ttl = policy.vary, policy.ttl
+        key = cache.make_key("GET", path, scope["query_string"], headers, vary)
+        entry = await cache.get(key)
+        if entry is not None:
+            cache.hits += 1
+            await self._send_entry(entry, headers, send, scope["method"] == "HEAD", b"HIT")
+            return
+        
+        cache.misses += 1
+        if scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        
+        leader, entry = await cache.coalesce(key, lambda: self._capture(scope, receive, send, vary), ttl)
+        if entry is not None:
+            await self._send_entry(entry, headers, send, False, b"MISS" if leader else b"HIT")
+        elif not leader:
+            # The leader's response was not cacheable; compute our own
+            await self.app(scope, receive, send)
+    
+    async def _capture(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        vary: Optional[Tuple[str, ...]] = None
+    ) -> Optional[CachedResponse]:
+        """
+        Run the route and buffer its response. Returns the entry to store, or
+        ``None`` after streaming an uncacheable response straight through.
+        """
+        cache = self.cache
+        # The entry stores the identity body and answers validators itself
+        downstream = dict(scope)
+        downstream["headers"] = [
+            item for item in scope["headers"]
+            if item[0] not in (b"accept-encoding", b"if-none-match", b"if-modified-since")
+        ]
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        passthrough = False
+        
+        async def flush(message: Message) -> None:
+            nonlocal passthrough
+            passthrough = True
+            if start is not None:
+                await send(start)
+            if chunks:
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                chunks.clear()
+            await send(message)
+        
+        async def capture_send(message: Message) -> None:
+            nonlocal start, size
+            if passthrough:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                if cache.is_cacheable(message["status"], Headers(raw=message["headers"])):
+                    start = message
+                else:
+                    await flush(message)
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                size += len(body)
+                if size > cache.max_entry_size:
+                    await flush(message)
+                else:
+                    chunks.append(body)
+            else:
+                await flush(message)
+        
+        await self.app(downstream, receive, capture_send)
+        if passthrough or start is None:
+            return None
+        return cache.build_entry(start["status"], start["headers"], b"".join(chunks), vary)
+    
+    async def _send_entry(self, entry: CachedResponse, request_headers: Headers, send: Send, head: bool, state: bytes) -> None:
+        use_gzip = False
+        if entry.gzip_body is not None:
+            accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+            use_gzip = accepted.get("gzip", accepted.get("*", 0.0)) > 0
+        headers = list(entry.headers)
+        headers.append((b"etag", entry.gzip_etag if use_gzip else entry.etag))
+        headers.append((b"x-cache", state))
+        
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, entry.etag, entry.gzip_etag):
+            headers = [item for item in headers if item[0] != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        
+        body = entry.gzip_body if use_gzip else entry.body
+        if use_gzip:
+            headers.append((b"content-encoding", b"gzip"))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+class _BodyTooLarge(Exception):
     pass
 
 
+class UploadLimitMiddleware:
+    """
+    Enforce ``MAX_UPLOAD_SIZE`` on request bodies before they are buffered.
+    
+    A request whose ``Content-Length`` is over the limit is answered with a
+    413 without reading its body. A chunked body is counted as the app reads
+    it; the read that crosses the limit fails and the app's response is
+    replaced with the 413, so a multipart form is never spooled past the
+    limit. ``max_size`` of 0 disables the check.
+    """
+    
+    def __init__(self, app: ASGIApp, max_size: Optional[int] = None, config: Optional[RunApiConfig] = None):
+        self.app = app
+        config = config or get_config()
+        self.max_size = config.max_upload_size if max_size is None else max_size
+        self.response_class = json_response_class(config.json_engine)
+    
+    def _too_large_response(self) -> Response:
+        error = PayloadTooLargeError(details={"max_size": self.max_size})
+        response = ErrorResponse(error.message, error.status_code, error.error_code, error.details).to_json_response(
+            response_class=self.response_class
+        )
+        # The rest of the body is never read
+        response.headers["Connection"] = "close"
+        return response
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.max_size:
+            await self.app(scope, receive, send)
+            return
+        
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    too_large = int(value) > self.max_size
+                except ValueError:
+                    too_large = False
+                if too_large:
+                    await self._too_large_response()(scope, receive, send)
+                    return
+                break
+        
+        max_size = self.max_size
+        received = 0
+        exceeded = False
+        response_started = False
+        
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+        
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded:
+                # The app turned the failed read into its own error response
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            pass
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._too_large_response()(scope, receive, send)
+
+
 class CORSMiddleware:
     """CORS middleware wrapper for FastAPI's CORS middleware."""
     
@@ -308,6 +803,313 @@ class CORSMiddleware:
         )
 
 
+class StageTimings:
+    """Cumulative per-stage timings collected by ``FusedMiddleware``."""
+    
+    def __init__(self):
+        self.requests = 0
+        self.totals: Dict[str, int] = defaultdict(int)  # nanoseconds
+    
+    def add(self, stage: str, elapsed_ns: int) -> None:
+        """Add elapsed nanoseconds to a stage."""
+        self.totals[stage] += elapsed_ns
+    
+    def reset(self) -> None:
+        """Clear all collected timings."""
+        self.requests = 0
+        self.totals.clear()
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Return {stage: {"total_ms", "avg_us"}} for every recorded stage."""
+        requests = self.requests or 1
+        return {
+            stage: {
+                "total_ms": total / 1e6,
+                "avg_us": total / 1e3 / requests,
+            }
+            for stage, total in self.totals.items()
+        }
+
+
+class _CORSPolicy:
+    """Precompiled CORS policy used by ``FusedMiddleware``."""
+    
+    ALL_METHODS = ("DELETE", "GET", "HEAD", "OPTIONS", "PATCH", "POST", "PUT")
+    SAFELISTED_HEADERS = {"accept", "accept-language", "content-language", "content-type"}
+    
+    def __init__(
+        self,
+        allow_origins: List[str],
+        allow_credentials: bool = False,
+        allow_methods: List[str] = None,
+        allow_headers: List[str] = None,
+        expose_headers: List[str] = None,
+        max_age: int = 600
+    ):
+        allow_methods = allow_methods or ["*"]
+        allow_headers = allow_headers or []
+        
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = frozenset(allow_origins)
+        self.allow_all_headers = "*" in allow_headers
+        self.allow_methods = self.ALL_METHODS if "*" in allow_methods else tuple(m.upper() for m in allow_methods)
+        self.allow_headers = frozenset(
+            self.SAFELISTED_HEADERS | {h.lower() for h in allow_headers if h != "*"}
+        )
+        # Echo the origin whenever "*" would be rejected or is not configured
+        self.explicit_origin = not self.allow_all_origins or allow_credentials
+        
+        self.simple_headers: List[Tuple[bytes, bytes]] = []
+        if allow_credentials:
+            self.simple_headers.append((b"access-control-allow-credentials", b"true"))
+        if expose_headers:
+            self.simple_headers.append((b"access-control-expose-headers", ", ".join(expose_headers).encode("latin-1")))
+        
+        self.preflight_headers: List[Tuple[bytes, bytes]] = [
+            (b"access-control-allow-methods", ", ".join(self.allow_methods).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+        ]
+        if not self.allow_all_headers:
+            self.preflight_headers.append(
+                (b"access-control-allow-headers", ", ".join(sorted(self.allow_headers)).encode("latin-1"))
+            )
+        if allow_credentials:
+            self.preflight_headers.append((b"access-control-allow-credentials", b"true"))
+    
+    def is_allowed_origin(self, origin: str) -> bool:
+        return self.allow_all_origins or origin in self.allow_origins
+    
+    def origin_headers(self, origin: str) -> List[Tuple[bytes, bytes]]:
+        """Headers that grant ``origin`` access to the response."""
+        if self.explicit_origin:
+            return [(b"access-control-allow-origin", origin.encode("latin-1")), (b"vary", b"Origin")]
+        return [(b"access-control-allow-origin", b"*")]
+    
+    def simple_response_headers(self, origin: str) -> List[Tuple[bytes, bytes]]:
+        """Headers added to a non-preflight response for ``origin``."""
+        if not self.is_allowed_origin(origin):
+            return []
+        return self.origin_headers(origin) + self.simple_headers
+    
+    def preflight_response(self, headers: Headers) -> Response:
+        """Build the response to a CORS preflight request."""
+        origin = headers["origin"]
+        requested_method = headers["access-control-request-method"]
+        requested_headers = headers.get("access-control-request-headers")
+        
+        failures = []
+        if not self.is_allowed_origin(origin):
+            failures.append("origin")
+        if requested_method not in self.allow_methods:
+            failures.append("method")
+        
+        raw_headers = list(self.preflight_headers)
+        if self.allow_all_headers and requested_headers:
+            raw_headers.append((b"access-control-allow-headers", requested_headers.encode("latin-1")))
+        elif requested_headers:
+            for header in requested_headers.lower().split(","):
+                if header.strip() not in self.allow_headers:
+                    failures.append("headers")
+                    break
+        
+        if failures:
+            response = PlainTextResponse("Disallowed CORS " + ", ".join(failures), status_code=400)
+        else:
+            response = PlainTextResponse("OK", status_code=200)
+            raw_headers.extend(self.origin_headers(origin))
+        response.raw_headers.extend(raw_headers)
+        return response
+
+
+class FusedMiddleware:
+    """
+    Single-pass replacement for the default middleware stack.
+    
+    Compiles the configuration-enabled behaviors (CORS, rate limiting,
+    security headers, request logging, the upload size limit and
+    compression) into one ASGI middleware. All headers are precomputed as
+    encoded byte tuples and injected in a single pass over the
+    response-start message. Pass a ``StageTimings`` instance to collect a
+    per-stage cost breakdown.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        config: RunApiConfig,
+        logger: Optional[logging.Logger] = None,
+        timings: Optional[StageTimings] = None,
+        include_server: bool = False,
+        csp_policy: Optional[str] = None,
+        hsts_max_age: int = 31536000
+    ):
+        self.app = app
+        self.logger = logger or logging.getLogger(__name__)
+        self.timings = timings
+        self.log_requests = config.debug
+        
+        # The upload limit, then compression, wrap the application directly
+        inner = self._timed_app if timings is not None else app
+        if config.max_upload_size:
+            inner = UploadLimitMiddleware(inner, config=config)
+        self.downstream = CompressionMiddleware(inner, config=config) if config.compression_enabled else inner
+        
+        self.rate_limiter: Optional[RateLimitMiddleware] = None
+        if config.rate_limit_enabled:
+            self.rate_limiter = RateLimitMiddleware(
+                app,
+                calls=config.rate_limit_calls,
+                period=config.rate_limit_period,
+                max_keys=config.rate_limit_max_keys,
+                algorithm=config.rate_limit_algorithm,
+                backend=config.rate_limit_backend,
+                shared_path=config.rate_limit_shared_path,
+                redis_url=config.redis_url
+            )
+            self.rate_limit_header = (b"x-ratelimit-limit", str(config.rate_limit_calls).encode("latin-1"))
+        
+        self.cors: Optional[_CORSPolicy] = None
+        if config.cors_origins:
+            self.cors = _CORSPolicy(
+                allow_origins=config.cors_origins,
+                allow_credentials=config.cors_credentials,
+                allow_methods=config.cors_methods,
+                allow_headers=config.cors_headers
+            )
+        
+        self.security_headers: List[Tuple[bytes, bytes]] = [
+            (b"x-content-type-options", b"nosniff"),
+            (b"x-frame-options", b"DENY"),
+            (b"x-xss-protection", b"1; mode=block"),
+            (b"referrer-policy", b"strict-origin-when-cross-origin"),
+        ]
+        if csp_policy:
+            self.security_headers.append((b"content-security-policy", csp_policy.encode("latin-1")))
+        self.hsts_header = (
+            b"strict-transport-security",
+            f"max-age={hsts_max_age}; includeSubDomains".encode("latin-1"),
+        )
+        
+        # Headers we set are overwritten rather than duplicated
+        replaced = {name for name, _ in self.security_headers}
+        replaced.update({
+            b"strict-transport-security",
+            b"x-ratelimit-limit",
+            b"x-ratelimit-remaining",
+            b"x-ratelimit-reset",
+            b"x-process-time",
+            b"access-control-allow-origin",
+            b"access-control-allow-credentials",
+            b"access-control-expose-headers",
+        })
+        if not include_server:
+            replaced.add(b"server")
+        self.replaced_headers = frozenset(replaced)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timings = self.timings
+        clock = time.perf_counter_ns
+        started = clock()
+        request = Request(scope, receive)
+        extra = list(self.security_headers)
+        if scope.get("scheme") == "https":
+            extra.append(self.hsts_header)
+        response: Optional[Response] = None
+        
+        # Rate limiting
+        if self.rate_limiter is not None:
+            mark = clock()
+            current_time = time.time()
+            allowed, remaining, reset_time = await self.rate_limiter.hit(
+                self.rate_limiter.key_func(request), current_time
+            )
+            if allowed:
+                extra.append(self.rate_limit_header)
+                extra.append((b"x-ratelimit-remaining", str(remaining).encode("latin-1")))
+                extra.append((b"x-ratelimit-reset", str(int(reset_time)).encode("latin-1")))
+            else:
+                response = self.rate_limiter._limited_response(reset_time, current_time)
+            if timings is not None:
+                timings.add("rate_limit", clock() - mark)
+        
+        # CORS
+        if response is None and self.cors is not None:
+            mark = clock()
+            origin = request.headers.get("origin")
+            if origin:
+                if scope["method"] == "OPTIONS" and "access-control-request-method" in request.headers:
+                    response = self.cors.preflight_response(request.headers)
+                else:
+                    extra.extend(self.cors.simple_response_headers(origin))
+            if timings is not None:
+                timings.add("cors", clock() - mark)
+        
+        if self.log_requests:
+            mark = clock()
+            self.logger.info(f"Request: {request.method} {request.url}")
+            if timings is not None:
+                timings.add("logging", clock() - mark)
+        
+        # Only application responses can carry headers we overwrite
+        replaced = self.replaced_headers if response is None else frozenset()
+        # [time in send_wrapper, time in compression's send hook, time in outer send]
+        spent = scope["runapi.timing"] = [0, 0, 0] if timings is not None else None
+        
+        async def send_wrapper(message: Message) -> None:
+            entered = clock()
+            if message["type"] == "http.response.start":
+                headers = [item for item in message["headers"] if item[0].lower() not in replaced]
+                headers.extend(extra)
+                if self.log_requests:
+                    process_time = (entered - started) / 1e9
+                    headers.append((b"x-process-time", str(process_time).encode("latin-1")))
+                    self.logger.info(
+                        f"Response: {message['status']} - "
+                        f"Time: {process_time:.4f}s"
+                    )
+                message["headers"] = headers
+                if timings is not None:
+                    timings.add("headers", clock() - entered)
+            if timings is not None:
+                mark = clock()
+                await send(message)
+                done = clock()
+                spent[0] += done - entered
+                spent[2] += done - mark
+            else:
+                await send(message)
+        
+        if response is not None:
+            await response(scope, receive, send_wrapper)
+        else:
+            await self.downstream(scope, receive, send_wrapper)
+        
+        if timings is not None:
+            timings.requests += 1
+            if response is None:
+                timings.add("compression", max(spent[1] - spent[0], 0))
+            timings.add("total", clock() - started - spent[2])
+    
+    async def _timed_app(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the application, measuring app time and time spent in ``send``."""
+        clock = time.perf_counter_ns
+        
+        spent = scope["runapi.timing"]
+        
+        async def timed_send(message: Message) -> None:
+            mark = clock()
+            await send(message)
+            spent[1] += clock() - mark
+        
+        mark = clock()
+        await self.app(scope, receive, timed_send)
+        self.timings.add("app", clock() - mark - spent[1])
+
+
 # Convenience functions
 def create_rate_limit_middleware(app, calls: int = 100, period: int = 60):
     """Create rate limiting middleware."""
@@ -0,0 +1,91 @@
+"""
+Compiled path pattern matching for RunApi framework
+"""
+import re
+from typing import Dict, Iterable, List, Pattern
+
+# Wildcards in a path pattern: ``**`` (any characters, across segments),
+# ``*`` (within one segment), ``?`` (one character) and ``{param}`` (one
+# non-empty segment)
+_WILDCARD = re.compile(r"\*\*|\*|\?|\{[^}/]*\}")
+
+
+def is_literal_pattern(pattern: str) -> bool:
+    """Whether ``pattern`` contains no wildcards or ``{param}`` placeholders."""
+    return _WILDCARD.search(pattern) is None
+
+
+def pattern_to_regex(pattern: str) -> str:
+    """Translate a glob/``{param}`` path pattern into an (unanchored) regex."""
+    parts = []
+    position = 0
+    for match in _WILDCARD.finditer(pattern):
+        parts.append(re.escape(pattern[position:match.start()]))
+        token = match.group()
+        if token == "**":
+            parts.append(".*")
+        elif token == "*":
+            parts.append("[^/]*")
+        elif token == "?":
+            parts.append("[^/]")
+        else:
+            parts.append("[^/]+")
+        position = match.end()
+    parts.append(re.escape(pattern[position:]))
+    return "".join(parts)
+
+
+def _trie_to_regex(node: Dict[str, dict], prefix: bool) -> str:
+    """Emit a regex for a character trie, factoring out shared prefixes."""
+    if "" in node and (prefix or len(node) == 1):
+        # With prefix matching, anything after a complete literal matches
+        return ""
+    branches = [re.escape(char) + _trie_to_regex(child, prefix) for char, child in sorted(node.items()) if char]
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    regex = "(?:" + "|".join(branches) + ")"
+    return regex + "?" if "" in node else regex
+
+
+class PathMatcher:
+    """
+    Match a path against many patterns with one precompiled regex.
+
+    Literal patterns are merged into a character trie and emitted as a
+    single prefix-factored regex, so matching costs O(path length) in the
+    regex engine rather than one ``startswith`` per pattern. Patterns may use
+    ``*``, ``**``, ``?`` and ``{param}``. With ``prefix=True`` a pattern
+    matches any path that starts with it (like ``str.startswith``);
+    otherwise the whole path must match.
+    """
+
+    def __init__(self, patterns: Iterable[str], prefix: bool = True):
+        self.patterns: List[str] = list(patterns)
+        self.prefix = prefix
+
+        trie: Dict[str, dict] = {}
+        wildcards = []
+        for pattern in self.patterns:
+            if is_literal_pattern(pattern):
+                node = trie
+                for char in pattern:
+                    node = node.setdefault(char, {})
+                node[""] = {}
+            else:
+                wildcards.append(pattern_to_regex(pattern))
+
+        branches = []
+        if trie:
+            branches.append(_trie_to_regex(trie, prefix))
+        branches.extend(wildcards)
+
+        self._regex: Pattern = re.compile("(?:" + "|".join(branches) + ")" if branches else r"(?!)", re.DOTALL)
+        self._match = self._regex.match if prefix else self._regex.fullmatch
+
+    def matches(self, path: str) -> bool:
+        return self._match(path) is not None
+
+    __contains__ = matches
+
+    def __len__(self) -> int:
+        return len(self.patterns)
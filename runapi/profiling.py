@@ -0,0 +1,272 @@
+"""
+Startup profiling for RunApi framework
+"""
+import importlib.abc
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Span:
+    """One timed region: a startup phase, a route file or a module import."""
+
+    __slots__ = ("name", "category", "thread", "depth", "start", "end", "child_time", "allocated", "peak")
+
+    def __init__(self, name: str, category: str, thread: str, depth: int, start: float):
+        self.name = name
+        self.category = category
+        self.thread = thread
+        self.depth = depth
+        self.start = start
+        self.end = start
+        self.child_time = 0.0
+        # Net bytes still allocated at the end of the span, and the peak
+        # traced memory while it ran (None without allocation tracing)
+        self.allocated: Optional[int] = None
+        self.peak: Optional[int] = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def self_time(self) -> float:
+        return self.duration - self.child_time
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "thread": self.thread,
+            "depth": self.depth,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3),
+            "self_ms": round(self.self_time * 1000, 3),
+            "allocated_bytes": self.allocated,
+            "peak_bytes": self.peak,
+        }
+
+
+class _TimedLoader:
+    """Loader proxy that times ``exec_module`` and then steps aside."""
+
+    def __init__(self, loader: Any, profiler: "StartupProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._loader, attribute)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Restore the real loader before the module code can look at it
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        with self._profiler.span(self._name, "import"):
+            self._loader.exec_module(module)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path finder attributing import time to modules, like ``-X importtime``."""
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self.profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "busy", False):
+            return None
+        self._local.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.busy = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler, fullname)
+        return spec
+
+
+class StartupProfiler:
+    """
+    Records wall time and allocations for startup phases, route files and
+    the module imports they trigger.
+
+    Spans nest per thread; a span's self time excludes its children, so the
+    import breakdown reads like ``python -X importtime``. Allocation figures
+    come from ``tracemalloc`` (which slows startup while profiling) and are
+    process-wide, so spans on concurrent import threads see each other's
+    allocations. Only modules imported for the first time are attributed.
+    """
+
+    def __init__(self, trace_allocations: bool = True, trace_imports: bool = True):
+        self.trace_allocations = trace_allocations
+        self.trace_imports = trace_imports
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._import_timer: Optional[_ImportTimer] = None
+        self._started_tracemalloc = False
+        self.running = False
+
+    def start(self) -> "StartupProfiler":
+        """Start recording; a no-op if already running."""
+        if self.running:
+            return self
+        self.running = True
+        self.origin = time.perf_counter()
+        self.finished = None
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.trace_imports and self._import_timer is None:
+            self._import_timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._import_timer)
+        return self
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self._import_timer is not None:
+            try:
+                sys.meta_path.remove(self._import_timer)
+            except ValueError:
+                pass
+            self._import_timer = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.finished = time.perf_counter()
+
+    def __enter__(self) -> "StartupProfiler":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextmanager
+    def span(self, name: str, category: str = "phase") -> Iterator[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        tracing = tracemalloc.is_tracing() and self.trace_allocations
+        if tracing:
+            allocated_before = tracemalloc.get_traced_memory()[0]
+            # Peak is process-wide; reset it only for top-level spans
+            if not stack:
+                tracemalloc.reset_peak()
+        span = Span(name, category, threading.current_thread().name, len(stack), time.perf_counter())
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+            if stack:
+                stack[-1].child_time += span.duration
+            if tracing and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                span.allocated = current - allocated_before
+                span.peak = peak
+            with self._lock:
+                self.spans.append(span)
+
+    def total(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.origin
+
+    def top(self, category: Optional[str] = None, limit: Optional[int] = None, by: str = "duration") -> List[Span]:
+        """Spans of ``category`` sorted by ``duration`` or ``self_time``, slowest first."""
+        spans = [span for span in self.spans if category is None or span.category == category]
+        spans.sort(key=lambda span: getattr(span, by), reverse=True)
+        return spans if limit is None else spans[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.spans, key=lambda span: span.start)
+        return {
+            "total_ms": round(self.total() * 1000, 3),
+            "phases": [span.to_dict(self.origin) for span in ordered if span.category == "phase"],
+            "route_files": [span.to_dict(self.origin) for span in self.top("route")],
+            "imports": [span.to_dict(self.origin) for span in self.top("import", by="self_time")],
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def to_speedscope(self, name: str = "runapi startup") -> Dict[str, Any]:
+        """An evented speedscope profile, one per thread."""
+        frames: List[Dict[str, str]] = []
+        frame_index: Dict[str, int] = {}
+        events_by_thread: Dict[str, List[tuple]] = {}
+        for span in self.spans:
+            label = span.name if span.category == "phase" else f"{span.category} {span.name}"
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            events = events_by_thread.setdefault(span.thread, [])
+            # Sort key: time, then closes before opens, deeper closes first
+            events.append((span.start, 1, span.depth, "O", frame_index[label]))
+            events.append((span.end, 0, -span.depth, "C", frame_index[label]))
+
+        end = (self.total()) * 1000
+        profiles = []
+        for thread, events in events_by_thread.items():
+            events.sort()
+            profiles.append({
+                "type": "evented",
+                "name": f"{name} ({thread})",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(end, 3),
+                "events": [
+                    {"type": kind, "frame": frame, "at": round(max(0.0, (at - self.origin) * 1000), 3)}
+                    for at, _, _, kind, frame in events
+                ],
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "runapi",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def format_table(self, limit: int = 20) -> str:
+        """Plain-text report: phases in order, then the slowest route files and imports."""
+        lines = [f"Startup: {self.total() * 1000:.1f} ms"]
+
+        def row(span: Span, label: str) -> str:
+            memory = f"{span.allocated / 1024:10.1f} KiB" if span.allocated is not None else ""
+            return f"  {span.duration * 1000:9.2f} ms {span.self_time * 1000:9.2f} ms {memory}  {label}"
+
+        sections = [
+            ("Phases", sorted(self.top("phase"), key=lambda span: span.start)),
+            ("Route files", self.top("route", limit)),
+            ("Imports (by self time)", self.top("import", limit, by="self_time")),
+        ]
+        for title, spans in sections:
+            if not spans:
+                continue
+            lines.append(f"{title}:")
+            lines.append(f"  {'total':>12} {'self':>12} {'allocated':>14}  name")
+            lines.extend(row(span, "  " * span.depth + span.name if title == "Phases" else span.name) for span in spans)
+        return "\n".join(lines)
@@ -0,0 +1,626 @@
+"""
+Rate limiting algorithms and storage for RunApi framework
+"""
+import os
+import time
+import mmap
+import struct
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+
+from .backends import RedisClient, get_redis_client
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class RateLimitAlgorithm:
+    """
+    Base class for rate limiting algorithms.
+    
+    An algorithm owns the per-key state layout: ``create`` returns fresh
+    state for a key that has not been seen, ``hit`` records one request
+    against that state in O(1), and ``expires_at`` tells the store when the
+    state is indistinguishable from fresh state and can be dropped.
+    """
+    
+    name = ""
+    # __slots__ class holding per-key state; its slots are all numbers so
+    # state can also be packed into fixed-size shared memory records
+    state_class: Type = None
+    
+    def __init__(self, calls: int, period: float):
+        self.calls = calls
+        self.period = period
+    
+    def pack(self, state: Any) -> Tuple[float, ...]:
+        """Flatten ``state`` into a tuple of floats."""
+        return tuple(getattr(state, name) for name in self.state_class.__slots__)
+    
+    def unpack(self, values: Tuple[float, ...]) -> Any:
+        """Rebuild state from ``pack`` output."""
+        return self.state_class(*values[:len(self.state_class.__slots__)])
+    
+    def create(self, current_time: float) -> Any:
+        """Return fresh state for a new key."""
+        raise NotImplementedError
+    
+    def hit(self, state: Any, current_time: float) -> Tuple[bool, int, float]:
+        """Record a request. Returns (allowed, remaining, reset_time)."""
+        raise NotImplementedError
+    
+    def expires_at(self, state: Any) -> float:
+        """Time after which ``state`` can be discarded."""
+        raise NotImplementedError
+
+
+class _Window:
+    __slots__ = ("count", "start")
+    
+    def __init__(self, count: int, start: float):
+        self.count = count
+        self.start = start
+
+
+class FixedWindowAlgorithm(RateLimitAlgorithm):
+    """Fixed window counter. Allows bursts of up to 2x at window boundaries."""
+    
+    name = "fixed_window"
+    state_class = _Window
+    
+    def create(self, current_time: float) -> _Window:
+        return _Window(0, current_time)
+    
+    def hit(self, state: _Window, current_time: float) -> Tuple[bool, int, float]:
+        if current_time > state.start + self.period:
+            # New window
+            state.count = 0
+            state.start = current_time
+        
+        reset_time = state.start + self.period
+        if state.count >= self.calls:
+            return False, 0, reset_time
+        
+        state.count += 1
+        return True, int(self.calls - state.count), reset_time
+    
+    def expires_at(self, state: _Window) -> float:
+        return state.start + self.period
+
+
+class _SlidingWindow:
+    __slots__ = ("previous", "current", "start")
+    
+    def __init__(self, previous: int, current: int, start: float):
+        self.previous = previous
+        self.current = current
+        self.start = start
+
+
+class SlidingWindowCounterAlgorithm(RateLimitAlgorithm):
+    """
+    Sliding window counter.
+    
+    Weights the previous fixed window's count by how much of it still
+    overlaps the sliding window, which smooths out boundary bursts while
+    keeping two counters per key.
+    """
+    
+    name = "sliding_window"
+    state_class = _SlidingWindow
+    
+    def create(self, current_time: float) -> _SlidingWindow:
+        return _SlidingWindow(0, 0, current_time - current_time % self.period)
+    
+    def hit(self, state: _SlidingWindow, current_time: float) -> Tuple[bool, int, float]:
+        period = self.period
+        elapsed_windows = int((current_time - state.start) // period)
+        if elapsed_windows >= 1:
+            state.previous = state.current if elapsed_windows == 1 else 0
+            state.current = 0
+            state.start += elapsed_windows * period
+        
+        weight = 1.0 - (current_time - state.start) / period
+        estimated = state.previous * weight + state.current
+        
+        if estimated + 1 > self.calls:
+            # Earliest time the weighted previous window has decayed enough
+            reset_time = state.start + period
+            if state.previous and state.current < self.calls:
+                needed = 1.0 - (self.calls - 1 - state.current) / state.previous
+                reset_time = state.start + period * needed
+            return False, 0, reset_time
+        
+        state.current += 1
+        remaining = int(self.calls - estimated - 1)
+        return True, max(remaining, 0), state.start + period
+    
+    def expires_at(self, state: _SlidingWindow) -> float:
+        return state.start + 2 * self.period
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+    
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class TokenBucketAlgorithm(RateLimitAlgorithm):
+    """
+    Token bucket.
+    
+    The bucket holds up to ``calls`` tokens and refills at
+    ``calls / period`` tokens per second; every request takes one token.
+    """
+    
+    name = "token_bucket"
+    state_class = _Bucket
+    
+    def __init__(self, calls: int, period: float):
+        super().__init__(calls, period)
+        self.rate = calls / period
+    
+    def create(self, current_time: float) -> _Bucket:
+        return _Bucket(float(self.calls), current_time)
+    
+    def hit(self, state: _Bucket, current_time: float) -> Tuple[bool, int, float]:
+        tokens = min(self.calls, state.tokens + (current_time - state.updated) * self.rate)
+        state.updated = current_time
+        
+        if tokens < 1.0:
+            state.tokens = tokens
+            return False, 0, current_time + (1.0 - tokens) / self.rate
+        
+        state.tokens = tokens - 1.0
+        # Reset is when the bucket is full again
+        return True, int(state.tokens), current_time + (self.calls - state.tokens) / self.rate
+    
+    def expires_at(self, state: _Bucket) -> float:
+        return state.updated + (self.calls - state.tokens) / self.rate
+
+
+class _ArrivalTime:
+    __slots__ = ("tat",)
+    
+    def __init__(self, tat: float):
+        self.tat = tat
+
+
+class GCRAAlgorithm(RateLimitAlgorithm):
+    """
+    Generic Cell Rate Algorithm.
+    
+    Equivalent to a leaky bucket but tracks a single float per key: the
+    theoretical arrival time (TAT) of the next conforming request.
+    """
+    
+    name = "gcra"
+    state_class = _ArrivalTime
+    
+    def __init__(self, calls: int, period: float):
+        super().__init__(calls, period)
+        self.emission_interval = period / calls
+    
+    def create(self, current_time: float) -> _ArrivalTime:
+        return _ArrivalTime(current_time)
+    
+    def hit(self, state: _ArrivalTime, current_time: float) -> Tuple[bool, int, float]:
+        new_tat = max(state.tat, current_time) + self.emission_interval
+        allow_at = new_tat - self.period
+        
+        if current_time < allow_at:
+            return False, 0, allow_at
+        
+        state.tat = new_tat
+        remaining = int((self.period - (new_tat - current_time)) / self.emission_interval + 1e-9)
+        return True, remaining, new_tat
+    
+    def expires_at(self, state: _ArrivalTime) -> float:
+        return state.tat
+
+
+RATE_LIMIT_ALGORITHMS: Dict[str, Type[RateLimitAlgorithm]] = {
+    FixedWindowAlgorithm.name: FixedWindowAlgorithm,
+    SlidingWindowCounterAlgorithm.name: SlidingWindowCounterAlgorithm,
+    TokenBucketAlgorithm.name: TokenBucketAlgorithm,
+    GCRAAlgorithm.name: GCRAAlgorithm,
+}
+
+
+def get_rate_limit_algorithm(
+    algorithm: Union[str, RateLimitAlgorithm],
+    calls: int = 100,
+    period: float = 60
+) -> RateLimitAlgorithm:
+    """Resolve an algorithm name (or instance) to a configured algorithm."""
+    if isinstance(algorithm, RateLimitAlgorithm):
+        return algorithm
+    
+    try:
+        algorithm_class = RATE_LIMIT_ALGORITHMS[algorithm.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown rate limit algorithm '{algorithm}'. "
+            f"Available: {', '.join(RATE_LIMIT_ALGORITHMS)}"
+        )
+    return algorithm_class(calls, period)
+
+
+class RateLimitStore:
+    """
+    Sharded, bounded in-memory store of per-key rate limit state.
+    
+    Keys are spread over ``shards`` maps, each guarded by its own lock (lock
+    striping) and kept in least-recently-used order. State that was not
+    touched for a while therefore collects at the front of a shard and is
+    swept incrementally whenever a new key is inserted; once a shard is full
+    its least recently used key is evicted, so memory is bounded by
+    ``max_keys`` no matter how many distinct clients are seen.
+    """
+    
+    def __init__(
+        self,
+        algorithm: RateLimitAlgorithm,
+        max_keys: int = 100000,
+        shards: int = 16,
+        sweep_batch: int = 8
+    ):
+        self.algorithm = algorithm
+        self.max_keys = max_keys
+        self.shard_count = shards
+        self.shard_capacity = max(1, max_keys // shards)
+        self.sweep_batch = sweep_batch
+        # Each shard: {key: algorithm state} in LRU order
+        self._shards: List[OrderedDict] = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self.evictions = 0
+        self.expirations = 0
+    
+    def hit(self, key: str, current_time: float) -> Tuple[bool, int, float]:
+        """Record a request for ``key``. Returns (allowed, remaining, reset_time)."""
+        index = hash(key) % self.shard_count
+        shard = self._shards[index]
+        
+        with self._locks[index]:
+            state = shard.get(key)
+            if state is None:
+                self._sweep(shard, current_time)
+                if len(shard) >= self.shard_capacity:
+                    shard.popitem(last=False)
+                    self.evictions += 1
+                state = shard[key] = self.algorithm.create(current_time)
+            else:
+                shard.move_to_end(key)
+            
+            return self.algorithm.hit(state, current_time)
+    
+    def _sweep(self, shard: OrderedDict, current_time: float, limit: Optional[int] = None) -> None:
+        """Drop expired state from the least recently used end of ``shard``."""
+        expires_at = self.algorithm.expires_at
+        for _ in range(limit or self.sweep_batch):
+            if not shard:
+                return
+            key, state = next(iter(shard.items()))
+            if expires_at(state) >= current_time:
+                return
+            del shard[key]
+            self.expirations += 1
+    
+    def purge_expired(self, current_time: Optional[float] = None) -> None:
+        """Sweep expired state from every shard."""
+        if current_time is None:
+            current_time = time.time()
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                self._sweep(shard, current_time, limit=len(shard))
+    
+    def get(self, key: str) -> Any:
+        """Return the state for ``key`` without touching it."""
+        return self._shards[hash(key) % self.shard_count].get(key)
+    
+    def clear(self) -> None:
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._shards[hash(key) % self.shard_count]
+    
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+    
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self), "evictions": self.evictions, "expirations": self.expirations}
+
+
+
+class SharedMemoryRateLimitStore:
+    """
+    Rate limit store shared by every worker process on a host.
+    
+    State lives in a memory-mapped file laid out as a fixed-size open
+    addressing hash table: a header followed by ``slots`` records of
+    (64-bit key hash, up to three floats of algorithm state). A key is
+    probed linearly from its home slot for at most ``max_probe`` records;
+    expired records are reused in place and, when the probe window is full,
+    the record that expires first is evicted, so the file never grows.
+    
+    Updates lock exactly the probe window with a POSIX byte-range lock, so
+    workers only contend when their keys share records. Requires ``fcntl``
+    (Linux/macOS).
+    """
+    
+    MAGIC = b"RUNAPIRL"
+    HEADER = struct.Struct("<8s16sddQQ")  # magic, algorithm, calls, period, slots, probe
+    RECORD = struct.Struct("<Q3d")
+    
+    def __init__(
+        self,
+        algorithm: RateLimitAlgorithm,
+        path: Optional[str] = None,
+        max_keys: int = 100000,
+        max_probe: int = 16
+    ):
+        if fcntl is None:
+            raise RuntimeError("The shared memory rate limit store requires fcntl (Linux or macOS)")
+        
+        self.algorithm = algorithm
+        self.path = path or default_shared_path()
+        self.slots = max(1, max_keys)
+        self.max_probe = max_probe
+        self._thread_lock = threading.Lock()
+        
+        # Trailing overflow records let probe windows run past the end
+        # without wrapping, so each window is one contiguous byte range
+        self.size = self.HEADER.size + (self.slots + max_probe) * self.RECORD.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._initialize()
+        self._map = mmap.mmap(self._fd, self.size)
+    
+    def _initialize(self) -> None:
+        """Create or reset the table unless it already has our layout."""
+        header = self.HEADER.pack(
+            self.MAGIC,
+            self.algorithm.name.encode()[:16],
+            float(self.algorithm.calls),
+            float(self.algorithm.period),
+            self.slots,
+            self.max_probe,
+        )
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self.HEADER.size, 0)
+        try:
+            current = os.pread(self._fd, self.HEADER.size, 0)
+            if current != header or os.fstat(self._fd).st_size != self.size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self.size)
+                os.pwrite(self._fd, header, 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self.HEADER.size, 0)
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+        # Zero marks an empty record
+        return int.from_bytes(digest, "little") or 1
+    
+    def hit(self, key: str, current_time: float) -> Tuple[bool, int, float]:
+        """Record a request for ``key``. Returns (allowed, remaining, reset_time)."""
+        key_hash = self._hash(key)
+        record = self.RECORD
+        algorithm = self.algorithm
+        start = self.HEADER.size + (key_hash % self.slots) * record.size
+        length = self.max_probe * record.size
+        
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, start)
+            try:
+                offset = self._find(key_hash, start, current_time)
+                values = record.unpack_from(self._map, offset)
+                if values[0] == key_hash:
+                    state = algorithm.unpack(values[1:])
+                else:
+                    state = algorithm.create(current_time)
+                
+                result = algorithm.hit(state, current_time)
+                packed = algorithm.pack(state)
+                record.pack_into(self._map, offset, key_hash, *(packed + (0.0,) * (3 - len(packed))))
+                return result
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+    
+    def _find(self, key_hash: int, start: int, current_time: float) -> int:
+        """Offset of ``key_hash``'s record, or of the record to claim for it."""
+        record = self.RECORD
+        algorithm = self.algorithm
+        claim = None
+        victim, victim_expiry = start, None
+        
+        for index in range(self.max_probe):
+            offset = start + index * record.size
+            values = record.unpack_from(self._map, offset)
+            if values[0] == key_hash:
+                return offset
+            if values[0] == 0:
+                # Nothing was ever stored past an empty record
+                return claim if claim is not None else offset
+            if claim is None:
+                expiry = algorithm.expires_at(algorithm.unpack(values[1:]))
+                if expiry < current_time:
+                    claim = offset
+                elif victim_expiry is None or expiry < victim_expiry:
+                    victim, victim_expiry = offset, expiry
+        
+        return claim if claim is not None else victim
+    
+    def clear(self) -> None:
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, 0)
+        try:
+            self._map[self.HEADER.size:] = bytes(self.size - self.HEADER.size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, 0)
+    
+    def __len__(self) -> int:
+        record = self.RECORD
+        return sum(
+            1
+            for offset in range(self.HEADER.size, self.size, record.size)
+            if record.unpack_from(self._map, offset)[0]
+        )
+    
+    def stats(self) -> Dict[str, int]:
+        return {"keys": len(self), "slots": self.slots}
+    
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+_LUA_PRELUDE = """
+local calls = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local function fmt(value) return string.format('%.17g', value) end
+local function expire(seconds) redis.call('PEXPIRE', KEYS[1], math.max(1, math.ceil(seconds * 1000))) end
+"""
+
+# Each script mirrors the Python algorithm of the same name and returns
+# {allowed, remaining, reset_time}; floats travel as strings because Redis
+# truncates Lua numbers to integers in replies.
+_REDIS_SCRIPTS = {
+    "fixed_window": _LUA_PRELUDE + """
+local state = redis.call('HMGET', KEYS[1], 'count', 'start')
+local count = tonumber(state[1]) or 0
+local start = tonumber(state[2]) or now
+if now > start + period then
+    count = 0
+    start = now
+end
+local reset = start + period
+if count >= calls then
+    return {0, 0, fmt(reset)}
+end
+count = count + 1
+redis.call('HSET', KEYS[1], 'count', count, 'start', fmt(start))
+expire(reset - now)
+return {1, calls - count, fmt(reset)}
+""",
+    "sliding_window": _LUA_PRELUDE + """
+local state = redis.call('HMGET', KEYS[1], 'previous', 'current', 'start')
+local previous = tonumber(state[1]) or 0
+local current = tonumber(state[2]) or 0
+local start = tonumber(state[3]) or (now - math.fmod(now, period))
+local elapsed = math.floor((now - start) / period)
+if elapsed >= 1 then
+    if elapsed == 1 then previous = current else previous = 0 end
+    current = 0
+    start = start + elapsed * period
+end
+local estimated = previous * (1 - (now - start) / period) + current
+if estimated + 1 > calls then
+    local reset = start + period
+    if previous > 0 and current < calls then
+        reset = start + period * (1 - (calls - 1 - current) / previous)
+    end
+    return {0, 0, fmt(reset)}
+end
+current = current + 1
+redis.call('HSET', KEYS[1], 'previous', previous, 'current', current, 'start', fmt(start))
+expire(start + 2 * period - now)
+return {1, math.max(math.floor(calls - estimated - 1), 0), fmt(start + period)}
+""",
+    "token_bucket": _LUA_PRELUDE + """
+local rate = calls / period
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or calls
+local updated = tonumber(state[2]) or now
+tokens = math.min(calls, tokens + (now - updated) * rate)
+local allowed = 0
+local reset = now + (1 - tokens) / rate
+if tokens >= 1 then
+    allowed = 1
+    tokens = tokens - 1
+    reset = now + (calls - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', fmt(tokens), 'updated', fmt(now))
+expire((calls - tokens) / rate)
+return {allowed, allowed * math.floor(tokens), fmt(reset)}
+""",
+    "gcra": _LUA_PRELUDE + """
+local emission = period / calls
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+local new_tat = math.max(tat, now) + emission
+local allow_at = new_tat - period
+if now < allow_at then
+    return {0, 0, fmt(allow_at)}
+end
+redis.call('SET', KEYS[1], fmt(new_tat))
+expire(new_tat - now)
+return {1, math.floor((period - (new_tat - now)) / emission + 1e-9), fmt(new_tat)}
+""",
+}
+
+
+class RedisRateLimitStore:
+    """
+    Rate limit store shared across hosts through a Redis-protocol server.
+    
+    Every hit is a single EVALSHA of a Lua script implementing the
+    configured algorithm, so the read-modify-write is atomic on the server
+    and keys expire on their own once their state is stale. Hosts pass
+    their own clock, so keep them NTP-synchronised.
+    """
+    
+    def __init__(
+        self,
+        algorithm: RateLimitAlgorithm,
+        url: Optional[str] = None,
+        client: Optional[RedisClient] = None,
+        prefix: str = "runapi:ratelimit:"
+    ):
+        if algorithm.name not in _REDIS_SCRIPTS:
+            raise ValueError(f"Rate limit algorithm '{algorithm.name}' has no Redis implementation")
+        
+        self.algorithm = algorithm
+        self.client = client or get_redis_client(url)
+        self.sha = self.client.register_script(_REDIS_SCRIPTS[algorithm.name])
+        self.prefix = f"{prefix}{algorithm.name}:{algorithm.calls}:{algorithm.period}:"
+        self._args = (algorithm.calls, algorithm.period)
+    
+    async def hit(self, key: str, current_time: float) -> Tuple[bool, int, float]:
+        """Record a request for ``key``. Returns (allowed, remaining, reset_time)."""
+        allowed, remaining, reset_time = await self.client.evalsha(
+            self.sha, [self.prefix + key], self._args + (current_time,)
+        )
+        return bool(allowed), int(remaining), float(reset_time)
+
+
+def default_shared_path() -> str:
+    """Per-project default location of the shared rate limit table."""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    project = hashlib.sha1(os.getcwd().encode()).hexdigest()[:12]
+    return os.path.join(directory, f"runapi-ratelimit-{project}")
+
+
+def create_rate_limit_store(
+    backend: str,
+    algorithm: RateLimitAlgorithm,
+    max_keys: int = 100000,
+    shared_path: Optional[str] = None,
+    redis_url: Optional[str] = None
+):
+    """Create a rate limit store for a backend name ("memory", "shared_memory" or "redis")."""
+    backend = backend.lower()
+    if backend == "memory":
+        return RateLimitStore(algorithm, max_keys=max_keys)
+    if backend in ("shared_memory", "shm"):
+        return SharedMemoryRateLimitStore(algorithm, path=shared_path, max_keys=max_keys)
+    if backend == "redis":
+        return RedisRateLimitStore(algorithm, url=redis_url)
+    raise ValueError(f"Unknown rate limit backend '{backend}'. Available: memory, shared_memory, redis")
@@ -0,0 +1,112 @@
+"""
+Route hot-reloading for RunApi framework
+"""
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .discovery import discover_route_files
+
+if TYPE_CHECKING:
+    from .core import RunApiApp
+
+logger = logging.getLogger("runapi.reload")
+
+
+class RouteReloader:
+    """
+    Watch ``routes/`` and swap changed route files into a running app.
+
+    Every ``interval`` seconds the route files' mtimes and sizes are compared
+    with the previous poll (on a worker thread, so the event loop keeps
+    serving); each changed, added or deleted file is re-executed on its own
+    through ``RunApiApp.areload_route_file``. The rest of the application,
+    its state and open connections are untouched.
+    """
+
+    def __init__(self, app: "RunApiApp", routes_dir: str = "routes", interval: float = 0.5):
+        self.app = app
+        self.routes_dir = Path(routes_dir)
+        self.interval = interval
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """``(mtime_ns, size)`` of every route file, keyed by absolute path."""
+        if not self.routes_dir.is_dir():
+            return {}
+        files, _ = discover_route_files(self.routes_dir)
+        result = {}
+        for route_file, _ in files:
+            try:
+                stat = os.stat(route_file)
+            except OSError:
+                continue  # deleted since the scan
+            result[os.path.abspath(route_file)] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    async def check(self) -> List[str]:
+        """Poll once and reload the files that changed; returns their paths."""
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, self.snapshot)
+        changed = sorted(
+            path for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        )
+        self._snapshot = snapshot
+        for path in changed:
+            await self.app.areload_route_file(Path(path))
+        return changed
+
+    async def start(self):
+        self._snapshot = await asyncio.get_running_loop().run_in_executor(None, self.snapshot)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Route hot-reload poll failed")
+
+
+def run_dev_server(app: str, routes_dir: str = "routes", extra_files: Iterable[str] = (), **uvicorn_kwargs: Any):
+    """
+    Run uvicorn with auto-reload that leaves ``routes_dir`` to the app.
+
+    Python files under ``routes_dir`` are hot-reloaded in place by
+    ``RouteReloader``, so the restarting supervisor only watches everything
+    else (``main.py``, other modules) plus ``extra_files`` such as the
+    ``.env`` configuration file.
+    """
+    import uvicorn
+    from uvicorn.supervisors.statreload import StatReload
+
+    routes_path = Path(routes_dir).resolve()
+    extra_paths = [Path(extra).resolve() for extra in extra_files]
+
+    class RouteAwareStatReload(StatReload):
+        def iter_py_files(self) -> Iterator[Path]:
+            for path in super().iter_py_files():
+                if routes_path not in path.parents:
+                    yield path
+            for path in extra_paths:
+                if path.exists():
+                    yield path
+
+    config = uvicorn.Config(app, reload=True, **uvicorn_kwargs)
+    server = uvicorn.Server(config=config)
+    sock = config.bind_socket()
+    RouteAwareStatReload(config, target=server.run, sockets=[sock]).run()
@@ -0,0 +1,291 @@
+"""
+Compiled route dispatch for RunApi framework
+"""
+import re
+import copy
+import importlib.util
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    from starlette.routing import get_route_path
+except ImportError:
+    # Older Starlette matches routes against the raw scope path
+    def get_route_path(scope: Scope) -> str:
+        return scope["path"]
+
+# "{name}" (one segment) and "{name:path}" (the rest of the path)
+_PARAM = re.compile(r"^\{([A-Za-z_][A-Za-z0-9_]*)\}$")
+_CATCH_ALL = re.compile(r"^\{([A-Za-z_][A-Za-z0-9_]*):path\}$")
+
+
+class _Node:
+    __slots__ = ("static", "param", "catch_all", "routes")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        # Routes ending here; catch-all routes consume the rest of the path
+        self.routes: List[Tuple[APIRoute, Tuple[str, ...]]] = []
+        self.catch_all: List[Tuple[APIRoute, Tuple[str, ...]]] = []
+
+
+def split_route_path(path: str) -> List[str]:
+    """Split ``/a/b`` into ``["a", "b"]``; ``/`` is ``[""]``."""
+    return path[1:].split("/")
+
+
+def is_indexable(path: str) -> bool:
+    """Whether a route path only uses static, ``{name}`` and trailing ``{name:path}`` segments."""
+    if not path.startswith("/"):
+        return False
+    segments = split_route_path(path)
+    for position, segment in enumerate(segments):
+        if "{" not in segment and "}" not in segment:
+            continue
+        if _PARAM.match(segment):
+            continue
+        if _CATCH_ALL.match(segment) and position == len(segments) - 1:
+            continue
+        return False
+    return True
+
+
+class RadixRouter:
+    """
+    Radix-tree dispatcher for file-based routes.
+
+    Routes are indexed by path segment: static segments in a dict, ``{name}``
+    parameters and trailing ``{name:path}`` catch-alls as dedicated children,
+    so resolving a request costs O(path length) instead of one regex per
+    route. Static segments take precedence over parameters, and parameters
+    over catch-alls. Requests the tree cannot answer with a full match
+    (other routes, mounts, 404, 405 and slash redirects) fall through to
+    ``fallback``, normally the FastAPI router's own dispatch. When neither
+    the path nor its slash variant touches the tree, the fallback scans a
+    copy of ``router`` without the indexed routes, so unknown paths do not
+    pay for a linear scan over every file route.
+
+    Registration order is kept: routes registered before an indexed route
+    (the OpenAPI and docs routes, mounts, routes added by hand) are tried
+    first, and when one of them matches the request goes to ``fallback``.
+
+    The indexed routes are regular ``APIRoute`` objects registered on the
+    application, so dependency injection and OpenAPI are unaffected.
+    """
+
+    def __init__(self, routes: Iterable[APIRoute], fallback: ASGIApp, router: Any = None):
+        self.fallback = fallback
+        self.router = router
+        self.root = _Node()
+        # Fully static paths resolve with one dict lookup
+        self.static_routes: Dict[str, List[APIRoute]] = {}
+        self.routes: List[APIRoute] = []
+        self._indexed = set()
+        self._unindexed_router: Any = None
+        self._unindexed_size = -1
+        # Unindexed routes registered before indexed ones, by router position
+        self._preceding: List[Tuple[int, Any]] = []
+        self._positions: Dict[int, int] = {}
+        self._preceding_size = -1
+        for route in routes:
+            self.add(route)
+
+    def add(self, route: APIRoute) -> bool:
+        """Index ``route``; returns False if its path cannot be indexed."""
+        if not is_indexable(route.path):
+            return False
+        self.routes.append(route)
+        self._indexed.add(id(route))
+        if "{" not in route.path:
+            self.static_routes.setdefault(route.path, []).append(route)
+
+        node = self.root
+        names: List[str] = []
+        for segment in split_route_path(route.path):
+            catch_all = _CATCH_ALL.match(segment)
+            if catch_all:
+                names.append(catch_all.group(1))
+                node.catch_all.append((route, tuple(names)))
+                return True
+            param = _PARAM.match(segment)
+            if param:
+                names.append(param.group(1))
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
+        node.routes.append((route, tuple(names)))
+        return True
+
+    def _candidates(
+        self, node: _Node, segments: List[str], index: int, values: Tuple[str, ...]
+    ) -> Iterator[Tuple[APIRoute, Tuple[str, ...], Tuple[str, ...]]]:
+        if index == len(segments):
+            for route, names in node.routes:
+                yield route, names, values
+            return
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            yield from self._candidates(child, segments, index + 1, values)
+        if node.param is not None and segment:
+            yield from self._candidates(node.param, segments, index + 1, values + (segment,))
+        if node.catch_all:
+            rest = "/".join(segments[index:])
+            for route, names in node.catch_all:
+                yield route, names, values + (rest,)
+
+    def resolve(self, path: str, method: str) -> Optional[Tuple[APIRoute, Dict[str, str]]]:
+        """Find the route that fully matches ``method`` and ``path``."""
+        static = self.static_routes.get(path)
+        if static is not None:
+            for route in static:
+                if not route.methods or method in route.methods:
+                    return route, {}
+        for route, names, values in self._candidates(self.root, split_route_path(path), 0, ()):
+            if not route.methods or method in route.methods:
+                return route, dict(zip(names, values))
+        return None
+
+    def matches_path(self, path: str) -> bool:
+        """Whether any indexed route matches ``path``, whatever the method."""
+        if path in self.static_routes:
+            return True
+        return next(self._candidates(self.root, split_route_path(path), 0, ()), None) is not None
+
+    def _miss_fallback(self, path: str) -> ASGIApp:
+        """Fallback for a request no indexed route can fully handle."""
+        if self.router is None:
+            return self.fallback
+        # 405s and slash redirects need the indexed routes in the scan
+        variant = path.rstrip("/") if path.endswith("/") else path + "/"
+        if self.matches_path(path) or (path != "/" and self.matches_path(variant)):
+            return self.fallback
+
+        routes = self.router.routes
+        if self._unindexed_size != len(routes):
+            unindexed = copy.copy(self.router)
+            unindexed.routes = [route for route in routes if id(route) not in self._indexed]
+            self._unindexed_router = unindexed
+            self._unindexed_size = len(routes)
+        return self._unindexed_router.app
+
+    def _shadowed(self, route: APIRoute, scope: Scope) -> bool:
+        """Whether a route registered before ``route`` fully matches the request."""
+        if self.router is None:
+            return False
+        routes = self.router.routes
+        if self._preceding_size != len(routes):
+            self._positions = {id(item): position for position, item in enumerate(routes) if id(item) in self._indexed}
+            last = max(self._positions.values(), default=-1)
+            self._preceding = [
+                (position, item) for position, item in enumerate(routes[:last])
+                if id(item) not in self._indexed
+            ]
+            self._preceding_size = len(routes)
+        position = self._positions.get(id(route), len(routes))
+        for preceding_position, item in self._preceding:
+            if preceding_position > position:
+                break
+            if item.matches(scope)[0] == Match.FULL:
+                return True
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.fallback(scope, receive, send)
+            return
+
+        if "router" not in scope and self.router is not None:
+            scope["router"] = self.router
+        path = get_route_path(scope)
+        found = self.resolve(path, scope["method"])
+        if found is None:
+            await self._miss_fallback(path)(scope, receive, send)
+            return
+
+        route, params = found
+        if self._shadowed(route, scope):
+            await self.fallback(scope, receive, send)
+            return
+        path_params = dict(scope.get("path_params", {}))
+        path_params.update(params)
+        scope["endpoint"] = route.endpoint
+        scope["path_params"] = path_params
+        scope["route"] = route
+        await route.handle(scope, receive, send)
+
+
+class LazyRouteModule:
+    """A route file that is imported the first time one of its routes is used."""
+
+    def __init__(self, name: str, path: Path):
+        self.name = name
+        self.path = path
+        self.module: Any = None
+        self.routes: List["LazyAPIRoute"] = []
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.module is not None
+
+    def load(self) -> Any:
+        """Import the module once; safe to call from several threads."""
+        if self.module is None:
+            with self._lock:
+                if self.module is None:
+                    spec = importlib.util.spec_from_file_location(self.name, self.path)
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                    self.module = module
+        return self.module
+
+
+class LazyAPIRoute(APIRoute):
+    """
+    An ``APIRoute`` registered from a static scan of its route file.
+
+    Until the file is imported the route carries a placeholder endpoint that
+    is only used for matching. ``load`` imports the module, builds the real
+    ``APIRoute`` with the same arguments and adopts its state, so dependency
+    injection, validation and OpenAPI behave exactly as for an eager route.
+    ``handle`` loads on the first request.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], *, module: LazyRouteModule, handler: str, **kwargs: Any):
+        super().__init__(path, endpoint, **kwargs)
+        self.module = module
+        self.handler = handler
+        self.loaded = False
+        self._route_kwargs = kwargs
+
+    @staticmethod
+    def placeholder(handler: str) -> Callable[..., Any]:
+        async def endpoint() -> None:
+            raise RuntimeError("lazy route endpoint called before loading")
+
+        # Same name as the real handler, so route names and operation ids match
+        endpoint.__name__ = endpoint.__qualname__ = handler
+        return endpoint
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        endpoint = getattr(self.module.load(), self.handler)
+        route = APIRoute(self.path, endpoint, **self._route_kwargs)
+        self.__dict__.update(route.__dict__)
+        self.loaded = True
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.loaded:
+            self.load()
+            scope["endpoint"] = self.endpoint
+        await super().handle(scope, receive, send)
@@ -0,0 +1,142 @@
+"""
+JSON serialization engines for RunApi framework
+"""
+import functools
+import importlib.util
+import json
+import math
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi.responses import JSONResponse as FastAPIJSONResponse
+
+from .config import get_config
+
+JSON_ENGINES = ("auto", "orjson", "msgspec", "json")
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    # Byte-for-byte what Starlette's JSONResponse renders
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _finite(value: Any, path: tuple = ()) -> Any:
+    """``value`` with NaN and infinities replaced by ``None``."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (dict, list, tuple)):
+        if id(value) in path:
+            raise ValueError("Circular reference detected")
+        path += (id(value),)
+        if isinstance(value, dict):
+            return {key: _finite(item, path) for key, item in value.items()}
+        return [_finite(item, path) for item in value]
+    return value
+
+
+def _fallback_dumps(content: Any) -> bytes:
+    try:
+        return _stdlib_dumps(content)
+    except ValueError:
+        # Write NaN and infinities as null, like the fast engines
+        return _stdlib_dumps(_finite(content))
+
+
+class JSONEngine:
+    """
+    A JSON encoder producing compact UTF-8 bytes.
+
+    Values the fast encoders refuse (integers beyond 64 bits, unsupported
+    types) are retried with the stdlib encoder, so switching engines never
+    turns a response that used to render into an error. Unlike the stdlib,
+    orjson and msgspec write NaN and infinities as ``null``, and so does the
+    retry; they also serialize datetimes, UUIDs and dataclasses.
+    """
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], errors: tuple = ()):
+        self.name = name
+        self._dumps = dumps
+        self._errors = errors
+
+    def dumps(self, content: Any) -> bytes:
+        if not self._errors:
+            return self._dumps(content)
+        try:
+            return self._dumps(content)
+        except self._errors:
+            return _fallback_dumps(content)
+
+    def __repr__(self) -> str:
+        return f"JSONEngine({self.name!r})"
+
+
+def _orjson_engine() -> JSONEngine:
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, option=options)
+
+    return JSONEngine("orjson", dumps, (TypeError,))
+
+
+def _msgspec_engine() -> JSONEngine:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    return JSONEngine("msgspec", encoder.encode, (TypeError, OverflowError, msgspec.EncodeError))
+
+
+_FACTORIES: Dict[str, Callable[[], JSONEngine]] = {
+    "orjson": _orjson_engine,
+    "msgspec": _msgspec_engine,
+    "json": lambda: JSONEngine("json", _stdlib_dumps),
+}
+
+
+def available_json_engines() -> list:
+    """Installed engines, fastest first; ``json`` is always available."""
+    return [name for name in ("orjson", "msgspec") if importlib.util.find_spec(name) is not None] + ["json"]
+
+
+@functools.lru_cache(maxsize=None)
+def get_json_engine(name: str = "auto") -> JSONEngine:
+    """
+    The engine for a ``JSON_ENGINE`` setting: ``auto`` picks orjson, then
+    msgspec, then the stdlib ``json`` module.
+    """
+    name = name.strip().lower()
+    if name not in JSON_ENGINES:
+        raise ValueError(f"Unknown JSON engine {name!r}; expected one of {', '.join(JSON_ENGINES)}")
+    if name == "auto":
+        name = available_json_engines()[0]
+    elif name != "json" and importlib.util.find_spec(name) is None:
+        raise ValueError(f"{name} is not installed (pip install {name})")
+    return _FACTORIES[name]()
+
+
+class JSONResponse(FastAPIJSONResponse):
+    """
+    ``JSONResponse`` rendered with a JSON engine: ``json_engine`` when set on
+    the class (see ``json_response_class``), otherwise the ``JSON_ENGINE``
+    configuration.
+    """
+
+    json_engine: Optional[JSONEngine] = None
+
+    def render(self, content: Any) -> bytes:
+        engine = self.json_engine or get_json_engine(get_config().json_engine)
+        return engine.dumps(content)
+
+
+@functools.lru_cache(maxsize=None)
+def json_response_class(name: str = "auto") -> Type[JSONResponse]:
+    """A ``JSONResponse`` subclass bound to one engine, for ``default_response_class``."""
+    engine = get_json_engine(name)
+    return type(f"{engine.name.capitalize()}JSONResponse", (JSONResponse,), {"json_engine": engine})
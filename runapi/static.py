@@ -0,0 +1,645 @@
+"""
+Precompressed, fingerprinted static files for RunApi framework
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from stat import S_ISREG
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from .cache import etag_matches
+from .compression import CODECS, ContentTypeFilter, parse_accept_encoding
+from .config import RunApiConfig, get_config
+from .routing import get_route_path
+
+STATIC_MANIFEST_VERSION = 1
+STATIC_MANIFEST_NAME = "manifest.json"
+# Sibling file suffix of each precompressed variant
+ENCODING_SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+# Built once, served many times: use each codec's strongest level
+BUILD_LEVELS = {"br": 11, "zstd": 19, "gzip": 9}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+HOT_INVALIDATION_MODES = ("auto", "inotify", "poll")
+# Bytes per body message when a mapped file is streamed
+MMAP_CHUNK_SIZE = 256 * 1024
+
+logger = logging.getLogger("runapi.static")
+
+
+def file_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def hashed_name(path: str, digest: str) -> str:
+    """``css/app.css`` -> ``css/app.<first 10 hex digits>.css``."""
+    directory, _, name = path.rpartition("/")
+    stem, dot, suffix = name.rpartition(".")
+    if not stem:
+        stem, dot, suffix = name, "", ""
+    name = f"{stem}.{digest[:10]}{dot}{suffix}"
+    return f"{directory}/{name}" if directory else name
+
+
+class StaticAsset:
+    """One source file: its fingerprinted name and precompressed variant sizes."""
+
+    __slots__ = ("path", "hashed", "digest", "size", "content_type", "encodings")
+
+    def __init__(
+        self,
+        path: str,
+        hashed: str,
+        digest: str,
+        size: int,
+        content_type: str,
+        encodings: Optional[Dict[str, int]] = None,
+    ):
+        self.path = path
+        self.hashed = hashed
+        self.digest = digest
+        self.size = size
+        self.content_type = content_type
+        self.encodings: Dict[str, int] = encodings or {}
+
+    def to_dict(self) -> Dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StaticAsset":
+        return cls(**{slot: data[slot] for slot in cls.__slots__})
+
+
+class StaticManifest:
+    """
+    The output of ``runapi build-static``: for every file under the source
+    directory, a copy named after a hash of its content, plus ``.br``,
+    ``.zst`` and ``.gz`` siblings for compressible files, described in
+    ``manifest.json`` in the output directory.
+    """
+
+    def __init__(self, directory: Path, assets: Dict[str, StaticAsset]):
+        self.directory = Path(directory)
+        self.assets = assets
+
+    @classmethod
+    def build(
+        cls,
+        source: Path,
+        output: Path,
+        encodings: Iterable[str] = ("br", "zstd", "gzip"),
+        config: Optional[RunApiConfig] = None,
+    ) -> "StaticManifest":
+        """Fingerprint and precompress ``source`` into ``output``, replacing its contents."""
+        config = config or get_config()
+        source, output = Path(source), Path(output)
+        codecs = []
+        for name in encodings:
+            codec = CODECS.get(name)
+            if codec is None:
+                raise ValueError(f"Unknown content coding {name!r}; expected one of {', '.join(CODECS)}")
+            if codec.available():
+                codecs.append(codec(BUILD_LEVELS[name]))
+        types = ContentTypeFilter(config.compression_types, config.compression_exclude_types)
+
+        if output.exists():
+            shutil.rmtree(output)
+        output.mkdir(parents=True)
+        assets = {}
+        for file in sorted(source.rglob("*")):
+            relative = file.relative_to(source)
+            if not file.is_file() or any(part.startswith(".") for part in relative.parts):
+                continue
+            path = relative.as_posix()
+            data = file.read_bytes()
+            digest = file_digest(data)
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            asset = StaticAsset(path, hashed_name(path, digest), digest, len(data), content_type)
+
+            target = output / asset.hashed
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            if len(data) >= config.compression_min_size and types.allows(content_type):
+                for codec in codecs:
+                    compressed = codec.compress(data)
+                    if len(compressed) < len(data):
+                        target.with_name(target.name + ENCODING_SUFFIXES[codec.name]).write_bytes(compressed)
+                        asset.encodings[codec.name] = len(compressed)
+            assets[path] = asset
+
+        manifest = cls(output, assets)
+        manifest.save()
+        return manifest
+
+    def save(self):
+        data = {
+            "version": STATIC_MANIFEST_VERSION,
+            "files": {path: asset.to_dict() for path, asset in self.assets.items()},
+        }
+        temp = self.directory / (STATIC_MANIFEST_NAME + ".tmp")
+        temp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(temp, self.directory / STATIC_MANIFEST_NAME)
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["StaticManifest"]:
+        """The manifest in ``directory``, or None if it is missing or from another version."""
+        try:
+            data = json.loads((Path(directory) / STATIC_MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != STATIC_MANIFEST_VERSION:
+            return None
+        assets = {path: StaticAsset.from_dict(entry) for path, entry in data["files"].items()}
+        return cls(directory, assets)
+
+    def url(self, path: str, prefix: str = "/static") -> str:
+        """URL of the fingerprinted copy of ``path``; unknown paths are left as is."""
+        path = path.lstrip("/")
+        asset = self.assets.get(path)
+        return f"{prefix.rstrip('/')}/{asset.hashed if asset else path}"
+
+
+class _Variant:
+    __slots__ = ("path", "stat", "etag", "encoding")
+
+    def __init__(self, path: Path, etag: bytes, encoding: Optional[str]):
+        self.path = path
+        self.stat = os.stat(path)
+        self.etag = etag
+        self.encoding = encoding
+
+
+class PrecompressedStaticFiles:
+    """
+    Serve a ``runapi build-static`` output directory.
+
+    Fingerprinted names (``app.3f2a9c1b5d.css``) are served with an
+    immutable one-year ``Cache-Control``; original names still resolve,
+    with ``no-cache`` so clients revalidate them. The precompressed sibling
+    matching ``Accept-Encoding`` is sent with its own strong ETag, and a
+    matching ``If-None-Match`` gets a 304. Everything is resolved from the
+    manifest and stat-ed once at startup, so a request does no filesystem
+    lookups before the file is sent. Servers that implement the ASGI
+    ``http.response.pathsend`` extension send the file with ``sendfile``;
+    others stream it in chunks. Range requests get the identity variant.
+    """
+
+    def __init__(self, directory: Path, manifest: Optional[StaticManifest] = None, encodings: Iterable[str] = ("br", "zstd", "gzip")):
+        manifest = manifest or StaticManifest.load(directory)
+        if manifest is None:
+            raise RuntimeError(f"No static manifest in {directory}; run 'runapi build-static'")
+        self.manifest = manifest
+        self.encodings = list(encodings)
+        # path -> (variants by encoding, None for identity; content type; immutable)
+        self._files: Dict[str, Tuple[Dict[Optional[str], _Variant], str, bool]] = {}
+        directory = Path(directory)
+        for asset in manifest.assets.values():
+            target = directory / asset.hashed
+            variants = {None: _Variant(target, f'"{asset.digest}"'.encode("latin-1"), None)}
+            for encoding in asset.encodings:
+                sibling = target.with_name(target.name + ENCODING_SUFFIXES[encoding])
+                variants[encoding] = _Variant(sibling, f'"{asset.digest}-{encoding}"'.encode("latin-1"), encoding)
+            self._files[asset.hashed] = (variants, asset.content_type, True)
+            self._files.setdefault(asset.path, (variants, asset.content_type, False))
+
+    def choose_encoding(self, accept_encoding: str, available: Iterable[Optional[str]]) -> Optional[str]:
+        """The acceptable precompressed encoding with the highest q, then preference; None for identity."""
+        if not accept_encoding:
+            return None
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for encoding in self.encodings:
+            if encoding in available:
+                quality = accepted.get(encoding, wildcard)
+                if quality > best_quality:
+                    best, best_quality = encoding, quality
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["method"] not in ("GET", "HEAD"):
+            response: Response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+            await response(scope, receive, send)
+            return
+        found = self._files.get(get_route_path(scope).lstrip("/"))
+        if found is None:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        variants, content_type, immutable = found
+        request_headers = Headers(scope=scope)
+        encoding = None
+        if "range" not in request_headers:
+            encoding = self.choose_encoding(request_headers.get("accept-encoding", ""), variants)
+        variant = variants[encoding]
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else "no-cache",
+            "etag": variant.etag.decode("latin-1"),
+        }
+        if len(variants) > 1:
+            headers["vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, variant.etag):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+        headers["last-modified"] = formatdate(variant.stat.st_mtime, usegmt=True)
+        response = FileResponse(variant.path, headers=headers, media_type=content_type, stat_result=variant.stat)
+        await response(scope, receive, send)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    ``(start, end)`` (end exclusive) of a single-range ``Range`` header, or
+    None when the header should be ignored (malformed, several ranges, not
+    bytes); raises ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not dash or not (first + last).isdigit():
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise ValueError(f"empty range {header!r}")
+        return max(0, size - int(last)), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"range {header!r} outside {size} bytes")
+    return start, min(int(last) + 1, size) if last else size
+
+
+class _Inotify:
+    """
+    Minimal Linux inotify binding (ctypes, no dependency): recursively
+    watches a directory and reports changed paths from the event loop.
+    """
+
+    _MASK = (
+        0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800
+    )  # MODIFY ATTRIB CLOSE_WRITE MOVED_FROM MOVED_TO CREATE DELETE DELETE_SELF MOVE_SELF
+    _IN_CREATE, _IN_MOVED_TO, _IN_Q_OVERFLOW, _IN_ISDIR = 0x100, 0x80, 0x4000, 0x40000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory: str, on_change: Callable[[Optional[str]], None]):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._ctypes = ctypes
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.on_change = on_change
+        self._watches: Dict[int, str] = {}
+        try:
+            self._watch_tree(directory)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux")
+
+    def _watch_tree(self, directory: str):
+        for root, dirs, _ in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(root), self._MASK)
+            if wd < 0:
+                errno = self._ctypes.get_errno()
+                raise OSError(errno, f"inotify_add_watch {root}: {os.strerror(errno)}")
+            self._watches[wd] = root
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        loop.add_reader(self.fd, self._read)
+
+    def _read(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & self._IN_Q_OVERFLOW:
+                self.on_change(None)  # events were lost: drop everything
+                continue
+            root = self._watches.get(wd)
+            if root is None:
+                continue
+            path = os.path.join(root, os.fsdecode(name)) if name else root
+            if mask & self._IN_ISDIR:
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    try:
+                        self._watch_tree(path)
+                    except OSError:
+                        pass
+                self.on_change(None)
+            else:
+                self.on_change(path)
+
+    def close(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        if loop is not None:
+            loop.remove_reader(self.fd)
+        os.close(self.fd)
+
+
+class _HotFile:
+    __slots__ = ("path", "key", "size", "body", "mapping", "headers", "etag", "mtime", "checked")
+
+    def __init__(self, path: str, stat: os.stat_result, body: Optional[bytes], mapping: Optional[mmap.mmap]):
+        self.path = path
+        self.key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.size = stat.st_size
+        self.body = body
+        self.mapping = mapping
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'.encode("latin-1")
+        self.mtime = stat.st_mtime
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if content_type.startswith("text/"):
+            content_type += "; charset=utf-8"
+        self.headers = [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"etag", self.etag),
+            (b"last-modified", formatdate(stat.st_mtime, usegmt=True).encode("latin-1")),
+            (b"accept-ranges", b"bytes"),
+        ]
+        self.checked = time.monotonic()
+
+
+class HotStaticFiles:
+    """
+    Static files served from memory.
+
+    Files up to ``max_file_size`` bytes are read once and kept, with their
+    response headers, in an LRU bounded by ``max_bytes``; a hit does no
+    filesystem call. Larger files are memory-mapped once and streamed from
+    the mapping, or sent with ``sendfile`` by servers that implement the
+    ASGI ``http.response.pathsend`` extension. ``Range`` requests are sent
+    as ``memoryview`` slices of the cached bytes or the mapping, without
+    reading or copying the file again.
+
+    Cached entries are invalidated by inotify on Linux, otherwise (or with
+    ``invalidation="poll"``) by re-checking a file's inode, mtime and size
+    at most every ``check_interval`` seconds.
+
+    Deploy new files by replacing them (write elsewhere, then rename): a
+    mapping keeps the old inode readable until its last response is done.
+    A large file truncated or rewritten in place can fault a process that
+    reads its mapping past the new end; streaming re-checks the file size
+    before every chunk and aborts the response if it shrank, which narrows
+    that window but cannot close it.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_file_size: int = 1024 * 1024,
+        max_mapped: int = 64,
+        invalidation: str = "auto",
+        check_interval: float = 1.0,
+    ):
+        if invalidation not in HOT_INVALIDATION_MODES:
+            raise ValueError(
+                f"Unknown invalidation {invalidation!r}; expected one of {', '.join(HOT_INVALIDATION_MODES)}"
+            )
+        if invalidation == "inotify" and not _Inotify.available():
+            raise ValueError("inotify is only available on Linux")
+        self.directory = os.path.realpath(directory)
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.max_mapped = max_mapped
+        self.invalidation = invalidation
+        self.check_interval = check_interval
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._files: "OrderedDict[str, _HotFile]" = OrderedDict()
+        self._mapped: "OrderedDict[str, _HotFile]" = OrderedDict()
+        self._watcher: Optional[_Inotify] = None
+        # (pid, event loop) the watcher belongs to
+        self._owner: Optional[Tuple[int, asyncio.AbstractEventLoop]] = None
+
+    @property
+    def watching(self) -> bool:
+        """Whether inotify currently invalidates entries (instead of polling)."""
+        return self._watcher is not None and self._owner is not None and self._owner[0] == os.getpid()
+
+    def _start_watcher(self, owner: Tuple[int, asyncio.AbstractEventLoop]):
+        # Lazily on the first request in each process and event loop: a
+        # preloading supervisor builds the app before forking its workers
+        self._stop_watcher()
+        self._owner = owner
+        if self.invalidation == "poll" or not _Inotify.available():
+            return
+        try:
+            self._watcher = _Inotify(self.directory, self.invalidate)
+            self._watcher.start(owner[1])
+        except OSError as e:
+            self._watcher = None
+            logger.warning(f"inotify unavailable ({e}); polling static files every {self.check_interval}s")
+        # Whatever happened before the watch started is unknown
+        self.clear()
+
+    def invalidate(self, path: Optional[str] = None):
+        """Drop the entry for the absolute ``path``, or every entry."""
+        if path is None:
+            self.clear()
+            return
+        entry = self._files.pop(path, None)
+        if entry is not None:
+            self.size -= entry.size
+        self._mapped.pop(path, None)
+
+    def clear(self):
+        self._files.clear()
+        self._mapped.clear()
+        self.size = 0
+
+    def _stop_watcher(self):
+        if self._watcher is None:
+            return
+        pid, loop = self._owner
+        # A forked child only closes its copy of the descriptor
+        self._watcher.close(loop if pid == os.getpid() and not loop.is_closed() else None)
+        self._watcher = None
+
+    def close(self):
+        """Stop watching the directory and drop the cache."""
+        self._stop_watcher()
+        self._owner = None
+        self.clear()
+
+    def resolve(self, route_path: str) -> Optional[str]:
+        """Absolute path of a request path inside the directory, or None."""
+        parts = [part for part in route_path.split("/") if part and part != "."]
+        if not parts or any(part == ".." or "\0" in part or "\\" in part for part in parts):
+            return None
+        path = os.path.join(self.directory, *parts)
+        if os.path.commonpath([os.path.realpath(path), self.directory]) != self.directory:
+            return None
+        return path
+
+    def _lookup(self, path: str) -> Optional[_HotFile]:
+        cache = self._files
+        entry = cache.get(path)
+        if entry is None:
+            cache = self._mapped
+            entry = cache.get(path)
+        if entry is None:
+            return None
+        if not self.watching and time.monotonic() - entry.checked >= self.check_interval:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.invalidate(path)
+                return None
+            if (stat.st_ino, stat.st_mtime_ns, stat.st_size) != entry.key:
+                self.invalidate(path)
+                return None
+            entry.checked = time.monotonic()
+        cache.move_to_end(path)
+        return entry
+
+    def _load(self, path: str) -> Optional[_HotFile]:
+        try:
+            with open(path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if not S_ISREG(stat.st_mode):
+                    return None
+                if stat.st_size <= self.max_file_size:
+                    return _HotFile(path, stat, file.read(), None)
+                return _HotFile(path, stat, None, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (IsADirectoryError, FileNotFoundError, NotADirectoryError, PermissionError):
+            return None
+
+    def _store(self, entry: _HotFile):
+        if entry.mapping is not None:
+            self._mapped[entry.path] = entry
+            # Evicted mappings close once no response is still reading them
+            while len(self._mapped) > self.max_mapped:
+                self._mapped.popitem(last=False)
+            return
+        if entry.size > self.max_bytes:
+            return
+        self.invalidate(entry.path)
+        self._files[entry.path] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes:
+            _, evicted = self._files.popitem(last=False)
+            self.size -= evicted.size
+
+    async def get_file(self, path: str) -> Optional[_HotFile]:
+        """The entry for an absolute path, loading (off the event loop) and caching it on a miss."""
+        owner = (os.getpid(), asyncio.get_running_loop())
+        if owner != self._owner:
+            self._start_watcher(owner)
+        entry = self._lookup(path)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = await asyncio.get_running_loop().run_in_executor(None, self._load, path)
+        if entry is not None:
+            self._store(entry)
+        return entry
+
+    @staticmethod
+    def _not_modified(request_headers: Headers, entry: _HotFile) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, entry.etag)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(entry.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            response: Response = PlainTextResponse("Method Not Allowed", status_code=405, headers={"Allow": "GET, HEAD"})
+            await response(scope, receive, send)
+            return
+        path = self.resolve(get_route_path(scope))
+        entry = await self.get_file(path) if path is not None else None
+        if entry is None:
+            await PlainTextResponse("Not Found", status_code=404)(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if self._not_modified(request_headers, entry):
+            headers = [header for header in entry.headers if header[0] in (b"etag", b"last-modified")]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        status, start, end = 200, 0, entry.size
+        headers: List[Tuple[bytes, bytes]] = list(entry.headers)
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == entry.etag.decode("latin-1")):
+            try:
+                byte_range = parse_range(range_header, entry.size)
+            except ValueError:
+                response = PlainTextResponse(
+                    "Range Not Satisfiable", status_code=416, headers={"Content-Range": f"bytes */{entry.size}"}
+                )
+                await response(scope, receive, send)
+                return
+            if byte_range is not None:
+                status, (start, end) = 206, byte_range
+                headers.append((b"content-range", f"bytes {start}-{end - 1}/{entry.size}".encode("latin-1")))
+        headers.append((b"content-length", str(end - start).encode("latin-1")))
+
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if method == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+        elif entry.body is not None:
+            body = entry.body if status == 200 else memoryview(entry.body)[start:end]
+            await send({"type": "http.response.body", "body": body})
+        elif status == 200 and "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.pathsend", "path": entry.path})
+        else:
+            mapping = entry.mapping
+            view = memoryview(mapping)
+            for offset in range(start, end, MMAP_CHUNK_SIZE):
+                chunk_end = min(offset + MMAP_CHUNK_SIZE, end)
+                # size() is an fstat of the mapped file: reading past its end
+                # would raise SIGBUS
+                if mapping.size() < chunk_end:
+                    self.invalidate(entry.path)
+                    raise RuntimeError(f"{entry.path} was truncated while it was being served")
+                await send({
+                    "type": "http.response.body",
+                    "body": view[offset:chunk_end],
+                    "more_body": chunk_end < end,
+                })
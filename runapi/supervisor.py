@@ -0,0 +1,410 @@
+"""
+Pre-forking process supervisor for RunApi framework
+"""
+import gc
+import inspect
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional, Set, Union
+
+logger = logging.getLogger("uvicorn.error")
+
+# Signals the supervisor acts on; workers restore the defaults
+_SUPERVISOR_SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD, signal.SIGUSR1)
+
+
+def can_fork() -> bool:
+    """Whether the pre-forking supervisor is available on this platform."""
+    return hasattr(os, "fork")
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """
+    Memory of a process in bytes: ``rss``, and where the platform reports
+    them ``uss`` (pages only this process uses) and ``pss`` (shared pages
+    split between the processes sharing them).
+
+    With a preloaded app, a worker's USS is what forking it actually cost;
+    its RSS also counts the copy-on-write pages shared with the supervisor.
+    """
+    import psutil
+
+    process = psutil.Process(pid)
+    try:
+        info = process.memory_full_info()
+    except psutil.AccessDenied:
+        info = process.memory_info()
+    return {field: getattr(info, field) for field in ("rss", "uss", "pss") if hasattr(info, field)}
+
+
+def _format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f}MB"
+
+
+class _Worker:
+    __slots__ = ("pid", "ready_fd", "ready", "started")
+
+    def __init__(self, pid: int, ready_fd: int):
+        self.pid = pid
+        self.ready_fd = ready_fd
+        self.ready = False
+        self.started = time.monotonic()
+
+
+class Supervisor:
+    """
+    Run an ASGI app in ``workers`` forked uvicorn processes.
+
+    With ``preload`` the app (``"module:attribute"`` or the app object) is
+    built once in the supervisor and inherited by every worker, so route
+    modules and their dependencies are imported once and their memory is
+    shared copy-on-write. ``gc_freeze`` moves those objects to the
+    permanent GC generation before forking, so collections in the workers
+    do not write to (and un-share) their pages. Without ``preload`` each
+    worker imports the app itself, which is what lets a rolling restart
+    pick up new code.
+
+    Workers share one listening socket, or with ``reuse_port`` each binds
+    its own ``SO_REUSEPORT`` socket and the kernel balances connections
+    between them. A worker exits after ``max_requests`` requests (plus up
+    to ``max_requests_jitter``, so workers do not all recycle at once) and
+    is replaced.
+
+    A worker that exits before serving stops the supervisor while the
+    first workers start (the app or the socket is broken). Later, e.g. a
+    rolling restart onto a broken deploy, it is logged and the workers
+    that are already serving are kept.
+
+    Signals: SIGHUP replaces the workers one at a time, each only after
+    its replacement is serving; SIGTERM and SIGINT shut down gracefully
+    (``graceful_timeout`` seconds, then SIGKILL); SIGUSR1 logs the memory
+    of each worker.
+    """
+
+    def __init__(
+        self,
+        app: Union[str, Any],
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int = 1,
+        preload: bool = True,
+        gc_freeze: bool = True,
+        reuse_port: bool = False,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: float = 30.0,
+        memory_report_interval: float = 0.0,
+        **uvicorn_kwargs: Any,
+    ):
+        if not can_fork():
+            raise RuntimeError("The RunApi supervisor needs os.fork(); use uvicorn's --workers on this platform")
+        if reuse_port and not hasattr(socket, "SO_REUSEPORT"):
+            raise RuntimeError("SO_REUSEPORT is not supported on this platform")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.preload = preload
+        self.gc_freeze = gc_freeze
+        self.reuse_port = reuse_port
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.memory_report_interval = memory_report_interval
+        self.uvicorn_kwargs = uvicorn_kwargs
+
+        self.config: Any = None
+        self.socket: Optional[socket.socket] = None
+        self.children: Dict[int, _Worker] = {}
+        # Workers being shut down on purpose; they are not replaced
+        self._retiring: Set[int] = set()
+        # Initial workers that are not serving yet; failing to boot is fatal
+        self._booting: Set[int] = set()
+        self._signals: List[int] = []
+        self._wakeup_r = self._wakeup_w = -1
+        self._stopping = False
+        self._exit_code = 0
+
+    # Supervisor
+
+    def run(self) -> int:
+        """Serve until SIGTERM/SIGINT; returns the process exit code."""
+        import uvicorn
+
+        gc_was_frozen = False
+        if self.preload and isinstance(self.app, str):
+            from uvicorn.importer import import_from_string
+
+            self.app = import_from_string(self.app)
+        options: Dict[str, Any] = {}
+        # Not in every supported uvicorn; without it _stop_workers still SIGKILLs
+        if "timeout_graceful_shutdown" in inspect.signature(uvicorn.Config).parameters:
+            options["timeout_graceful_shutdown"] = int(self.graceful_timeout) or None
+        # Jitter is drawn per worker in _run_worker, on any uvicorn version
+        self.config = uvicorn.Config(
+            self.app,
+            host=self.host,
+            port=self.port,
+            limit_max_requests=self.max_requests or None,
+            **options,
+            **self.uvicorn_kwargs,
+        )
+        if self.preload:
+            # Load (and wrap) the app before forking so workers inherit it
+            self.config.load()
+            if self.gc_freeze:
+                gc.collect()
+                gc.freeze()
+                gc_was_frozen = True
+        if not self.reuse_port:
+            self.socket = self.config.bind_socket()
+
+        self._install_signals()
+        logger.info(
+            "RunApi supervisor [%d] starting %d worker(s) (preload=%s, reuse_port=%s)",
+            os.getpid(), self.workers, self.preload, self.reuse_port,
+        )
+        try:
+            for _ in range(self.workers):
+                self._booting.add(self.spawn_worker().pid)
+            self._loop()
+        finally:
+            self._stop_workers()
+            self._restore_signals()
+            if self.socket is not None:
+                self.socket.close()
+            if gc_was_frozen:
+                gc.unfreeze()
+        logger.info("RunApi supervisor [%d] stopped", os.getpid())
+        return self._exit_code
+
+    def _loop(self):
+        next_report = time.monotonic() + self.memory_report_interval
+        while not self._stopping:
+            self._wait(1.0)
+            self._handle_signals()
+            self._reap()
+            if self.memory_report_interval and time.monotonic() >= next_report:
+                self.log_memory()
+                next_report = time.monotonic() + self.memory_report_interval
+
+    def _wait(self, timeout: float):
+        """Sleep until a signal arrives, a worker reports ready, or ``timeout``."""
+        # A worker whose ready pipe hit EOF died before serving; _reap handles it
+        fds = [self._wakeup_r] + [worker.ready_fd for worker in self.children.values() if worker.ready_fd >= 0]
+        readable, _, _ = select.select(fds, [], [], timeout)
+        for fd in readable:
+            if fd == self._wakeup_r:
+                try:
+                    os.read(fd, 512)
+                except BlockingIOError:
+                    pass
+            else:
+                self._read_ready(fd)
+
+    def _read_ready(self, fd: int):
+        for worker in self.children.values():
+            if worker.ready_fd == fd and not worker.ready:
+                # One byte once serving; EOF if the worker died first
+                if os.read(fd, 1):
+                    worker.ready = True
+                    self._booting.discard(worker.pid)
+                os.close(fd)
+                worker.ready_fd = -1
+                return
+
+    def _handle_signals(self):
+        while self._signals:
+            sig = self._signals.pop(0)
+            if sig in (signal.SIGTERM, signal.SIGINT):
+                logger.info("RunApi supervisor received %s, shutting down", signal.Signals(sig).name)
+                self._stopping = True
+            elif sig == signal.SIGHUP:
+                self.rolling_restart()
+            elif sig == signal.SIGUSR1:
+                self.log_memory()
+
+    def _reap(self):
+        """Collect exited workers and replace the ones that were not retired."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.children.pop(pid, None)
+            if worker is None:
+                continue
+            if worker.ready_fd >= 0:
+                self._read_ready(worker.ready_fd)
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+                continue
+            if self._stopping:
+                continue
+            if not worker.ready:
+                # Respawning would fail the same way (bad app, port in use)
+                if pid in self._booting or not self.children:
+                    logger.error("Worker [%d] failed to boot, stopping", pid)
+                    self._exit_code = 1
+                    self._stopping = True
+                else:
+                    logger.error(
+                        "Worker [%d] failed to boot; serving with %d worker(s)", pid, len(self.children)
+                    )
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.info("Worker [%d] exited (%d), starting a replacement", pid, code)
+            self.spawn_worker()
+
+    def rolling_restart(self):
+        """Replace every worker, one at a time, without dropping connections."""
+        logger.info("Rolling restart of %d worker(s)", len(self.children))
+        for old_pid in list(self.children):
+            if self._stopping:
+                return
+            if old_pid not in self.children:
+                continue  # recycled meanwhile
+            new_worker = self.spawn_worker()
+            if not self._wait_until_ready(new_worker):
+                logger.error("Replacement worker did not start; keeping the remaining workers")
+                return
+            self._retire(old_pid)
+
+    def _wait_until_ready(self, worker: _Worker) -> bool:
+        deadline = time.monotonic() + max(self.graceful_timeout, 10.0)
+        while not worker.ready and time.monotonic() < deadline:
+            if worker.pid not in self.children:
+                return False
+            self._wait(0.1)
+            self._reap()
+            if self._stopping:
+                return False
+        return worker.ready
+
+    def _retire(self, pid: int):
+        self._retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _stop_workers(self):
+        self._stopping = True
+        for pid in list(self.children):
+            self._retire(pid)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self.children):
+            logger.warning("Worker [%d] did not stop in time, killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            os.waitpid(pid, 0)
+            self.children.pop(pid)
+
+    def _install_signals(self):
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        signal.set_wakeup_fd(self._wakeup_w)
+        for sig in _SUPERVISOR_SIGNALS:
+            signal.signal(sig, self._on_signal)
+
+    def _restore_signals(self):
+        signal.set_wakeup_fd(-1)
+        for sig in _SUPERVISOR_SIGNALS:
+            signal.signal(sig, signal.SIG_DFL)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+
+    def _on_signal(self, sig: int, frame: Any):
+        if sig != signal.SIGCHLD:
+            self._signals.append(sig)
+
+    # Memory
+
+    def memory_report(self) -> List[Dict[str, Any]]:
+        """Memory of the supervisor and each live worker (see ``process_memory``)."""
+        report = []
+        for role, pid in [("supervisor", os.getpid())] + [("worker", pid) for pid in sorted(self.children)]:
+            try:
+                report.append({"role": role, "pid": pid, **process_memory(pid)})
+            except Exception:
+                continue  # exited meanwhile
+        return report
+
+    def log_memory(self):
+        for row in self.memory_report():
+            sizes = " ".join(f"{field}={_format_size(row[field])}" for field in ("rss", "uss", "pss") if field in row)
+            logger.info("Memory %s [%d]: %s", row["role"], row["pid"], sizes)
+
+    # Worker
+
+    def spawn_worker(self) -> _Worker:
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            code = 1
+            try:
+                self._run_worker(ready_w)
+                code = 0
+            except SystemExit as exc:
+                code = exc.code if isinstance(exc.code, int) else 1
+            except BaseException:
+                logger.exception("Worker [%d] crashed", os.getpid())
+            finally:
+                os._exit(code)
+        os.close(ready_w)
+        worker = _Worker(pid, ready_r)
+        self.children[pid] = worker
+        return worker
+
+    def _run_worker(self, ready_fd: int):
+        import uvicorn
+
+        # Undo the supervisor's signal setup; uvicorn handles SIGTERM/SIGINT
+        signal.set_wakeup_fd(-1)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        for sig in _SUPERVISOR_SIGNALS:
+            signal.signal(sig, signal.SIG_DFL)
+        for worker in self.children.values():
+            if worker.ready_fd >= 0:
+                os.close(worker.ready_fd)
+        # uvicorn re-raises the signal it stopped for once it has shut down
+        signal.signal(signal.SIGTERM, lambda *args: None)
+        signal.signal(signal.SIGINT, lambda *args: None)
+
+        sock = self._bind_reuse_port() if self.reuse_port else self.socket
+        if self.max_requests and self.max_requests_jitter:
+            # The config is this worker's own copy after the fork
+            self.config.limit_max_requests = self.max_requests + random.randint(0, self.max_requests_jitter)
+
+        class WorkerServer(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets=sockets)
+                if not self.should_exit:
+                    os.write(ready_fd, b"1")
+                    os.close(ready_fd)
+
+        WorkerServer(self.config).run(sockets=[sock])
+
+    def _bind_reuse_port(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family=family)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.config.backlog)
+        return sock
@@ -0,0 +1,137 @@
+"""
+Worker count and server implementation selection for RunApi framework
+"""
+import importlib.util
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+LOOPS = ("auto", "asyncio", "uvloop")
+HTTP_PARSERS = ("auto", "h11", "httptools")
+
+# cgroup v1 reports "no limit" as a huge number close to the page-aligned max
+_UNLIMITED_MEMORY = 1 << 60
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = "/sys/fs/cgroup") -> Optional[float]:
+    """CPUs allowed by the container's CFS quota, or None without a quota."""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    cpu_max = _read(f"{root}/cpu.max")
+    if cpu_max is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota == "max" or not period:
+            return None
+        return int(quota) / int(period)
+    # cgroup v1
+    quota = _read(f"{root}/cpu/cpu.cfs_quota_us") or _read(f"{root}/cpu,cpuacct/cpu.cfs_quota_us")
+    period = _read(f"{root}/cpu/cpu.cfs_period_us") or _read(f"{root}/cpu,cpuacct/cpu.cfs_period_us")
+    if quota is None or period is None or int(quota) <= 0:
+        return None
+    return int(quota) / int(period)
+
+
+def cgroup_memory_limit(root: str = "/sys/fs/cgroup") -> Optional[int]:
+    """The container's memory limit in bytes, or None without one."""
+    limit = _read(f"{root}/memory.max") or _read(f"{root}/memory/memory.limit_in_bytes")
+    if limit is None or limit == "max" or int(limit) >= _UNLIMITED_MEMORY:
+        return None
+    return int(limit)
+
+
+def available_cpus() -> float:
+    """CPUs this process may use: its affinity mask, capped by the cgroup quota."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus: float = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    if quota is not None:
+        cpus = min(cpus, quota)
+    return cpus
+
+
+def available_memory() -> Optional[int]:
+    """Memory available for new processes in bytes, capped by the cgroup limit."""
+    available = None
+    try:
+        import psutil
+
+        available = psutil.virtual_memory().available
+    except Exception:
+        pass
+    limit = cgroup_memory_limit()
+    if limit is not None:
+        available = limit if available is None else min(available, limit)
+    return available
+
+
+def auto_workers(worker_memory: int = 256 * 1024 * 1024) -> Tuple[int, str]:
+    """
+    Worker count for ``--workers auto`` and how it was derived.
+
+    One worker per available CPU (an async worker keeps its CPU busy on its
+    own), rounded down so a fractional CFS quota does not throttle every
+    worker, and no more workers than fit in the available memory at
+    ``worker_memory`` bytes each. Always at least one.
+    """
+    cpus = available_cpus()
+    workers = max(1, math.floor(cpus))
+    reason = f"{cpus:g} CPU" + ("" if cpus == 1 else "s")
+    memory = available_memory()
+    if memory is not None and worker_memory > 0:
+        fit = max(1, memory // worker_memory)
+        reason += f", {memory / (1024 ** 3):.1f} GB free"
+        if fit < workers:
+            workers = fit
+            reason += f" (fits {fit})"
+    return workers, reason
+
+
+def resolve_workers(value: str, worker_memory: int = 256 * 1024 * 1024) -> Tuple[int, str]:
+    """Turn a ``WORKERS`` setting (a number or ``"auto"``) into a count and a description."""
+    if str(value).strip().lower() == "auto":
+        workers, reason = auto_workers(worker_memory)
+        return workers, f"auto: {reason}"
+    try:
+        workers = int(value)
+    except ValueError:
+        workers = 0
+    if workers < 1:
+        raise ValueError(f"Invalid worker count {value!r}; expected a positive number or 'auto'")
+    return workers, ""
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def select_loop(preference: str = "auto") -> str:
+    """Resolve an event loop setting to what uvicorn will run: uvloop when installed."""
+    if preference not in LOOPS:
+        raise ValueError(f"Unknown event loop {preference!r}; expected one of {', '.join(LOOPS)}")
+    if preference == "auto":
+        uvloop_usable = sys.platform != "win32" and sys.implementation.name != "pypy"
+        return "uvloop" if uvloop_usable and _installed("uvloop") else "asyncio"
+    if preference == "uvloop" and not _installed("uvloop"):
+        raise ValueError("uvloop is not installed (pip install uvloop)")
+    return preference
+
+
+def select_http(preference: str = "auto") -> str:
+    """Resolve an HTTP parser setting to what uvicorn will run: httptools when installed."""
+    if preference not in HTTP_PARSERS:
+        raise ValueError(f"Unknown HTTP parser {preference!r}; expected one of {', '.join(HTTP_PARSERS)}")
+    if preference == "auto":
+        return "httptools" if _installed("httptools") else "h11"
+    if preference == "httptools" and not _installed("httptools"):
+        raise ValueError("httptools is not installed (pip install httptools)")
+    return preference
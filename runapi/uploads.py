@@ -0,0 +1,460 @@
+"""
+Streaming file uploads for RunApi framework
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import APIRouter, Request, Response
+
+from .config import RunApiConfig, get_config
+from .errors import ConflictError, NotFoundError, PayloadTooLargeError, ValidationError
+from .serialization import json_response_class
+
+RESUMABLE_DIR = ".resumable"
+_UPLOAD_ID = re.compile(r"^[A-Za-z0-9_-]{22}$")
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def safe_filename(filename: Optional[str], default: str = "upload") -> str:
+    """A client-supplied file name reduced to a safe base name."""
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    name = _UNSAFE_FILENAME.sub("_", name).strip("._")
+    return name[:200] or default
+
+
+class UploadedFile:
+    """A file stored under ``UPLOAD_PATH``, with checksums computed while it streamed."""
+
+    __slots__ = ("path", "filename", "size", "content_type", "checksums")
+
+    def __init__(self, path: Path, filename: str, size: int, content_type: str, checksums: Dict[str, str]):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.content_type = content_type
+        self.checksums = checksums
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "path": str(self.path),
+            "size": self.size,
+            "content_type": self.content_type,
+            "checksums": self.checksums,
+        }
+
+
+class _FileSink:
+    """
+    Write a stream to disk in ``chunk_size`` blocks, hashing as it goes.
+
+    Data is buffered up to one block, then written and hashed on a worker
+    thread (hashlib releases the GIL), so memory stays at about one block
+    whatever the upload size.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        algorithms: Iterable[str],
+        chunk_size: int,
+        max_size: int,
+        append: bool = False,
+        hashers: Optional[Dict[str, Any]] = None,
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.hashers = hashers if hashers is not None else {name: hashlib.new(name) for name in algorithms}
+        self.size = path.stat().st_size if append else 0
+        self._file = open(path, "ab" if append else "wb")
+        self._buffer = bytearray()
+        self._loop = asyncio.get_running_loop()
+
+    def _flush(self, block: bytes):
+        self._file.write(block)
+        for hasher in self.hashers.values():
+            hasher.update(block)
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            raise PayloadTooLargeError(details={"max_size": self.max_size})
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            block = bytes(self._buffer)
+            self._buffer.clear()
+            await self._loop.run_in_executor(None, self._flush, block)
+
+    async def close(self) -> Dict[str, str]:
+        """Flush and close; returns the hex digests."""
+        if self._buffer:
+            block = bytes(self._buffer)
+            self._buffer.clear()
+            await self._loop.run_in_executor(None, self._flush, block)
+        self._file.close()
+        return {name: hasher.hexdigest() for name, hasher in self.hashers.items()}
+
+    def close_now(self):
+        """Flush and close without awaiting (the request is being torn down)."""
+        self._flush(bytes(self._buffer))
+        self._buffer.clear()
+        self._file.close()
+
+    def abort(self):
+        self._file.close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+class UploadManager:
+    """
+    Stream request bodies to ``UPLOAD_PATH`` with constant memory.
+
+    ``receive`` stores a raw request body, ``receive_multipart`` the file
+    parts of a ``multipart/form-data`` body; both reject a body over
+    ``MAX_UPLOAD_SIZE`` from its ``Content-Length`` before reading it, or at
+    the chunk that crosses the limit, and compute ``UPLOAD_CHECKSUMS``
+    incrementally. Files are written under a temporary name and only moved
+    into place once complete.
+
+    Resumable uploads (``create``/``append``, or the routes from ``router``)
+    take a file in several requests, each continuing at the stored offset,
+    so an interrupted upload resumes instead of starting over.
+    """
+
+    def __init__(
+        self,
+        upload_path: Optional[str] = None,
+        max_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        checksums: Optional[Iterable[str]] = None,
+        config: Optional[RunApiConfig] = None,
+    ):
+        config = config or get_config()
+        self.upload_path = Path(upload_path or config.upload_path)
+        self.max_size = config.max_upload_size if max_size is None else max_size
+        self.chunk_size = chunk_size or config.upload_chunk_size
+        self.checksums = [name.strip().lower() for name in (checksums or config.upload_checksums)]
+        self.response_class = json_response_class(config.json_engine)
+        for name in self.checksums:
+            if name not in hashlib.algorithms_available:
+                raise ValueError(f"Unknown checksum algorithm {name!r}")
+        # Running hashes of resumable uploads, valid while their offset matches
+        self._resumable_hashers: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._resumable_locks: Dict[str, asyncio.Lock] = {}
+
+    def _check_length(self, request: Request, max_size: int):
+        length = request.headers.get("content-length")
+        if max_size and length is not None and length.isdigit() and int(length) > max_size:
+            raise PayloadTooLargeError(details={"max_size": max_size})
+
+    def _temporary_path(self, filename: str) -> Path:
+        self.upload_path.mkdir(parents=True, exist_ok=True)
+        return self.upload_path / f".{secrets.token_hex(8)}.{filename}.part"
+
+    def _final_path(self, filename: str) -> Path:
+        path = self.upload_path / filename
+        if path.exists():
+            stem, suffix = os.path.splitext(filename)
+            path = self.upload_path / f"{stem}-{secrets.token_hex(4)}{suffix}"
+        return path
+
+    def _store(self, temporary: Path, filename: str, size: int, content_type: str, checksums: Dict[str, str]) -> UploadedFile:
+        path = self._final_path(filename)
+        os.replace(temporary, path)
+        return UploadedFile(path, filename, size, content_type, checksums)
+
+    async def receive(
+        self,
+        request: Request,
+        filename: Optional[str] = None,
+        max_size: Optional[int] = None,
+    ) -> UploadedFile:
+        """Stream the raw request body to a file."""
+        max_size = self.max_size if max_size is None else max_size
+        self._check_length(request, max_size)
+        filename = safe_filename(filename)
+        sink = _FileSink(self._temporary_path(filename), self.checksums, self.chunk_size, max_size)
+        try:
+            async for chunk in request.stream():
+                await sink.write(chunk)
+            checksums = await sink.close()
+        except BaseException:
+            sink.abort()
+            raise
+        content_type = request.headers.get("content-type", "application/octet-stream")
+        return self._store(sink.path, filename, sink.size, content_type, checksums)
+
+    async def receive_multipart(
+        self,
+        request: Request,
+        max_size: Optional[int] = None,
+        max_field_size: int = 1024 * 1024,
+    ) -> Tuple[Dict[str, str], Dict[str, List[UploadedFile]]]:
+        """
+        Stream a ``multipart/form-data`` body: file parts go straight to
+        disk, other fields (up to ``max_field_size`` bytes each) are
+        returned as strings. Returns ``(fields, files)`` keyed by field name.
+        A malformed or truncated body, or a part without a name, raises
+        ``ValidationError`` after removing the files already written.
+        """
+        from python_multipart.exceptions import FormParserError
+        from python_multipart.multipart import MultipartParser, parse_options_header
+
+        max_size = self.max_size if max_size is None else max_size
+        self._check_length(request, max_size)
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise ValidationError("Expected a multipart/form-data body with a boundary")
+
+        # Parser callbacks only record events; they are handled (with awaits) after each write
+        events: List[Tuple[str, Any]] = []
+        header_field = bytearray()
+        header_value = bytearray()
+        part_headers: Dict[bytes, bytes] = {}
+
+        def on_header_field(data: bytes, start: int, end: int):
+            header_field.extend(data[start:end])
+
+        def on_header_value(data: bytes, start: int, end: int):
+            header_value.extend(data[start:end])
+
+        def on_header_end():
+            part_headers[bytes(header_field).lower()] = bytes(header_value)
+            header_field.clear()
+            header_value.clear()
+
+        callbacks: Dict[str, Callable] = {
+            "on_part_begin": lambda: part_headers.clear(),
+            "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+            "on_part_end": lambda: events.append(("end", b"")),
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": lambda: events.append(("headers", dict(part_headers))),
+            "on_end": lambda: events.append(("done", b"")),
+        }
+        parser = MultipartParser(boundary, callbacks)
+
+        fields: Dict[str, str] = {}
+        files: Dict[str, List[UploadedFile]] = {}
+        # Bytes of all parts, checked against max_size
+        total = 0
+        name = ""
+        field: Optional[bytearray] = None
+        sink: Optional[_FileSink] = None
+        part: Optional[Tuple[str, str]] = None
+        # Set once the closing boundary has been parsed
+        complete = False
+        try:
+            async for chunk in request.stream():
+                try:
+                    parser.write(chunk)
+                except FormParserError as e:
+                    raise ValidationError(f"Malformed multipart body: {e}")
+                for kind, data in events:
+                    if kind == "headers":
+                        _, disposition = parse_options_header(data.get(b"content-disposition"))
+                        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                        if not name:
+                            raise ValidationError("Multipart part without a name")
+                        if b"filename" in disposition:
+                            filename = safe_filename(disposition[b"filename"].decode("utf-8", "replace"))
+                            part_type = data.get(b"content-type", b"application/octet-stream").decode("latin-1")
+                            sink = _FileSink(self._temporary_path(filename), self.checksums, self.chunk_size, 0)
+                            part = (filename, part_type)
+                        else:
+                            field = bytearray()
+                    elif kind == "data":
+                        total += len(data)
+                        if max_size and total > max_size:
+                            raise PayloadTooLargeError(details={"max_size": max_size})
+                        if sink is not None:
+                            await sink.write(data)
+                        elif field is not None:
+                            field += data
+                            if len(field) > max_field_size:
+                                raise PayloadTooLargeError(f"Form field {name!r} too large", {"max_size": max_field_size})
+                    elif kind == "done":
+                        complete = True
+                    elif sink is not None:
+                        checksums = await sink.close()
+                        stored = self._store(sink.path, part[0], sink.size, part[1], checksums)
+                        files.setdefault(name, []).append(stored)
+                        sink = None
+                    elif field is not None:
+                        fields[name] = field.decode("utf-8", "replace")
+                        field = None
+                events.clear()
+            parser.finalize()
+            if not complete:
+                raise ValidationError("Incomplete multipart body")
+        except BaseException:
+            if sink is not None:
+                sink.abort()
+            for stored in (stored for group in files.values() for stored in group):
+                stored.path.unlink(missing_ok=True)
+            raise
+        return fields, files
+
+    # Resumable uploads
+
+    @property
+    def _resumable_path(self) -> Path:
+        return self.upload_path / RESUMABLE_DIR
+
+    def _session(self, upload_id: str) -> Tuple[Path, Path, Dict[str, Any]]:
+        if not _UPLOAD_ID.match(upload_id):
+            raise NotFoundError("Unknown upload")
+        data_path = self._resumable_path / f"{upload_id}.part"
+        info_path = self._resumable_path / f"{upload_id}.json"
+        try:
+            info = json.loads(info_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            raise NotFoundError("Unknown upload")
+        return data_path, info_path, info
+
+    def create(self, length: int, filename: Optional[str] = None, content_type: str = "application/octet-stream") -> str:
+        """Start a resumable upload of ``length`` bytes; returns its id."""
+        if length < 0:
+            raise ValidationError("Upload length must not be negative")
+        if self.max_size and length > self.max_size:
+            raise PayloadTooLargeError(details={"max_size": self.max_size})
+        self._resumable_path.mkdir(parents=True, exist_ok=True)
+        upload_id = secrets.token_urlsafe(16)
+        info = {
+            "length": length,
+            "filename": safe_filename(filename),
+            "content_type": content_type,
+            "created": time.time(),
+        }
+        (self._resumable_path / f"{upload_id}.part").touch()
+        (self._resumable_path / f"{upload_id}.json").write_text(json.dumps(info), encoding="utf-8")
+        return upload_id
+
+    def offset(self, upload_id: str) -> Tuple[int, int]:
+        """``(bytes received, total length)`` of a resumable upload."""
+        data_path, _, info = self._session(upload_id)
+        return data_path.stat().st_size, info["length"]
+
+    def _rehash(self, path: Path) -> Dict[str, Any]:
+        hashers = {name: hashlib.new(name) for name in self.checksums}
+        with open(path, "rb") as file:
+            while True:
+                block = file.read(self.chunk_size)
+                if not block:
+                    return hashers
+                for hasher in hashers.values():
+                    hasher.update(block)
+
+    async def append(self, upload_id: str, offset: int, request: Request) -> Tuple[int, Optional[UploadedFile]]:
+        """
+        Add the request body to a resumable upload at ``offset``, which must
+        be the number of bytes already received. Returns the new offset and,
+        once the declared length is reached, the stored file.
+        """
+        lock = self._resumable_locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            data_path, info_path, info = self._session(upload_id)
+            received = data_path.stat().st_size
+            if offset != received:
+                raise ConflictError("Upload offset mismatch", {"offset": received})
+            # Running hashes survive between requests in this process; after
+            # a restart (or on another worker) they are rebuilt from disk
+            cached = self._resumable_hashers.pop(upload_id, None)
+            if cached is not None and cached[0] == received:
+                hashers = cached[1]
+            else:
+                hashers = await asyncio.get_running_loop().run_in_executor(None, self._rehash, data_path)
+            sink = _FileSink(data_path, self.checksums, self.chunk_size, info["length"], append=True, hashers=hashers)
+            try:
+                async for chunk in request.stream():
+                    await sink.write(chunk)
+            except PayloadTooLargeError:
+                sink.abort()
+                self.cancel(upload_id)
+                raise
+            except BaseException:
+                # Keep what arrived; the client resumes from the stored offset
+                sink.close_now()
+                self._resumable_hashers[upload_id] = (data_path.stat().st_size, hashers)
+                raise
+            checksums = await sink.close()
+            if sink.size < info["length"]:
+                self._resumable_hashers[upload_id] = (sink.size, hashers)
+                return sink.size, None
+            self._resumable_locks.pop(upload_id, None)
+            info_path.unlink(missing_ok=True)
+            filename = info["filename"]
+            return sink.size, self._store(data_path, filename, sink.size, info["content_type"], checksums)
+
+    def cancel(self, upload_id: str):
+        """Discard a resumable upload."""
+        data_path, info_path, _ = self._session(upload_id)
+        data_path.unlink(missing_ok=True)
+        info_path.unlink(missing_ok=True)
+        self._resumable_hashers.pop(upload_id, None)
+        self._resumable_locks.pop(upload_id, None)
+
+    def router(self, prefix: str = "/uploads") -> APIRouter:
+        """
+        Routes for resumable uploads:
+
+        - ``POST {prefix}`` with ``Upload-Length`` (and optional
+          ``Upload-Filename``) starts one: 201 with ``Location``;
+        - ``HEAD {prefix}/{id}`` returns ``Upload-Offset``/``Upload-Length``;
+        - ``PATCH {prefix}/{id}`` with ``Upload-Offset`` appends the body:
+          204 with the new offset, or 201 and the stored file when complete;
+        - ``DELETE {prefix}/{id}`` discards it.
+        """
+        router = APIRouter(prefix=prefix)
+
+        def header_int(request: Request, name: str) -> int:
+            value = request.headers.get(name, "")
+            if not value.isdigit():
+                raise ValidationError(f"Missing or invalid {name} header")
+            return int(value)
+
+        @router.post("", status_code=201)
+        async def create_upload(request: Request):
+            upload_id = self.create(
+                header_int(request, "upload-length"),
+                request.headers.get("upload-filename"),
+                request.headers.get("upload-content-type", "application/octet-stream"),
+            )
+            location = f"{request.url.path.rstrip('/')}/{upload_id}"
+            return Response(status_code=201, headers={"Location": location, "Upload-Offset": "0"})
+
+        @router.head("/{upload_id}")
+        async def upload_offset(upload_id: str):
+            offset, length = self.offset(upload_id)
+            return Response(headers={
+                "Upload-Offset": str(offset),
+                "Upload-Length": str(length),
+                "Cache-Control": "no-store",
+            })
+
+        @router.patch("/{upload_id}")
+        async def append_upload(upload_id: str, request: Request):
+            offset, stored = await self.append(upload_id, header_int(request, "upload-offset"), request)
+            if stored is None:
+                return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+            return self.response_class(stored.to_dict(), status_code=201, headers={"Upload-Offset": str(offset)})
+
+        @router.delete("/{upload_id}", status_code=204)
+        async def cancel_upload(upload_id: str):
+            self.cancel(upload_id)
+            return Response(status_code=204)
+
+        return router
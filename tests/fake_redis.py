@@ -0,0 +1,176 @@
+"""
+Minimal in-process fake Redis server for tests.
+
+Speaks RESP2 over TCP and implements the commands RunApi's Redis backends
+use. Lua scripts are not interpreted: the rate limit scripts are recognised
+by their SHA1 and emulated with the matching Python algorithm, which the
+scripts mirror exactly.
+"""
+import asyncio
+import fnmatch
+import hashlib
+import threading
+import time
+
+
+class FakeRedisServer:
+    def __init__(self):
+        self.data = {}  # key -> (value, expires_at or None)
+        self.scripts = {}  # sha -> algorithm name
+        self.commands = []
+        self.loop = None
+        self.server = None
+        self.port = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        self.loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join(5)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        finally:
+            self.loop.close()
+
+    async def _serve(self):
+        self._stopped = asyncio.Event()
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._stopped.wait()
+        self.server.close()
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                writer.write(self._encode(self._dispatch(command)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _encode(self, value):
+        if isinstance(value, Exception):
+            return b"-" + str(value).encode() + b"\r\n"
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, str):
+            return b"+" + value.encode() + b"\r\n"
+        if isinstance(value, bytes):
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"*%d\r\n" % len(value) + b"".join(self._encode(item) for item in value)
+
+    def _get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self.data[key]
+            return None
+        return value
+
+    def _dispatch(self, args):
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        args = args[1:]
+
+        if name in ("PING",):
+            return "PONG"
+        if name in ("AUTH", "SELECT"):
+            return "OK"
+        if name == "GET":
+            return self._get(args[0])
+        if name == "MGET":
+            return [self._get(key) for key in args]
+        if name == "SET":
+            expires_at = None
+            options = [arg.decode().upper() for arg in args[2:]]
+            if "PX" in options:
+                expires_at = time.time() + int(options[options.index("PX") + 1]) / 1000
+            if "EX" in options:
+                expires_at = time.time() + int(options[options.index("EX") + 1])
+            self.data[args[0]] = (args[1], expires_at)
+            return "OK"
+        if name == "DEL":
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == "SCAN":
+            pattern = args[args.index(b"MATCH") + 1].decode() if b"MATCH" in args else "*"
+            keys = [key for key in list(self.data) if fnmatch.fnmatchcase(key.decode(), pattern)]
+            return [b"0", keys]
+        if name == "SCRIPT":
+            return self._load_script(args[1])
+        if name == "EVAL":
+            sha = self._load_script(args[0])
+            if isinstance(sha, Exception):
+                return sha
+            return self._run_script(sha.decode(), args[1:])
+        if name == "EVALSHA":
+            sha = args[0].decode()
+            if sha not in self.scripts:
+                return Exception("NOSCRIPT No matching script. Please use EVAL.")
+            return self._run_script(sha, args[1:])
+        return Exception(f"ERR unknown command '{name}'")
+
+    def _load_script(self, script):
+        from runapi.ratelimit import _REDIS_SCRIPTS
+
+        sha = hashlib.sha1(script).hexdigest()
+        for algorithm, source in _REDIS_SCRIPTS.items():
+            if source.encode() == script:
+                self.scripts[sha] = algorithm
+                return sha.encode()
+        return Exception("ERR fake server cannot run arbitrary Lua")
+
+    def _run_script(self, sha, args):
+        from runapi.ratelimit import get_rate_limit_algorithm
+
+        key_count = int(args[0])
+        key = args[1]
+        calls, period, now = args[1 + key_count:]
+        algorithm = get_rate_limit_algorithm(self.scripts[sha], int(calls), float(period))
+        now = float(now)
+
+        packed = self._get(key)
+        state = algorithm.unpack(packed) if packed else algorithm.create(now)
+        allowed, remaining, reset_time = algorithm.hit(state, now)
+        self.data[key] = (algorithm.pack(state), None)
+        return [int(allowed), remaining, repr(reset_time).encode()]
@@ -5,12 +5,14 @@ Tests core features including routing, middleware, authentication, and configura
 
 import asyncio
 import os
+import time
 import tempfile
 import shutil
 from pathlib import Path
 import json
 import httpx
 import pytest
+from fastapi import FastAPI, Request, Response
 from fastapi.testclient import TestClient
 
 
@@ -101,6 +103,155 @@ def test_authentication_system():
     print("✅ Authentication system test passed!")
 
 
+def test_token_cache():
+    """Test the verified-token cache"""
+    print("🧪 Testing token cache...")
+
+    from unittest import mock
+    from runapi import JWTManager, TokenCache, AuthMiddleware
+
+    manager = JWTManager(secret_key="token-cache-secret")
+    token = manager.create_access_token({"sub": "user123"})
+
+    with mock.patch("runapi.auth.jwt.decode", wraps=__import__("jose").jwt.decode) as decode:
+        for _ in range(5):
+            assert manager.verify_token(token)["sub"] == "user123"
+        assert decode.call_count == 1
+
+    stats = manager.token_cache.stats()
+    assert stats["hits"] == 4 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.8
+
+    # Cached payloads are copies
+    manager.verify_token(token)["sub"] = "mallory"
+    assert manager.verify_token(token)["sub"] == "user123"
+
+    # Key rotation invalidates every entry
+    manager.secret_key = "rotated-secret"
+    assert manager.verify_token(token) is None
+    assert manager.token_cache.stats()["invalidations"] == 1
+
+    # Entries expire with the token, bounded by the cache TTL and size
+    cache = TokenCache(max_size=2, ttl=60)
+    cache.bind("key")
+    cache.set("expired", {"exp": time.time() - 1})
+    assert cache.get("expired") is None
+    cache.set("a", {"sub": "a"})
+    cache.set("b", {"sub": "b"})
+    cache.set("c", {"sub": "c"})
+    assert cache.get("a") is None and cache.get("c") == {"sub": "c"}
+    assert cache.stats()["evictions"] == 1
+
+    # The middleware shares the same cache type
+    middleware = AuthMiddleware(FastAPI(), secret_key="token-cache-secret")
+    assert isinstance(middleware.token_cache, TokenCache)
+    assert middleware._verify_token(token)["sub"] == "user123"
+    assert middleware._verify_token(token)["sub"] == "user123"
+    assert middleware.token_cache.stats()["hits"] == 1
+
+    print("✅ Token cache test passed!")
+
+
+def test_async_password_hashing():
+    """Test password hashing on the bounded pool"""
+    print("🧪 Testing async password hashing...")
+
+    from runapi import PasswordManager, PasswordHashPool, ServiceUnavailableError
+
+    pool = PasswordHashPool(max_workers=1, max_queue=1, queue_timeout=0.05)
+    manager = PasswordManager(schemes=["pbkdf2_sha256"], hash_pool=pool)
+
+    async def exercise():
+        hashed = await manager.ahash_password("s3cret")
+        assert await manager.averify_password("s3cret", hashed)
+        assert not await manager.averify_password("wrong", hashed)
+        assert manager.verify_password("s3cret", hashed)
+
+        # One running, one queued; the third caller is shed after the timeout
+        results = await asyncio.gather(
+            *(pool.run(time.sleep, 0.2) for _ in range(3)), return_exceptions=True
+        )
+        assert sum(isinstance(result, ServiceUnavailableError) for result in results) == 1
+        assert results[-1].status_code == 503
+        assert results[-1].headers == {"Retry-After": "1"}
+        return results[-1]
+
+    try:
+        rejected = asyncio.run(exercise())
+        stats = pool.stats()
+        assert stats["rejected"] == 1 and stats["peak_pending"] == 2 and stats["pending"] == 0
+    finally:
+        pool.shutdown()
+
+    # The 503 tells clients when to retry
+    from runapi import setup_error_handlers
+
+    app = FastAPI()
+    setup_error_handlers(app)
+
+    @app.post("/login")
+    async def login():
+        raise rejected
+
+    with TestClient(app) as client:
+        response = client.post("/login")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert response.json()["error"]["code"] == "SERVICE_UNAVAILABLE"
+
+    print("✅ Async password hashing test passed!")
+
+
+def test_path_matcher():
+    """Test compiled protected/excluded path matching"""
+    print("🧪 Testing path matcher...")
+
+    import random
+    from runapi import PathMatcher, AuthMiddleware
+
+    # Literal prefixes behave exactly like startswith
+    rng = random.Random(7)
+    segments = ["api", "v1", "v2", "users", "admin", "a", "ab"]
+    patterns = ["/" + "/".join(rng.choices(segments, k=rng.randint(1, 3))) for _ in range(200)]
+    paths = ["/" + "/".join(rng.choices(segments, k=rng.randint(0, 4))) for _ in range(500)]
+    matcher = PathMatcher(patterns, prefix=True)
+    for path in paths:
+        assert matcher.matches(path) == any(path.startswith(pattern) for pattern in patterns), path
+
+    exact = PathMatcher(["/docs", "/docs/oauth2-redirect", "/health"], prefix=False)
+    assert "/docs" in exact and "/docs/oauth2-redirect" in exact
+    assert "/docs/x" not in exact and "/doc" not in exact
+
+    globs = PathMatcher(["/users/{id}/settings", "/files/*.txt", "/static/**", "/v?/ping"], prefix=False)
+    assert globs.matches("/users/42/settings")
+    assert not globs.matches("/users//settings")
+    assert not globs.matches("/users/42/7/settings")
+    assert globs.matches("/files/a.txt") and not globs.matches("/files/dir/a.txt")
+    assert globs.matches("/static/css/site.css")
+    assert globs.matches("/v1/ping") and not globs.matches("/v10/ping")
+    assert not PathMatcher([], prefix=True).matches("/anything")
+
+    middleware = AuthMiddleware(
+        FastAPI(),
+        secret_key="path-secret",
+        protected_paths=["/api", "/users/{id}/private"],
+        excluded_paths=["/api/auth/login", "/api/public/**"],
+        decision_cache_size=2,
+    )
+    assert middleware._is_protected_path("/api/orders")
+    assert middleware._is_protected_path("/users/1/private/notes")
+    assert not middleware._is_protected_path("/users/1/profile")
+    assert not middleware._is_protected_path("/api/auth/login")
+    assert not middleware._is_protected_path("/api/public/docs/intro")
+    assert len(middleware._decisions) == 2
+
+    everything = AuthMiddleware(FastAPI(), secret_key="path-secret")
+    assert everything._is_protected_path("/api/orders")
+    assert not everything._is_protected_path("/docs")
+
+    print("✅ Path matcher test passed!")
+
+
 def test_file_based_routing():
     """Test file-based routing system"""
     print("🧪 Testing file-based routing...")
@@ -211,6 +362,596 @@ def test_middleware_system():
     print("✅ Middleware system test passed!")
 
 
+def test_pure_asgi_middleware_hooks():
+    """Test pure ASGI middleware hooks"""
+    print("🧪 Testing pure ASGI middleware hooks...")
+
+    from fastapi.responses import StreamingResponse
+    from runapi import create_runapi_app, RunApiMiddleware, JSONResponse
+
+    class HookMiddleware(RunApiMiddleware):
+        async def process_request(self, request):
+            if request.url.path == "/blocked":
+                return JSONResponse({"blocked": True}, status_code=403)
+            request.state.hook_seen = True
+            return None
+
+        def process_response(self, request, status_code, headers):
+            headers["X-Hook-Status"] = str(status_code)
+
+    app = create_runapi_app()
+    app.add_middleware(HookMiddleware)
+    fastapi_app = app.get_app()
+
+    @fastapi_app.get("/hooked")
+    async def hooked(request: Request):
+        return {"seen": request.state.hook_seen}
+
+    @fastapi_app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i};"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    with TestClient(fastapi_app) as client:
+        response = client.get("/hooked")
+        assert response.status_code == 200
+        assert response.json() == {"seen": True}
+        assert response.headers.get("X-Hook-Status") == "200"
+        assert response.headers.get("X-Content-Type-Options") == "nosniff"
+
+        response = client.get("/blocked")
+        assert response.status_code == 403
+        assert "X-Hook-Status" not in response.headers
+
+        response = client.get("/stream")
+        assert response.text == "chunk0;chunk1;chunk2;"
+        assert response.headers.get("X-Hook-Status") == "200"
+
+    print("✅ Pure ASGI middleware hooks test passed!")
+
+
+def test_fused_middleware_pipeline():
+    """Test fused single-pass middleware pipeline"""
+    print("🧪 Testing fused middleware pipeline...")
+
+    from runapi import create_runapi_app, RunApiConfig, FusedMiddleware
+
+    config = RunApiConfig()
+    config.middleware_fused = True
+    config.middleware_timing = True
+    config.rate_limit_enabled = True
+    config.rate_limit_calls = 2
+    config.cors_origins = ["http://localhost:3000"]
+    config.cors_credentials = True
+
+    app = create_runapi_app(config=config)
+    fastapi_app = app.get_app()
+    assert [m.cls for m in fastapi_app.user_middleware] == [FusedMiddleware]
+
+    @fastapi_app.get("/fused")
+    async def fused():
+        return {"data": "x" * 1000}
+
+    with TestClient(fastapi_app) as client:
+        response = client.get(
+            "/fused",
+            headers={"Origin": "http://localhost:3000", "Accept-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"data": "x" * 1000}
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == "1"
+        assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+        assert response.headers["Access-Control-Allow-Credentials"] == "true"
+        assert "X-Process-Time" in response.headers
+
+        response = client.options(
+            "/fused",
+            headers={
+                "Origin": "http://localhost:3000",
+                "Access-Control-Request-Method": "GET",
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:3000"
+
+        response = client.get("/fused")
+        assert response.status_code == 429
+        assert response.headers["X-Frame-Options"] == "DENY"
+
+    timings = app.middleware_timings.snapshot()
+    assert app.middleware_timings.requests == 3
+    for stage in ["rate_limit", "cors", "headers", "compression", "app", "total"]:
+        assert stage in timings
+
+    print("✅ Fused middleware pipeline test passed!")
+
+
+def test_rate_limit_store_bounded():
+    """Test sharded rate limit store expiry and eviction"""
+    print("🧪 Testing rate limit store...")
+
+    from runapi import RateLimitStore, FixedWindowAlgorithm
+
+    store = RateLimitStore(FixedWindowAlgorithm(2, 60), max_keys=64, shards=4)
+
+    # Fixed window semantics
+    assert store.hit("client", 1000.0) == (True, 1, 1060.0)
+    assert store.hit("client", 1001.0) == (True, 0, 1060.0)
+    assert store.hit("client", 1002.0) == (False, 0, 1060.0)
+    assert store.hit("client", 1061.0) == (True, 1, 1121.0)
+
+    # Memory stays bounded by max_keys with LRU eviction
+    for i in range(10000):
+        store.hit(f"10.0.{i // 256}.{i % 256}", 1061.0)
+    assert len(store) <= 64
+    assert store.evictions > 0
+
+    # Stale windows are swept
+    store.purge_expired(5000.0)
+    assert len(store) == 0
+    assert store.expirations > 0
+
+    print("✅ Rate limit store test passed!")
+
+
+def test_rate_limit_algorithms():
+    """Test pluggable rate limit algorithms"""
+    print("🧪 Testing rate limit algorithms...")
+
+    from runapi import get_rate_limit_algorithm, RateLimitMiddleware
+
+    for name in ["fixed_window", "sliding_window", "token_bucket", "gcra"]:
+        algorithm = get_rate_limit_algorithm(name, calls=5, period=10)
+        state = algorithm.create(1000.0)
+        results = [algorithm.hit(state, 1000.0) for _ in range(6)]
+        assert [allowed for allowed, _, _ in results] == [True] * 5 + [False], name
+        assert [remaining for _, remaining, _ in results[:5]] == [4, 3, 2, 1, 0], name
+        assert results[5][2] > 1000.0, name
+
+    # Sliding window counter: no 2x burst right after the boundary
+    algorithm = get_rate_limit_algorithm("sliding_window", calls=5, period=10)
+    state = algorithm.create(1009.0)
+    for _ in range(5):
+        assert algorithm.hit(state, 1009.0)[0]
+    assert not algorithm.hit(state, 1010.5)[0]
+
+    # Token bucket and GCRA: one request is released per emission interval
+    for name in ["token_bucket", "gcra"]:
+        algorithm = get_rate_limit_algorithm(name, calls=5, period=10)
+        state = algorithm.create(1000.0)
+        for _ in range(5):
+            algorithm.hit(state, 1000.0)
+        assert not algorithm.hit(state, 1001.0)[0], name
+        assert algorithm.hit(state, 1002.0)[0], name
+        assert not algorithm.hit(state, 1002.0)[0], name
+
+    middleware = RateLimitMiddleware(None, calls=5, period=10, algorithm="gcra")
+    assert middleware.algorithm.name == "gcra"
+
+    with pytest.raises(ValueError):
+        get_rate_limit_algorithm("leaky")
+
+    print("✅ Rate limit algorithms test passed!")
+
+
+def test_shared_memory_rate_limit_store():
+    """Test rate limit state shared between worker processes"""
+    print("🧪 Testing shared memory rate limit store...")
+
+    import multiprocessing
+    from runapi import SharedMemoryRateLimitStore, get_rate_limit_algorithm
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "ratelimit")
+        algorithm = get_rate_limit_algorithm("fixed_window", calls=50, period=60)
+        store = SharedMemoryRateLimitStore(algorithm, path=path, max_keys=128)
+
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        workers = [
+            context.Process(target=_shared_rate_limit_worker, args=(path, queue))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        allowed = sum(queue.get(timeout=30) for _ in workers)
+        for worker in workers:
+            worker.join(timeout=30)
+
+        # 4 workers x 40 hits against one key: exactly one limit is enforced
+        assert allowed == 50
+        assert store.hit("client", time.time())[0] is False
+        assert store.hit("other", time.time())[0] is True
+        assert len(store) == 2
+
+        # Probe windows stay bounded when many keys compete for few slots
+        for i in range(1000):
+            store.hit(f"key-{i}", time.time())
+        assert len(store) <= 128 + store.max_probe
+        store.close()
+
+    print("✅ Shared memory rate limit store test passed!")
+
+
+def _shared_rate_limit_worker(path, queue):
+    from runapi import SharedMemoryRateLimitStore, get_rate_limit_algorithm
+
+    algorithm = get_rate_limit_algorithm("fixed_window", calls=50, period=60)
+    store = SharedMemoryRateLimitStore(algorithm, path=path, max_keys=128)
+    queue.put(sum(store.hit("client", time.time())[0] for _ in range(40)))
+
+
+def test_redis_backends():
+    """Test Redis-protocol cache and rate limit backends"""
+    print("🧪 Testing Redis backends...")
+
+    from fake_redis import FakeRedisServer
+    from runapi import (
+        RunApiConfig,
+        RateLimitMiddleware,
+        MemoryCacheBackend,
+        RedisCacheBackend,
+        create_cache_backend,
+    )
+
+    config = RunApiConfig()
+    config.cache_backend = "memory"
+    assert isinstance(create_cache_backend(config), MemoryCacheBackend)
+
+    with FakeRedisServer() as server:
+        config.cache_backend = "redis"
+        config.redis_url = server.url
+        cache = create_cache_backend(config)
+        assert isinstance(cache, RedisCacheBackend)
+
+        async def exercise_cache():
+            await cache.set("answer", b"42", ttl=60)
+            assert await cache.get("answer") == b"42"
+            assert await cache.get_many(["answer", "missing"]) == [b"42", None]
+            await cache.delete("answer")
+            assert await cache.get("answer") is None
+            await cache.set("other", b"1")
+            await cache.clear()
+            assert await cache.get("other") is None
+
+        asyncio.run(exercise_cache())
+
+        # Two "hosts" share one limit through the same Redis server
+        def make_app():
+            app = FastAPI()
+
+            @app.get("/limited")
+            async def limited():
+                return {"ok": True}
+
+            app.add_middleware(
+                RateLimitMiddleware,
+                calls=3,
+                period=60,
+                algorithm="gcra",
+                backend="redis",
+                redis_url=server.url,
+            )
+            return app
+
+        with TestClient(make_app()) as host_a, TestClient(make_app()) as host_b:
+            statuses = [
+                client.get("/limited").status_code
+                for client in [host_a, host_b, host_a, host_b]
+            ]
+            assert statuses == [200, 200, 200, 429]
+            assert host_a.get("/limited").headers.get("Retry-After") is not None
+
+        assert "EVALSHA" in server.commands
+
+    print("✅ Redis backends test passed!")
+
+
+def test_compression_middleware():
+    """Test content negotiation, type filters and memoized compression"""
+    print("🧪 Testing compression middleware...")
+
+    import gzip
+
+    from fastapi.responses import Response, StreamingResponse
+    from runapi import CompressionMiddleware
+    from runapi.compression import (
+        CompressedBodyCache, ContentTypeFilter, GzipCodec, available_encodings, create_codecs, negotiate,
+    )
+
+    gzip_codec = GzipCodec(6)
+    codecs = create_codecs(["br", "zstd", "gzip"])
+    assert [codec.name for codec in codecs] == available_encodings()
+    assert negotiate("gzip, deflate", codecs).name == "gzip"
+    assert negotiate("gzip;q=0", [gzip_codec]) is None
+    assert negotiate("identity", [gzip_codec]) is None
+    assert negotiate("*", [gzip_codec]) is gzip_codec
+    assert negotiate("br;q=0.5, gzip;q=1.0", codecs).name == "gzip"
+    with pytest.raises(ValueError):
+        create_codecs(["lzma"])
+
+    types = ContentTypeFilter(["text/*", "application/json", "application/*+json"], ["text/event-stream"])
+    assert types.allows("application/json; charset=utf-8")
+    assert types.allows("application/problem+json")
+    assert types.allows("TEXT/HTML")
+    assert not types.allows("text/event-stream")
+    assert not types.allows("image/png")
+
+    cache = CompressedBodyCache(max_bytes=4096)
+    body = b"x" * 10000
+    compressed = cache.compress(gzip_codec, body)
+    assert gzip.decompress(compressed) == body
+    assert cache.compress(gzip_codec, body) is compressed and cache.hits == 1
+    for i in range(200):
+        cache.compress(gzip_codec, bytes([i % 256]) * 5000 + str(i).encode())
+    assert cache.size <= 4096
+
+    document = {"items": [{"id": i, "name": f"item {i}"} for i in range(200)]}
+
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_route():
+        return document
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/png")
+    async def png():
+        return Response(b"\x89PNG" + b"0" * 5000, media_type="image/png")
+
+    @app.get("/events")
+    async def events():
+        return Response("data: x\n\n" * 500, media_type="text/event-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(50):
+                yield f"line {i} ".encode() * 20
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(CompressionMiddleware, encodings=["gzip"], minimum_size=500)
+
+    with TestClient(app) as client:
+        response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == document
+        assert int(response.headers["content-length"]) < len(json.dumps(document))
+
+        response = client.get("/json", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.json() == document
+
+        for path in ("/small", "/png", "/events"):
+            response = client.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers, path
+
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.text == "".join(f"line {i} " * 20 for i in range(50))
+
+        # An identical payload is compressed once per worker
+        middleware = app.middleware_stack
+        while not isinstance(middleware, CompressionMiddleware):
+            middleware = middleware.app
+        hits = middleware.cache.hits
+        assert client.get("/json", headers={"Accept-Encoding": "gzip"}).json() == document
+        assert middleware.cache.hits == hits + 1
+
+    print("✅ Compression middleware test passed!")
+
+
+def test_response_cache_middleware():
+    """Test response caching, conditional requests and request coalescing"""
+    print("🧪 Testing response cache middleware...")
+
+    from runapi import CachePolicy, ResponseCacheMiddleware, ResponseCache, MemoryCacheBackend
+
+    calls = {"data": 0, "slow": 0}
+    app = FastAPI()
+
+    @app.get("/data")
+    async def data(q: str = ""):
+        calls["data"] += 1
+        return {"q": q, "payload": "x" * 2000}
+
+    @app.get("/slow")
+    async def slow():
+        calls["slow"] += 1
+        await asyncio.sleep(0.05)
+        return {"slow": True}
+
+    @app.get("/private")
+    async def private():
+        return Response("secret", headers={"Cache-Control": "private"})
+
+    cache = ResponseCache(backend=MemoryCacheBackend(max_bytes=1024 * 1024), ttl=60, vary=["Authorization"])
+    app.add_middleware(ResponseCacheMiddleware, cache=cache, paths=[])
+
+    with TestClient(app) as client:
+        first = client.get("/data?a=1&b=2", headers={"Accept-Encoding": "identity"})
+        assert first.headers["x-cache"] == "MISS"
+        second = client.get("/data?b=2&a=1", headers={"Accept-Encoding": "identity"})
+        assert second.headers["x-cache"] == "HIT"
+        assert second.content == first.content
+        assert calls["data"] == 1
+
+        # Pre-compressed variant with its own ETag
+        gzipped = client.get("/data?a=1&b=2", headers={"Accept-Encoding": "gzip"})
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert gzipped.headers["etag"] != first.headers["etag"]
+        assert gzipped.json() == first.json()
+        assert "Accept-Encoding" in gzipped.headers["vary"]
+        refused = client.get("/data?a=1&b=2", headers={"Accept-Encoding": "br, gzip;q=0"})
+        assert "content-encoding" not in refused.headers
+        assert refused.headers["etag"] == first.headers["etag"]
+
+        # Conditional requests are answered without calling the route
+        not_modified = client.get("/data?a=1&b=2", headers={"If-None-Match": first.headers["etag"]})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert calls["data"] == 1
+
+        # Vary headers split the key
+        client.get("/data?a=1&b=2", headers={"Authorization": "Bearer other"})
+        assert calls["data"] == 2
+
+        # Credentials outside the key bypass the cache unless a route opts in
+        for _ in range(2):
+            response = client.get("/data?a=1&b=2", headers={"Cookie": "session=alice"})
+            assert "x-cache" not in response.headers
+        assert calls["data"] == 4
+        cache.add_policy("/data", CachePolicy(ttl=60, vary=["Cookie"]))
+        client.get("/data?a=1&b=2", headers={"Cookie": "session=alice"})
+        assert client.get("/data?a=1&b=2", headers={"Cookie": "session=alice"}).headers["x-cache"] == "HIT"
+        assert client.get("/data?a=1&b=2", headers={"Cookie": "session=bob"}).headers["x-cache"] == "MISS"
+        cache.remove_policy("/data")
+
+        assert "x-cache" not in client.get("/private").headers
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*(client.get("/slow") for _ in range(10)))
+        assert all(response.json() == {"slow": True} for response in responses)
+
+    asyncio.run(burst())
+    assert calls["slow"] == 1
+    assert cache.stats()["coalesced"] == 9
+
+    # The memory backend evicts least recently used entries over its byte budget
+    backend = MemoryCacheBackend(max_bytes=100)
+
+    async def fill():
+        for i in range(5):
+            await backend.set(f"k{i}", b"x" * 40)
+        assert backend.size <= 100
+        assert await backend.get("k0") is None
+        assert await backend.get("k4") == b"x" * 40
+
+    asyncio.run(fill())
+
+    print("✅ Response cache middleware test passed!")
+
+
+def test_route_cache_declarations():
+    """Test caching declared in route files"""
+    print("🧪 Testing route cache declarations...")
+
+    live_route = """
+calls = []
+cache = {}  # hand-rolled dict cache, not a declaration
+
+async def get():
+    calls.append(1)
+    return {"calls": len(calls)}
+"""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        routes_path = Path(temp_dir) / "routes"
+        (routes_path / "users").mkdir(parents=True)
+
+        (routes_path / "stats.py").write_text("""
+calls = []
+cache = {"ttl": 60, "vary": ["Authorization"]}
+
+async def get():
+    calls.append(1)
+    return {"calls": len(calls)}
+""", encoding="utf-8")
+
+        (routes_path / "users" / "[user_id].py").write_text("""
+from runapi import cached
+
+calls = []
+
+@cached(ttl=30)
+async def get(user_id: str):
+    calls.append(user_id)
+    return {"user_id": user_id, "calls": len(calls)}
+
+async def put(user_id: str):
+    return {"updated": user_id}
+""", encoding="utf-8")
+
+        (routes_path / "live.py").write_text(live_route, encoding="utf-8")
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+
+            from runapi import create_runapi_app
+
+            app = create_runapi_app()
+            assert app.response_cache is not None
+
+            with TestClient(app.get_app()) as client:
+                assert client.get("/stats").json() == {"calls": 1}
+                cached_response = client.get("/stats")
+                assert cached_response.json() == {"calls": 1}
+                assert cached_response.headers["x-cache"] == "HIT"
+                assert "Authorization" in cached_response.headers["vary"]
+                assert client.get("/stats", headers={"Authorization": "Bearer b"}).json() == {"calls": 2}
+
+                assert client.get("/users/1").json()["calls"] == 1
+                assert client.get("/users/1").json()["calls"] == 1
+                assert client.get("/users/2").json()["calls"] == 2
+                assert client.put("/users/1").json() == {"updated": "1"}
+
+                assert client.get("/live").json() == {"calls": 1}
+                assert client.get("/live").json() == {"calls": 2}
+                assert "x-cache" not in client.get("/live").headers
+
+            # OpenAPI and dependency injection are unaffected
+            assert "/users/{user_id}" in app.get_app().openapi()["paths"]
+
+            # A policy declared by a hot-reloaded file takes effect when the
+            # cache was installed at startup; once serving, the middleware
+            # stack is never rebuilt to add it
+            from runapi import RunApiApp, RunApiConfig
+
+            (routes_path / "stats.py").unlink()
+            (routes_path / "users" / "[user_id].py").unlink()
+            for hot_reload in (True, False):
+                (routes_path / "live.py").write_text(live_route, encoding="utf-8")
+                config = RunApiConfig()
+                config.routes_manifest = False
+                config.routes_hot_reload = hot_reload
+                config.routes_hot_reload_interval = 60
+                app = RunApiApp(config=config)
+                assert (app.response_cache is not None) == hot_reload
+
+                with TestClient(app.get_app()) as client:
+                    assert client.get("/live").json() == {"calls": 1}
+                    stack = app.get_app().middleware_stack
+                    (routes_path / "live.py").write_text(live_route.replace("cache = {}", 'cache = {"ttl": 60}'), encoding="utf-8")
+                    assert app.reload_route_file(routes_path / "live.py")
+                    assert client.get("/live").json() == {"calls": 1}
+                    response = client.get("/live")
+                    assert app.get_app().middleware_stack is stack
+                    if hot_reload:
+                        assert response.json() == {"calls": 1} and response.headers["x-cache"] == "HIT"
+                    else:
+                        assert response.json() == {"calls": 2} and "x-cache" not in response.headers
+                        assert app.response_cache is None
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Route cache declarations test passed!")
+
+
 def test_dynamic_routes():
     """Test dynamic route parameters"""
     print("🧪 Testing dynamic routes...")
@@ -279,6 +1020,726 @@ async def put(request: Request):
     print("✅ Dynamic routes test passed!")
 
 
+def test_radix_router():
+    """Test the compiled radix-tree route dispatcher"""
+    print("🧪 Testing radix router...")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        routes_path = Path(temp_dir) / "routes"
+        (routes_path / "users" / "[user_id]").mkdir(parents=True)
+        (routes_path / "docs").mkdir()
+
+        (routes_path / "users" / "me.py").write_text(
+            'async def get(): return {"route": "me"}', encoding="utf-8"
+        )
+        (routes_path / "users" / "[user_id].py").write_text("""
+from runapi import Depends
+
+def current_tenant():
+    return "acme"
+
+async def get(user_id: str, tenant: str = Depends(current_tenant)):
+    return {"route": "user", "user_id": user_id, "tenant": tenant}
+
+async def put(user_id: str):
+    return {"route": "update", "user_id": user_id}
+""", encoding="utf-8")
+        (routes_path / "users" / "[user_id]" / "posts.py").write_text(
+            'async def get(user_id: str): return {"route": "posts", "user_id": user_id}', encoding="utf-8"
+        )
+        (routes_path / "docs" / "[...slug].py").write_text(
+            'async def get(slug: str): return {"route": "docs", "slug": slug}', encoding="utf-8"
+        )
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            from runapi import create_runapi_app
+
+            app = create_runapi_app()
+            assert app.route_dispatcher is not None
+            assert len(app.route_dispatcher.routes) == 5
+
+            @app.get_app().get("/health")
+            async def health():
+                return {"ok": True}
+
+            route, params = app.route_dispatcher.resolve("/users/42/posts", "GET")
+            assert route.path == "/users/{user_id}/posts" and params == {"user_id": "42"}
+            assert app.route_dispatcher.resolve("/users/42/posts", "POST") is None
+
+            with TestClient(app.get_app()) as client:
+                # Static segments win over parameters regardless of load order
+                assert client.get("/users/me").json() == {"route": "me"}
+                assert client.get("/users/7").json() == {"route": "user", "user_id": "7", "tenant": "acme"}
+                assert client.put("/users/me").json() == {"route": "update", "user_id": "me"}
+                assert client.get("/users/7/posts").json() == {"route": "posts", "user_id": "7"}
+                assert client.get("/docs/guide/intro").json() == {"route": "docs", "slug": "guide/intro"}
+
+                # Unmatched requests fall back to FastAPI's router
+                assert client.delete("/users/7").status_code == 405
+                assert client.get("/nope").status_code == 404
+                assert client.get("/health").json() == {"ok": True}
+                assert client.get("/users/7/posts/", follow_redirects=False).status_code == 307
+                assert client.get("/openapi.json").status_code == 200
+
+            paths = app.get_app().openapi()["paths"]
+            assert {"/users/me", "/users/{user_id}", "/users/{user_id}/posts", "/docs/{slug}"} <= set(paths)
+
+            # Root dynamic routes must not hijack routes registered before them
+            (routes_path / "[item_id].py").write_text(
+                'async def get(item_id: str): return {"route": "item", "item_id": item_id}', encoding="utf-8"
+            )
+            app = create_runapi_app()
+            with TestClient(app.get_app()) as client:
+                assert client.get("/widget").json() == {"route": "item", "item_id": "widget"}
+                assert client.get("/openapi.json").json()["openapi"]
+                assert "text/html" in client.get("/docs").headers["content-type"]
+                assert "text/html" in client.get("/redoc").headers["content-type"]
+
+            # Starlette routers without a middleware_stack keep their own dispatch
+            router = app.get_app().router
+            stack = router.middleware_stack
+            del router.middleware_stack
+            app.route_dispatcher = None
+            app._setup_router()
+            assert app.route_dispatcher is None and not hasattr(router, "middleware_stack")
+            router.middleware_stack = stack
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Radix router test passed!")
+
+
+def test_lazy_routes():
+    """Test lazy route registration from a static scan"""
+    print("🧪 Testing lazy routes...")
+
+    from runapi.discovery import scan_route_file
+    from runapi.routing import LazyAPIRoute
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        routes_path = Path(temp_dir) / "routes"
+        (routes_path / "users").mkdir(parents=True)
+
+        (routes_path / "health.py").write_text(
+            'async def get(): return {"ok": True}', encoding="utf-8"
+        )
+        (routes_path / "users" / "[user_id].py").write_text("""
+from runapi import Depends
+
+def current_tenant():
+    return "acme"
+
+async def get(user_id: str, tenant: str = Depends(current_tenant)):
+    return {"user_id": user_id, "tenant": tenant}
+
+async def put(user_id: str):
+    return {"updated": user_id}
+""", encoding="utf-8")
+        (routes_path / "items.py").write_text("""
+from runapi import cached
+
+cache = {"ttl": 60}
+
+@cached(ttl=5, vary=["Accept"])
+async def get():
+    return {"items": []}
+""", encoding="utf-8")
+        (routes_path / "legacy.py").write_text("""
+from fastapi import APIRouter
+router = APIRouter()
+
+async def get():
+    return {"legacy": True}
+""", encoding="utf-8")
+        (routes_path / "aliased.py").write_text(
+            "from os.path import join as get\n", encoding="utf-8"
+        )
+
+        info = scan_route_file(routes_path / "items.py")
+        assert info.methods == ["get"] and info.lazy_safe
+        assert info.cache == {"ttl": 60} and info.handler_cache == {"get": {"ttl": 5, "vary": ["Accept"]}}
+        assert scan_route_file(routes_path / "users" / "[user_id].py").methods == ["get", "put"]
+        assert not scan_route_file(routes_path / "legacy.py").lazy_safe
+        assert not scan_route_file(routes_path / "aliased.py").lazy_safe
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            from runapi import RunApiApp, RunApiConfig
+
+            config = RunApiConfig()
+            config.routes_lazy = True
+            config.routes_warmup = ["/health"]
+            config.routes_preimport = False
+            app = RunApiApp(config=config)
+
+            modules = {module.path.name: module for module in app.lazy_modules}
+            assert set(modules) == {"health.py", "[user_id].py", "items.py"}
+            assert modules["health.py"].loaded
+            assert not modules["[user_id].py"].loaded and not modules["items.py"].loaded
+            assert app.response_cache.match_policy("/items").ttl == 5
+
+            with TestClient(app.get_app()) as client:
+                assert client.get("/users/7").json() == {"user_id": "7", "tenant": "acme"}
+                assert modules["[user_id].py"].loaded
+                assert client.put("/users/7").json() == {"updated": "7"}
+                assert client.get("/legacy").json() == {"legacy": True}
+                assert client.get("/users/7/nope").status_code == 404
+                assert not modules["items.py"].loaded
+
+                # The schema is built from the real handlers
+                params = client.get("/openapi.json").json()["paths"]["/users/{user_id}"]["get"]["parameters"]
+                assert [param["name"] for param in params] == ["user_id"]
+                assert modules["items.py"].loaded
+
+            # Background pre-import loads everything left
+            app = RunApiApp(config=config)
+            assert not all(route.loaded for route in app.file_routes if isinstance(route, LazyAPIRoute))
+            asyncio.run(app._preimport_routes())
+            assert all(route.loaded for route in app.file_routes if isinstance(route, LazyAPIRoute))
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Lazy routes test passed!")
+
+
+def test_route_manifest():
+    """Test the persistent route manifest"""
+    print("🧪 Testing route manifest...")
+
+    from runapi import RunApiApp, RunApiConfig
+    from runapi.manifest import RouteManifest
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        routes_path = Path(temp_dir) / "routes"
+        (routes_path / "users").mkdir(parents=True)
+        (routes_path / "users" / "[user_id].py").write_text(
+            'async def get(user_id: str): return {"user_id": user_id}', encoding="utf-8"
+        )
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            manifest_path = Path(".runapi/routes.json")
+
+            # Off by default
+            RunApiApp(config=RunApiConfig())
+            assert not manifest_path.exists()
+
+            def manifest_config():
+                config = RunApiConfig()
+                config.routes_manifest = True
+                return config
+
+            # A manifest that cannot be written is skipped with a warning
+            Path("blocked").write_text("", encoding="utf-8")
+            config = manifest_config()
+            config.routes_manifest_path = "blocked/routes.json"
+            app = RunApiApp(config=config)
+            assert [route.path for route in app.file_routes] == ["/users/{user_id}"]
+
+            app = RunApiApp(config=manifest_config())
+            assert manifest_path.exists()
+            with TestClient(app.get_app()) as client:
+                assert client.get("/users/7").json() == {"user_id": "7"}
+
+            manifest = RouteManifest.load(manifest_path, Path("routes"))
+            (entry,) = manifest.entries
+            assert entry.path == "/users/{user_id}" and entry.params == ["user_id"] and entry.methods == ["get"]
+            # Bytecode written by the import does not count as a change
+            assert manifest.is_valid()
+
+            # An unchanged tree is not walked or scanned again
+            build = RouteManifest.build
+            RouteManifest.build = classmethod(lambda cls, *args, **kwargs: pytest.fail("manifest rebuilt"))
+            try:
+                app = RunApiApp(config=manifest_config())
+            finally:
+                RouteManifest.build = build
+            assert [route.path for route in app.file_routes] == ["/users/{user_id}"]
+
+            # New and edited files invalidate it
+            (routes_path / "health.py").write_text('async def get(): return {"ok": True}', encoding="utf-8")
+            assert not manifest.is_valid()
+            app = RunApiApp(config=manifest_config())
+            assert sorted(route.path for route in app.file_routes) == ["/health", "/users/{user_id}"]
+
+            manifest = RouteManifest.build(Path("routes"), validate="hash")
+            route_file = routes_path / "health.py"
+            stat = route_file.stat()
+            route_file.write_text('async def get(): return {"ok": 1}', encoding="utf-8")
+            os.utime(route_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            assert not manifest.is_valid()
+
+            assert RouteManifest.load(Path("missing.json"), Path("routes")) is None
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Route manifest test passed!")
+
+
+def test_concurrent_route_imports():
+    """Test route discovery and concurrent route module imports"""
+    print("🧪 Testing concurrent route imports...")
+
+    from runapi import RunApiApp, RunApiConfig
+    from runapi.discovery import discover_route_files, scan_route_file
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        routes_path = Path(temp_dir) / "routes"
+        for section in ("a", "b", "[org]"):
+            (routes_path / section).mkdir(parents=True)
+            for i in range(5):
+                (routes_path / section / f"page{i}.py").write_text(
+                    f"import threading\nTHREAD = threading.current_thread().name\n"
+                    f"async def get(): return {{'page': {i}, 'thread': THREAD}}\n",
+                    encoding="utf-8",
+                )
+        (routes_path / "a" / "relative.py").write_text(
+            "from . import page0\nasync def get(): return {}\n", encoding="utf-8"
+        )
+        (routes_path / "broken.py").write_text("async def get(:\n", encoding="utf-8")
+
+        assert scan_route_file(routes_path / "a" / "relative.py").local_imports
+        assert not scan_route_file(routes_path / "a" / "page0.py").local_imports
+
+        files, directories = discover_route_files(routes_path, workers=4)
+        assert len(directories) == 4
+        assert [path.relative_to(routes_path).as_posix() for path, _ in files][:3] == [
+            "[org]/page0.py", "[org]/page1.py", "[org]/page2.py"
+        ]
+        assert dict((path.name, prefix) for path, prefix in files if "org" in str(path))["page0.py"] == "/{org}"
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            tables = []
+            for workers in (1, 4):
+                config = RunApiConfig()
+                config.routes_manifest = False
+                config.routes_import_workers = workers
+                app = RunApiApp(config=config)
+                tables.append([(route.path, sorted(route.methods)) for route in app.file_routes])
+
+                assert len(app.route_import_times) == 17  # includes the broken file
+                (slowest, seconds), = app.route_import_report(1)
+                assert seconds == max(app.route_import_times.values())
+                with TestClient(app.get_app()) as client:
+                    thread = client.get("/b/page3").json()["thread"]
+                    assert thread.startswith("runapi-import") == (workers > 1)
+                    assert client.get("/acme/page1").json()["page"] == 1
+
+            # The route table does not depend on import order
+            assert tables[0] == tables[1] and len(tables[0]) == 15
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Concurrent route imports test passed!")
+
+
+def test_startup_profiling():
+    """Test the startup profile of phases, route files and imports"""
+    print("🧪 Testing startup profiling...")
+
+    import sys
+
+    from runapi import RunApiApp, RunApiConfig
+    from runapi.profiling import StartupProfiler
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        (Path(temp_dir) / "routes").mkdir()
+        (Path(temp_dir) / "profiled_dep.py").write_text(
+            "import profiled_subdep\nDATA = [str(i) for i in range(1000)]\n", encoding="utf-8"
+        )
+        (Path(temp_dir) / "profiled_subdep.py").write_text("VALUE = 1\n", encoding="utf-8")
+        (Path(temp_dir) / "routes" / "index.py").write_text(
+            "import profiled_dep\nasync def get(): return {'ok': True}\n", encoding="utf-8"
+        )
+
+        old_cwd = os.getcwd()
+        sys.path.insert(0, temp_dir)
+        meta_path = list(sys.meta_path)
+        try:
+            os.chdir(temp_dir)
+            config = RunApiConfig()
+            config.routes_manifest = False
+            app = RunApiApp(config=config, profile_startup=True)
+            profile = app.startup_profile
+
+            # The import hook is removed once startup is done
+            assert sys.meta_path == meta_path and not profile.running
+
+            phases = [span.name for span in profile.top("phase")]
+            assert {"config", "create_app", "setup_default_middleware", "load_routes", "setup_static_files"} <= set(phases)
+            (route,) = profile.top("route")
+            assert route.name.endswith("index.py") and route.allocated is not None
+            imports = {span.name: span for span in profile.top("import")}
+            assert imports["profiled_dep"].depth == route.depth + 1
+            assert imports["profiled_subdep"].depth == route.depth + 2
+            assert imports["profiled_dep"].self_time <= imports["profiled_dep"].duration
+
+            # Modules keep their real loader
+            assert not type(sys.modules["profiled_dep"].__loader__).__name__.startswith("_Timed")
+
+            data = json.loads(profile.to_json())
+            assert data["route_files"][0]["name"] == route.name and data["total_ms"] > 0
+            assert "Route files:" in profile.format_table()
+
+            speedscope = profile.to_speedscope()
+            stack = []
+            for event in speedscope["profiles"][0]["events"]:
+                if event["type"] == "O":
+                    stack.append(event["frame"])
+                else:
+                    assert stack.pop() == event["frame"]
+            assert not stack
+
+            assert RunApiApp(config=config).startup_profile is None
+            profiler = StartupProfiler(trace_allocations=False)
+            RunApiApp(config=config, profile_startup=profiler)
+            assert profiler.top("phase") and profiler.top("phase")[0].allocated is None
+        finally:
+            os.chdir(old_cwd)
+            sys.path.remove(temp_dir)
+            sys.modules.pop("profiled_dep", None)
+            sys.modules.pop("profiled_subdep", None)
+
+    print("✅ Startup profiling test passed!")
+
+
+def test_route_hot_reload():
+    """Test swapping a single changed route file into a running app"""
+    print("🧪 Testing route hot reload...")
+
+    import asyncio
+
+    from runapi import RunApiApp, RunApiConfig
+    from runapi.reload import RouteReloader
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        routes_path = Path(temp_dir) / "routes"
+        (routes_path / "users").mkdir(parents=True)
+        (routes_path / "index.py").write_text("async def get(): return {'page': 'index'}\n", encoding="utf-8")
+        users = routes_path / "users" / "[user_id].py"
+        users.write_text("async def get(user_id: str): return {'version': 1, 'id': user_id}\n", encoding="utf-8")
+        (routes_path / "zz.py").write_text("async def get(): return {'page': 'zz'}\n", encoding="utf-8")
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            for lazy in (False, True):
+                users.write_text("async def get(user_id: str): return {'version': 1, 'id': user_id}\n", encoding="utf-8")
+                config = RunApiConfig()
+                config.routes_manifest = False
+                config.routes_lazy = lazy
+                app = RunApiApp(config=config)
+                router = app.get_app().router
+                order = [route.path for route in router.routes]
+
+                with TestClient(app.get_app()) as client:
+                    assert client.get("/users/7").json() == {"version": 1, "id": "7"}
+
+                    users.write_text(
+                        "async def get(user_id: str): return {'version': 2, 'id': user_id}\n"
+                        "async def delete(user_id: str): return {'deleted': user_id}\n",
+                        encoding="utf-8",
+                    )
+                    assert app.reload_route_file(users)
+                    assert client.get("/users/7").json() == {"version": 2, "id": "7"}
+                    assert client.delete("/users/7").json() == {"deleted": "7"}
+                    # Swapped in place, not appended
+                    assert [route.path for route in router.routes if route.path != "/users/{user_id}"] == [
+                        path for path in order if path != "/users/{user_id}"
+                    ]
+                    assert "delete" in client.get("/openapi.json").json()["paths"]["/users/{user_id}"]
+
+                    # A broken edit keeps the previous routes
+                    users.write_text("async def get(user_id: str:\n", encoding="utf-8")
+                    assert not app.reload_route_file(users)
+                    assert client.get("/users/7").json()["version"] == 2
+
+                    # Deleting the file removes its routes
+                    users.unlink()
+                    assert app.reload_route_file(users)
+                    assert client.get("/users/7").status_code == 404
+                    assert client.get("/zz").json() == {"page": "zz"}
+
+                # The reloader picks up added files
+                reloader = RouteReloader(app)
+                asyncio.run(reloader.start())
+                (routes_path / "added.py").write_text("async def get(): return {'page': 'added'}\n", encoding="utf-8")
+                changed = asyncio.run(reloader.check())
+                assert [Path(path).name for path in changed] == ["added.py"]
+                with TestClient(app.get_app()) as client:
+                    assert client.get("/added").json() == {"page": "added"}
+                (routes_path / "added.py").unlink()
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Route hot reload test passed!")
+
+
+def test_process_supervisor():
+    """Test preforked workers: recycling, rolling restart and memory report"""
+    print("🧪 Testing process supervisor...")
+
+    import signal
+    import socket
+    import subprocess
+    import sys
+    import time
+    import urllib.request
+
+    import psutil
+    from runapi.supervisor import can_fork, process_memory
+
+    memory = process_memory(os.getpid())
+    assert memory["rss"] > 0
+    if not can_fork():
+        pytest.skip("os.fork() is not available")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    package_root = str(Path(__file__).resolve().parent.parent)
+    script = f"""
+import os, sys
+from fastapi import FastAPI
+from runapi.supervisor import Supervisor
+
+app = FastAPI()
+PRELOADED_BY = os.getpid()
+
+@app.get("/")
+async def index():
+    return {{"pid": os.getpid(), "preloaded_by": PRELOADED_BY}}
+
+sys.exit(Supervisor(app, port={port}, workers=1, max_requests=3, max_requests_jitter=1, graceful_timeout=5, log_level="warning").run())
+"""
+
+    def get():
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as response:
+            return json.loads(response.read())
+
+    env = dict(os.environ, PYTHONPATH=package_root)
+    process = subprocess.Popen([sys.executable, "-c", script], env=env)
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                first = get()
+                break
+            except OSError:
+                assert time.monotonic() < deadline, "supervisor did not start"
+                time.sleep(0.1)
+
+        # Built once in the supervisor, served by a forked worker
+        assert first["preloaded_by"] == process.pid != first["pid"]
+
+        # The worker is replaced after max_requests (checked every 0.1s by
+        # uvicorn); no request fails meanwhile
+        pids = {first["pid"]}
+        for _ in range(8):
+            time.sleep(0.15)
+            pids.add(get()["pid"])
+        assert len(pids) >= 2
+
+        # SIGHUP starts a new worker before stopping the old one
+        before = get()["pid"]
+        process.send_signal(signal.SIGHUP)
+        seen = set()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and seen <= {before}:
+            seen.add(get()["pid"])
+            time.sleep(0.05)
+        assert seen - {before}
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    # A rolling restart onto a broken deploy keeps the old workers serving
+    with tempfile.TemporaryDirectory() as temp_dir:
+        (Path(temp_dir) / "main.py").write_text(
+            "import os\n"
+            "from fastapi import FastAPI\n"
+            "if os.path.exists('broken'):\n"
+            "    raise RuntimeError('bad deploy')\n"
+            "app = FastAPI()\n"
+            "@app.get('/')\n"
+            "async def index():\n"
+            "    return {'pid': os.getpid()}\n",
+            encoding="utf-8",
+        )
+        script = f"""
+import sys
+from runapi.supervisor import Supervisor
+sys.exit(Supervisor("main:app", port={port}, workers=2, preload=False, graceful_timeout=5, log_level="critical").run())
+"""
+        process = subprocess.Popen([sys.executable, "-c", script], cwd=temp_dir, env=env)
+        try:
+            deadline = time.monotonic() + 15
+            while True:
+                try:
+                    before = get()["pid"]
+                    break
+                except OSError:
+                    assert time.monotonic() < deadline, "supervisor did not start"
+                    time.sleep(0.1)
+
+            supervisor = psutil.Process(process.pid)
+            workers = {child.pid for child in supervisor.children()}
+            assert before in workers and len(workers) == 2
+
+            (Path(temp_dir) / "broken").touch()
+            process.send_signal(signal.SIGHUP)
+            time.sleep(2)
+            assert process.poll() is None
+            assert {child.pid for child in supervisor.children()} == workers
+            assert {get()["pid"] for _ in range(10)} <= workers
+
+            process.send_signal(signal.SIGTERM)
+            assert process.wait(timeout=15) == 0
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    print("✅ Process supervisor test passed!")
+
+
+def test_worker_tuning():
+    """Test --workers auto and event loop / HTTP parser selection"""
+    print("🧪 Testing worker tuning...")
+
+    import importlib.util
+    import sys
+
+    from runapi.tuning import (
+        auto_workers, cgroup_cpu_limit, cgroup_memory_limit, resolve_workers, select_http, select_loop,
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        assert cgroup_cpu_limit(temp_dir) is None
+        assert cgroup_memory_limit(temp_dir) is None
+
+        # cgroup v1
+        (root / "cpu").mkdir()
+        (root / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+        (root / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+        assert cgroup_cpu_limit(temp_dir) is None
+        (root / "cpu" / "cpu.cfs_quota_us").write_text("150000\n")
+        assert cgroup_cpu_limit(temp_dir) == 1.5
+        (root / "memory").mkdir()
+        (root / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+        assert cgroup_memory_limit(temp_dir) is None
+
+        # cgroup v2 takes precedence
+        (root / "cpu.max").write_text("max 100000\n")
+        assert cgroup_cpu_limit(temp_dir) is None
+        (root / "cpu.max").write_text("250000 100000\n")
+        assert cgroup_cpu_limit(temp_dir) == 2.5
+        (root / "memory.max").write_text("536870912\n")
+        assert cgroup_memory_limit(temp_dir) == 512 * 1024 * 1024
+
+    workers, reason = resolve_workers("auto")
+    assert workers >= 1 and reason.startswith("auto: ") and "CPU" in reason
+    # Memory caps the count: a worker needing more than is free still gets one
+    assert auto_workers(worker_memory=1 << 62)[0] == 1
+    assert resolve_workers("3") == (3, "")
+    for invalid in ("0", "many"):
+        with pytest.raises(ValueError):
+            resolve_workers(invalid)
+
+    has_uvloop = importlib.util.find_spec("uvloop") is not None
+    has_httptools = importlib.util.find_spec("httptools") is not None
+    assert select_loop("auto") == ("uvloop" if has_uvloop and sys.platform != "win32" else "asyncio")
+    assert select_http("auto") == ("httptools" if has_httptools else "h11")
+    assert select_loop("asyncio") == "asyncio" and select_http("h11") == "h11"
+    with pytest.raises(ValueError):
+        select_loop("trio")
+    if not has_httptools:
+        with pytest.raises(ValueError):
+            select_http("httptools")
+
+    from runapi import RunApiConfig
+    os.environ["WORKERS"] = "auto"
+    try:
+        assert RunApiConfig().workers == "auto"
+    finally:
+        del os.environ["WORKERS"]
+
+    print("✅ Worker tuning test passed!")
+
+
+def test_lazy_package_imports():
+    """Test that importing runapi or its CLI does not load FastAPI, jose or passlib"""
+    print("🧪 Testing lazy package imports...")
+
+    import subprocess
+    import sys
+
+    package_root = str(Path(__file__).resolve().parent.parent)
+    script = """
+import json, sys, time
+started = time.perf_counter()
+import runapi
+elapsed = time.perf_counter() - started
+loaded = sorted(name for name in sys.modules if name.split(".")[0] in ("runapi", "fastapi", "starlette", "pydantic", "jose", "passlib", "cryptography"))
+app_loaded = None
+if "--app" in sys.argv:
+    runapi.create_runapi_app()
+    app_loaded = sorted(name for name in ("jose", "passlib", "runapi.auth") if name in sys.modules)
+cli_loaded = None
+if "--cli" in sys.argv:
+    import runapi.cli
+    cli_loaded = sorted(name for name in sys.modules if name.split(".")[0] in ("runapi", "fastapi", "starlette"))
+token = runapi.create_access_token({"sub": "1"}) if "--auth" in sys.argv else None
+print(json.dumps({"elapsed": elapsed, "loaded": loaded, "app_loaded": app_loaded, "cli_loaded": cli_loaded, "auth": "jose" in sys.modules and bool(token)}))
+"""
+
+    def run(*args):
+        env = dict(os.environ, PYTHONPATH=package_root, SECRET_KEY="lazy-import-test")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = subprocess.run(
+                [sys.executable, "-c", script, *args], cwd=temp_dir, env=env,
+                capture_output=True, text=True, check=True,
+            ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    result = run()
+    assert result["loaded"] == ["runapi"], result["loaded"]
+    # Generous bound for slow CI machines; the eager package took ~600ms here
+    assert result["elapsed"] < 0.25, result["elapsed"]
+
+    # The CLI loads FastAPI only for the commands that build an application
+    cli = run("--cli")["cli_loaded"]
+    assert "runapi.cli" in cli and not any(name.split(".")[0] in ("fastapi", "starlette") for name in cli), cli
+
+    # An application without auth never loads jose or passlib
+    assert run("--app")["app_loaded"] == []
+    # Using auth loads it on first access
+    assert run("--auth")["auth"] is True
+
+    import runapi
+    assert set(runapi.__all__) <= set(dir(runapi))
+    assert runapi.FastAPICORSMiddleware.__name__ == "CORSMiddleware"
+    # Every module of the package is reachable as an attribute
+    modules = {path.stem for path in Path(runapi.__file__).parent.glob("*.py")} - {"__init__"}
+    assert runapi._SUBMODULES == modules, modules ^ runapi._SUBMODULES
+    assert all(getattr(runapi, name).__name__ == f"runapi.{name}" for name in modules)
+    with pytest.raises(AttributeError):
+        runapi.does_not_exist
+
+    print("✅ Lazy package imports test passed!")
+
+
 def test_cors_configuration():
     """Test CORS configuration"""
     print("🧪 Testing CORS configuration...")
@@ -339,6 +1800,414 @@ def test_static_file_serving():
     print("✅ Static file serving test passed!")
 
 
+def test_static_build_pipeline():
+    """Test fingerprinted, precompressed static files"""
+    print("🧪 Testing static build pipeline...")
+
+    import gzip
+
+    from runapi import RunApiConfig, create_runapi_app
+    from runapi.static import IMMUTABLE_CACHE_CONTROL, StaticManifest, hashed_name
+
+    assert hashed_name("css/app.css", "0123456789abcdef") == "css/app.0123456789.css"
+    assert hashed_name("LICENSE", "0123456789abcdef") == "LICENSE.0123456789"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        static_path = temp_path / "static"
+        (static_path / "css").mkdir(parents=True)
+        css = "body { color: red; }\n" * 200
+        (static_path / "css" / "app.css").write_text(css, encoding="utf-8")
+        (static_path / "logo.png").write_bytes(b"\x89PNG" + b"0" * 2000)
+        (static_path / ".hidden").write_text("secret", encoding="utf-8")
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            config = RunApiConfig()
+            config.static_precompressed = True
+
+            # Without a build the static directory is served as is
+            app = create_runapi_app(config=config)
+            assert app.static_manifest is None
+            assert app.static_url("css/app.css") == "/static/css/app.css"
+
+            manifest = StaticManifest.build(static_path, Path(config.static_build_path), config=config)
+            asset = manifest.assets["css/app.css"]
+            assert set(manifest.assets) == {"css/app.css", "logo.png"}
+            assert "gzip" in asset.encodings and not manifest.assets["logo.png"].encodings
+            built = Path(config.static_build_path) / asset.hashed
+            assert built.read_text(encoding="utf-8") == css
+            assert gzip.decompress((built.parent / (built.name + ".gz")).read_bytes()).decode() == css
+            assert StaticManifest.load(Path(config.static_build_path)).assets["css/app.css"].hashed == asset.hashed
+
+            app = create_runapi_app(config=config)
+            url = app.static_url("css/app.css")
+            assert url == f"/static/{asset.hashed}"
+
+            with TestClient(app.get_app()) as client:
+                response = client.get(url, headers={"Accept-Encoding": "gzip"})
+                assert response.status_code == 200
+                assert response.headers["content-encoding"] == "gzip"
+                assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+                assert "Accept-Encoding" in response.headers["vary"]
+                assert response.text == css
+                etag = response.headers["etag"]
+
+                response = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+                assert response.status_code == 304
+
+                response = client.get("/static/css/app.css", headers={"Accept-Encoding": "identity"})
+                assert response.status_code == 200
+                assert "content-encoding" not in response.headers
+                assert response.headers["cache-control"] == "no-cache"
+                assert response.headers["etag"] != etag
+
+                response = client.get(url, headers={"Accept-Encoding": "gzip", "Range": "bytes=0-3"})
+                assert response.status_code == 206
+                assert response.content == b"body"
+                assert "content-encoding" not in response.headers
+
+                assert client.get("/static/.hidden").status_code == 404
+                assert client.post(url).status_code == 405
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Static build pipeline test passed!")
+
+
+def test_hot_static_cache():
+    """Test the in-memory static file cache, mmap serving and Range requests"""
+    print("🧪 Testing hot static file cache...")
+
+    from runapi import RunApiConfig, create_runapi_app
+    from runapi.static import HotStaticFiles, parse_range
+
+    assert parse_range("bytes=0-3", 10) == (0, 4)
+    assert parse_range("bytes=5-", 10) == (5, 10)
+    assert parse_range("bytes=-4", 10) == (6, 10)
+    assert parse_range("bytes=0-1,3-4", 10) is None
+    assert parse_range("bytes=a-b", 10) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=20-", 10)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        static_path = temp_path / "static"
+        static_path.mkdir()
+        (static_path / "hello.txt").write_text("Hello, cache!", encoding="utf-8")
+        large = bytes(range(256)) * 400
+        (static_path / "large.bin").write_bytes(large)
+        (temp_path / "secret.txt").write_text("secret", encoding="utf-8")
+
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(temp_dir)
+            config = RunApiConfig()
+            config.static_hot_cache = True
+            config.static_hot_max_file_size = 50 * 1024
+            config.static_hot_invalidation = "poll"
+            config.static_hot_check_interval = 0.0
+            app = create_runapi_app(config=config)
+            hot = next(route.app for route in app.get_app().routes if isinstance(getattr(route, "app", None), HotStaticFiles))
+
+            with TestClient(app.get_app()) as client:
+                response = client.get("/static/hello.txt")
+                assert response.status_code == 200
+                assert response.text == "Hello, cache!"
+                assert response.headers["accept-ranges"] == "bytes"
+                assert client.get("/static/hello.txt").text == "Hello, cache!"
+                assert hot.hits == 1 and hot.misses == 1
+
+                # Polling notices the rewrite
+                time.sleep(0.01)
+                (static_path / "hello.txt").write_text("Hello again!", encoding="utf-8")
+                assert client.get("/static/hello.txt").text == "Hello again!"
+
+                etag = client.get("/static/hello.txt").headers["etag"]
+                assert client.get("/static/hello.txt", headers={"If-None-Match": etag}).status_code == 304
+
+                response = client.get("/static/hello.txt", headers={"Range": "bytes=6-"})
+                assert response.status_code == 206
+                assert response.content == b"again!"
+                assert response.headers["content-range"] == "bytes 6-11/12"
+                response = client.get("/static/hello.txt", headers={"Range": "bytes=50-"})
+                assert response.status_code == 416
+
+                # Files above the size limit are memory-mapped
+                response = client.get("/static/large.bin")
+                assert response.content == large
+                assert "large.bin" not in {Path(path).name for path in hot._files}
+                response = client.get("/static/large.bin", headers={"Range": "bytes=1000-1999"})
+                assert response.status_code == 206
+                assert response.content == large[1000:2000]
+
+                assert client.get("/static/../secret.txt").status_code == 404
+                assert client.get("/static/missing.txt").status_code == 404
+                assert client.post("/static/hello.txt").status_code == 405
+
+            # Mapped files stream as memoryview slices; a file truncated in
+            # place mid-response aborts it instead of faulting the process
+            streamed = static_path / "streamed.bin"
+            streamed.write_bytes(b"s" * (600 * 1024))
+            mapped = HotStaticFiles(static_path, max_file_size=1024, invalidation="poll", check_interval=60)
+            scope = {
+                "type": "http", "method": "GET", "path": "/streamed.bin", "root_path": "",
+                "query_string": b"", "headers": [],
+            }
+            bodies = []
+
+            async def receive():
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                if message["type"] == "http.response.body":
+                    bodies.append(message["body"])
+                    if len(bodies) == 1 and truncate:
+                        with open(streamed, "r+b") as file:
+                            file.truncate(1024)
+
+            truncate = False
+            asyncio.run(mapped(scope, receive, send))
+            assert all(isinstance(body, memoryview) for body in bodies)
+            assert b"".join(bodies) == streamed.read_bytes()
+            bodies.clear()
+            truncate = True
+            with pytest.raises(RuntimeError):
+                asyncio.run(mapped(scope, receive, send))
+            assert len(bodies) == 1 and not mapped._mapped
+
+            inotify = HotStaticFiles(static_path, invalidation="auto")
+
+            async def watch():
+                path = str(static_path / "hello.txt")
+                assert (await inotify.get_file(path)).body == b"Hello again!"
+                if not inotify.watching:
+                    return
+                (static_path / "hello.txt").write_text("Hello, inotify!", encoding="utf-8")
+                for _ in range(50):
+                    await asyncio.sleep(0.01)
+                    if path not in inotify._files:
+                        break
+                assert (await inotify.get_file(path)).body == b"Hello, inotify!"
+                inotify.close()
+
+            asyncio.run(watch())
+        finally:
+            os.chdir(old_cwd)
+
+    print("✅ Hot static file cache test passed!")
+
+
+def test_streaming_uploads():
+    """Test upload size limits, streamed uploads with checksums and resumable uploads"""
+    print("🧪 Testing streaming uploads...")
+
+    import hashlib
+
+    import psutil
+    from fastapi import File, UploadFile
+    from runapi import RunApiConfig, UploadLimitMiddleware, UploadManager, setup_error_handlers
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = RunApiConfig()
+        config.max_upload_size = 1000
+        config.upload_path = str(Path(temp_dir) / "uploads")
+        uploads = UploadManager(config=config, chunk_size=256)
+
+        app = FastAPI()
+        setup_error_handlers(app)
+        app.add_middleware(UploadLimitMiddleware, config=config)
+        app.include_router(uploads.router())
+        calls = []
+
+        @app.post("/form")
+        async def form(file: UploadFile = File(...)):
+            calls.append(file.filename)
+            return {"size": len(await file.read())}
+
+        @app.post("/raw")
+        async def raw(request: Request):
+            stored = await uploads.receive(request, filename="../../data.bin")
+            return stored.to_dict()
+
+        @app.post("/multipart")
+        async def multipart(request: Request):
+            fields, files = await uploads.receive_multipart(request)
+            return {"fields": fields, "files": {name: [f.to_dict() for f in group] for name, group in files.items()}}
+
+        body = bytes(range(256)) * 3
+        with TestClient(app) as client:
+            # Rejected from Content-Length, before the route or FastAPI reads the form
+            response = client.post("/form", files={"file": ("big.bin", b"x" * 5000)})
+            assert response.status_code == 413
+            assert response.json()["error"]["code"] == "PAYLOAD_TOO_LARGE"
+            assert calls == []
+            assert client.post("/form", files={"file": ("small.bin", b"x" * 100)}).json() == {"size": 100}
+
+            # Chunked bodies are cut off at the chunk that crosses the limit
+            response = client.post("/raw", content=iter([b"x" * 600, b"x" * 600]))
+            assert response.status_code == 413
+
+            response = client.post("/raw", content=body)
+            stored = response.json()
+            assert stored["filename"] == "data.bin"
+            assert stored["size"] == len(body)
+            assert stored["checksums"]["sha256"] == hashlib.sha256(body).hexdigest()
+            assert Path(stored["path"]).read_bytes() == body
+            assert Path(stored["path"]).parent == Path(config.upload_path)
+
+            response = client.post("/multipart", data={"title": "Report"}, files={"doc": ("r.txt", b"hello" * 50)})
+            result = response.json()
+            assert result["fields"] == {"title": "Report"}
+            assert result["files"]["doc"][0]["checksums"]["sha256"] == hashlib.sha256(b"hello" * 50).hexdigest()
+
+            # Malformed, unnamed or truncated multipart bodies are 400s that leave no files behind
+            existing = sorted(os.listdir(config.upload_path))
+            headers = {"Content-Type": "multipart/form-data; boundary=b"}
+            stored_part = b'--b\r\nContent-Disposition: form-data; name="doc"; filename="a.txt"\r\n\r\nabc\r\n'
+            for bad in (
+                stored_part + b"--b\r\nbad header\r\n\r\nx\r\n--b--\r\n",
+                stored_part + b'--b\r\nContent-Disposition: form-data; filename="b.txt"\r\n\r\nx\r\n--b--\r\n',
+                stored_part + b'--b\r\nContent-Disposition: form-data; name="c"; filename="c.txt"\r\n\r\nxyz',
+            ):
+                response = client.post("/multipart", content=bad, headers=headers)
+                assert response.status_code == 400
+                assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+            assert sorted(os.listdir(config.upload_path)) == existing
+
+            # Resumable upload in two requests, with a stale offset rejected
+            response = client.post("/uploads", headers={"Upload-Length": str(len(body)), "Upload-Filename": "big.bin"})
+            assert response.status_code == 201
+            location = response.headers["location"]
+            response = client.patch(location, content=body[:500], headers={"Upload-Offset": "0"})
+            assert response.status_code == 204 and response.headers["upload-offset"] == "500"
+            assert client.head(location).headers["upload-offset"] == "500"
+            assert client.patch(location, content=body[500:], headers={"Upload-Offset": "0"}).status_code == 409
+            uploads._resumable_hashers.clear()  # as after a restart: rebuilt from disk
+            response = client.patch(location, content=body[500:], headers={"Upload-Offset": "500"})
+            assert response.status_code == 201
+            assert response.json()["checksums"]["sha256"] == hashlib.sha256(body).hexdigest()
+            assert client.head(location).status_code == 404
+            assert client.post("/uploads", headers={"Upload-Length": "5000"}).status_code == 413
+
+        # Streamed to disk with flat memory; RUNAPI_SLOW_TESTS=1 sends 2 GB
+        slow = os.environ.get("RUNAPI_SLOW_TESTS", "").lower() in ("1", "true", "yes")
+        size, chunk = (2 * 1024 ** 3 if slow else 64 * 1024 ** 2), os.urandom(1024 * 1024)
+        config.max_upload_size = size
+        uploads = UploadManager(config=config)
+        big_app = FastAPI()
+
+        @big_app.post("/raw")
+        async def big_raw(request: Request):
+            return (await uploads.receive(request, filename="big.bin")).to_dict()
+
+        process = psutil.Process()
+        baseline = peak = process.memory_info().rss
+        expected = hashlib.sha256()
+        sent = 0
+
+        async def receive():
+            nonlocal sent, peak
+            if sent % (16 * len(chunk)) == 0:
+                peak = max(peak, process.memory_info().rss)
+            sent += len(chunk)
+            expected.update(chunk)
+            return {"type": "http.request", "body": chunk, "more_body": sent < size}
+
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http", "method": "POST", "path": "/raw", "root_path": "", "query_string": b"",
+            "headers": [(b"content-length", str(size).encode())], "http_version": "1.1",
+        }
+        asyncio.run(big_app(scope, receive, send))
+        assert messages[0]["status"] == 200
+        stored = json.loads(messages[1]["body"])
+        assert stored["size"] == size and os.path.getsize(stored["path"]) == size
+        assert stored["checksums"]["sha256"] == expected.hexdigest()
+        assert peak - baseline < min(64 * 1024 ** 2, size // 2), f"RSS grew by {(peak - baseline) >> 20} MB"
+
+    print("✅ Streaming uploads test passed!")
+
+
+def test_json_engine():
+    """Test configurable JSON engines for route return values and error responses"""
+    print("🧪 Testing JSON engine...")
+
+    from starlette.responses import JSONResponse as StarletteJSONResponse
+    from runapi import ErrorResponse, JSONResponse, RunApiConfig, create_runapi_app, get_json_engine, json_response_class
+    from runapi.serialization import available_json_engines
+
+    document = {"items": [{"id": i, "name": f"itém {i}", "score": i / 3, "tags": ["a", None, True]} for i in range(50)]}
+    expected = StarletteJSONResponse(document).body
+    for name in available_json_engines():
+        engine = get_json_engine(name)
+        assert engine.name == name
+        assert json.loads(engine.dumps(document)) == json.loads(expected)
+    assert get_json_engine("json").dumps(document) == expected
+    assert get_json_engine("auto").name == available_json_engines()[0]
+    # Values a fast engine refuses fall back to the stdlib encoder
+    assert get_json_engine("auto").dumps({"big": 2 ** 70}) == b'{"big":1180591620717411303424}'
+    # Fast engines and their fallback agree on non-finite floats
+    if get_json_engine("auto").name != "json":
+        assert get_json_engine("auto").dumps({"x": float("inf")}) == b'{"x":null}'
+        assert get_json_engine("auto").dumps({"x": float("nan"), "big": 2 ** 70}) == (
+            b'{"x":null,"big":1180591620717411303424}'
+        )
+    with pytest.raises(ValueError):
+        get_json_engine("json").dumps({"x": float("inf")})
+    with pytest.raises(ValueError):
+        get_json_engine("simdjson")
+    for name in ("orjson", "msgspec"):
+        if name not in available_json_engines():
+            with pytest.raises(ValueError):
+                get_json_engine(name)
+
+    response_class = json_response_class("json")
+    assert issubclass(response_class, JSONResponse) and response_class.json_engine.name == "json"
+    assert json_response_class("json") is response_class
+
+    config = RunApiConfig()
+    config.json_engine = "auto"
+    app = create_runapi_app(config=config)
+    fastapi_app = app.get_app()
+    assert fastapi_app.router.default_response_class.json_engine is get_json_engine("auto")
+
+    @fastapi_app.get("/document")
+    async def get_document():
+        return document
+
+    with TestClient(fastapi_app) as client:
+        response = client.get("/document")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == document
+
+    error = ErrorResponse("Nope", 404, "NOT_FOUND").to_json_response()
+    assert isinstance(error, JSONResponse)
+    assert json.loads(error.body) == {"error": {"code": "NOT_FOUND", "message": "Nope", "status_code": 404}}
+
+    # Error and upload responses follow the app's engine, not the global configuration
+    from runapi import NotFoundError, RunApiException, UploadLimitMiddleware, UploadManager
+
+    config = RunApiConfig()
+    config.json_engine = "json"
+    fastapi_app = create_runapi_app(config=config).get_app()
+    request = Request({"type": "http", "method": "GET", "path": "/missing", "headers": [], "query_string": b""})
+    handler = fastapi_app.exception_handlers[RunApiException]
+    error = asyncio.run(handler(request, NotFoundError("Nope")))
+    assert type(error).json_engine.name == "json"
+    assert json.loads(error.body)["error"]["code"] == "NOT_FOUND_ERROR"
+    assert UploadManager(config=config).response_class.json_engine.name == "json"
+    assert UploadLimitMiddleware(fastapi_app, config=config).response_class.json_engine.name == "json"
+
+    print("✅ JSON engine test passed!")
+
+
 def run_all_tests():
     """Run all tests"""
     print("🚀 Starting RunApi Framework Tests\n")
@@ -348,11 +2217,36 @@ def run_all_tests():
         test_configuration_system,
         test_error_handling,
         test_authentication_system,
+        test_token_cache,
+        test_async_password_hashing,
+        test_path_matcher,
         test_file_based_routing,
         test_middleware_system,
+        test_pure_asgi_middleware_hooks,
+        test_fused_middleware_pipeline,
+        test_rate_limit_store_bounded,
+        test_rate_limit_algorithms,
+        test_shared_memory_rate_limit_store,
+        test_redis_backends,
+        test_compression_middleware,
+        test_response_cache_middleware,
+        test_route_cache_declarations,
         test_dynamic_routes,
+        test_radix_router,
+        test_lazy_routes,
+        test_route_manifest,
+        test_concurrent_route_imports,
+        test_startup_profiling,
+        test_route_hot_reload,
+        test_process_supervisor,
+        test_worker_tuning,
+        test_lazy_package_imports,
         test_cors_configuration,
         test_static_file_serving,
+        test_static_build_pipeline,
+        test_hot_static_cache,
+        test_streaming_uploads,
+        test_json_engine,
         test_router_discovery,
         test_nested_routing_behavior,
     ]